@@ -4,6 +4,9 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from config import Config
+from app.calculations.cache import PlanCache
+from app.identity import UserCache
+from app.passwords import PasswordHasher
 
 # Initialize extensions, but don't attach them to an app yet
 db = SQLAlchemy()
@@ -11,15 +14,26 @@ migrate = Migrate()
 login = LoginManager()
 login.login_view = 'auth.login'
 login.login_message = 'Please log in to access this page.'
+login.blueprint_login_views['api'] = None  # The JSON API answers 401 instead of redirecting
+plan_cache = PlanCache()
+user_cache = UserCache()
+password_hasher = PasswordHasher()
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
     # Initialize Flask extensions with the app
+    from app.database import apply_db_profile, configure_engine
+    apply_db_profile(app)
     db.init_app(app)
+    with app.app_context():
+        configure_engine(app, db.engine)  # Takes effect on the first connection; nothing connects here
     migrate.init_app(app, db)
     login.init_app(app)
+    plan_cache.init_app(app)
+    user_cache.init_app(app)
+    password_hasher.init_app(app)
 
     # Register Blueprints
     from app.main import bp as main_bp
@@ -33,9 +47,24 @@ def create_app(config_class=Config):
     
     from app.dashboard import bp as dashboard_bp
     app.register_blueprint(dashboard_bp, url_prefix='/dashboard')
+    
+    from app.api import bp as api_bp
+    app.register_blueprint(api_bp, url_prefix='/api')
 
     # Import models here AFTER db is initialized and within app context
     # This is important for Flask-Migrate
     from app import models
+    
+    # Register database event hooks that keep cached plans in step with writes
+    from app import events
+    
+    # Plan inputs memoized on flask.g only live for one request, even when
+    # the app context outlives it (e.g. in tests)
+    from app.plans import clear_request_plan_inputs
+    app.teardown_request(clear_request_plan_inputs)
+    
+    # Register CLI commands
+    from app import cli
+    cli.register(app)
 
     return app
\ No newline at end of file
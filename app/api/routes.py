@@ -0,0 +1,143 @@
+# app/api/routes.py
+from calendar import monthrange
+from datetime import date, timedelta
+from flask import request, jsonify, Response, current_app, stream_with_context
+from flask_login import current_user, login_required
+
+from app import db
+from app.api import bp
+from app.dashboard.data import dashboard_data, calendar_weeks
+from app.models import User
+from app.plans import plan_year_of, plan_year_bounds, request_goal_inputs
+from app.reports import FORMATS, iter_report_rows
+
+def data_etag(user, today: date) -> str:
+    """
+    Strong ETag for everything the API returns to a user on a given day.
+
+    The user's data version changes on every write to their goals, days off,
+    monthly weights and logs; the date is included because progress figures
+    and the highlighted day move with it. The version is read from the
+    database rather than from the logged-in user, which may come from the
+    user cache and miss a write handled by another worker.
+    """
+    data_version = db.session.query(User.data_version).filter(User.id == user.id).scalar()
+    return f'{user.id}-{data_version}-{today.isoformat()}'
+
+def _not_modified(etag):
+    """A 304 response if the client already holds the representation tagged etag."""
+    if not request.if_none_match.contains(etag):
+        return None
+    return _tagged(Response(status=304), etag)
+
+def _tagged(response, etag):
+    """Tag a response and make clients revalidate it on every use."""
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@bp.errorhandler(401)
+def unauthorized(error):
+    return jsonify({'success': False, 'error': 'Authentication required'}), 401
+
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    """The dashboard figures as JSON, answering 304 while the user's data is unchanged."""
+    today = date.today()
+    etag = data_etag(current_user, today)
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    current_year = plan_year_of(today)
+    inputs = request_goal_inputs(current_user, current_year)
+    if not inputs:
+        return jsonify({'success': False, 'error': f'No goal for {current_year}'}), 404
+
+    data = dashboard_data(inputs, today)
+    monthly_logged = data['monthly_logged']
+    return _tagged(jsonify({
+        'success': True,
+        'year': current_year,
+        'total_hours': inputs.total_hours,
+        'months': [
+            {'month': month, 'target_hours': target_hours, 'logged_hours': monthly_logged.get(month, 0.0)}
+            for month, target_hours in data['monthly_summary'].items()
+        ],
+        'metrics': data['metrics']
+    }), etag)
+
+@bp.route('/calendar/<int:year>/<int:month>')
+@login_required
+def calendar(year, month):
+    """One month of daily targets and logged hours as JSON, answering 304 while unchanged."""
+    if not 1 <= month <= 12:
+        return jsonify({'success': False, 'error': f'Invalid month: {month}'}), 404
+
+    today = date.today()
+    etag = data_etag(current_user, today)
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    month_start = date(year, month, 1)
+    plan_year = plan_year_of(month_start)
+    if not current_user.has_goal_for(plan_year):
+        return jsonify({'success': False, 'error': f'No goal for {plan_year}'}), 404
+
+    weeks = calendar_weeks(current_user.id, plan_year, year, month, today)
+    prev_month = month_start - timedelta(days=1)
+    next_month = month_start + timedelta(days=monthrange(year, month)[1])
+    return _tagged(jsonify({
+        'success': True,
+        'year': year,
+        'month': month,
+        'plan_year': plan_year,
+        'weeks': [
+            [dict(day, date=day['date'].isoformat()) if day else None for day in week]
+            for week in weeks
+        ],
+        'prev': {'year': prev_month.year, 'month': prev_month.month},
+        'next': {'year': next_month.year, 'month': next_month.month}
+    }), etag)
+
+@bp.route('/export/<fmt>')
+@login_required
+def export(fmt):
+    """
+    Stream daily targets and logged hours as CSV or JSON Lines.
+
+    Query parameters start and end (ISO dates) default to the current plan
+    year and may span at most EXPORT_MAX_DAYS; scope=firm exports every user
+    and is limited to REPORT_ADMINS.
+    """
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'error': f'Unknown format: {fmt}'}), 404
+
+    default_start, default_end = plan_year_bounds(plan_year_of(date.today()))
+    try:
+        start = date.fromisoformat(request.args.get('start', default_start.isoformat()))
+        end = date.fromisoformat(request.args.get('end', default_end.isoformat()))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if start > end:
+        return jsonify({'success': False, 'error': 'start must not be after end'}), 400
+    max_days = current_app.config['EXPORT_MAX_DAYS']
+    if (end - start).days + 1 > max_days:
+        return jsonify({'success': False, 'error': f'At most {max_days} days per export'}), 400
+
+    user_ids = [current_user.id]
+    if request.args.get('scope') == 'firm':
+        if current_user.email.lower() not in current_app.config['REPORT_ADMINS']:
+            return jsonify({'success': False, 'error': 'Firm-wide exports are limited to report admins'}), 403
+        user_ids = None
+
+    mimetype, render = FORMATS[fmt]
+    rows = iter_report_rows(start, end, user_ids)
+    return Response(
+        stream_with_context(render(rows)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=hours-{start}-{end}.{fmt}'}
+    )
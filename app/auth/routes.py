@@ -3,6 +3,7 @@ from flask import render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, current_user
 from urllib.parse import urlparse
 from app import db
+from app.passwords import PasswordHasherBusy
 from app.auth import bp
 from app.auth.forms import LoginForm, RegistrationForm
 from app.models import User
@@ -14,16 +15,31 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
-        if user is None or not user.check_password(form.password.data):
+        try:
+            valid = user is not None and user.check_password(form.password.data)
+        except PasswordHasherBusy:
+            flash('Too many people are signing in right now. Please try again in a moment.')
+            return render_template('auth/login.html', title='Sign In', form=form), 503
+        if not valid:
             flash('Invalid email or password')
             return redirect(url_for('auth.login'))
+        
+        # Move the stored hash to the current hashing policy while the password is at hand;
+        # when the hasher is busy keep the old hash, which still verifies, and retry next login
+        if user.password_needs_rehash():
+            try:
+                user.set_password(form.password.data)
+            except PasswordHasherBusy:
+                pass
+            else:
+                db.session.commit()
         login_user(user, remember=form.remember_me.data)
         next_page = request.args.get('next')
         if not next_page or urlparse(next_page).netloc != '':
             next_page = url_for('main.index')
         
         # Check if user has setup their goals
-        if not user.goals.first():
+        if not user.setup_complete:
             next_page = url_for('setup.wizard')
             
         return redirect(next_page)
@@ -41,7 +57,11 @@ def register():
     form = RegistrationForm()
     if form.validate_on_submit():
         user = User(email=form.email.data)
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except PasswordHasherBusy:
+            flash('Too many people are signing in right now. Please try again in a moment.')
+            return render_template('auth/register.html', title='Register', form=form), 503
         db.session.add(user)
         db.session.commit()
         flash('Congratulations, you are now a registered user!')
@@ -1,5 +1,8 @@
 # app/calculations/__init__.py
 from app.calculations.service import BillableHourCalculationService
+from app.calculations.cache import PlanCache
+from app.calculations.distribution import InfeasibleGoalError
+from app.calculations.plan import DailyPlan
 
 # Export the service for easier imports
-__all__ = ['BillableHourCalculationService']
\ No newline at end of file
+__all__ = ['BillableHourCalculationService', 'PlanCache', 'InfeasibleGoalError', 'DailyPlan']
\ No newline at end of file
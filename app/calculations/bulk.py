@@ -0,0 +1,178 @@
+from datetime import date
+from typing import Dict, Sequence
+
+import numpy as np
+
+from app.calculations.workdays import DEFAULT_WORKWEEK, weekday_array, month_index
+from app.calculations.distribution import distribute_hours_array, water_fill
+from app.calculations.plan import DailyPlan
+
+class BulkPlans:
+    """
+    Plans for many users stored as one users x days matrix.
+
+    Row i holds user i's target for every calendar day of the plan year, with
+    NaN on non-workdays (the DailyPlan layout), so each row can be handed out
+    as a DailyPlan without copying. Monthly columns follow the months of the
+    range in order (January first for calendar years).
+    """
+
+    def __init__(self, year: int, targets: np.ndarray, workdays: np.ndarray,
+                 monthly_rates: np.ndarray, monthly_totals: np.ndarray,
+                 infeasible: np.ndarray, start: date = None, day_capacity: np.ndarray = None):
+        self.year = year
+        self.start = start or date(year, 1, 1)
+        self.day_capacity = day_capacity
+        self.targets = targets
+        self.workdays = workdays
+        self.monthly_rates = monthly_rates
+        self.monthly_totals = monthly_totals
+        self.infeasible = infeasible
+
+    def __len__(self) -> int:
+        return self.targets.shape[0]
+
+    @property
+    def capacity(self) -> np.ndarray:
+        """Users x days share of a full day worked (the workday matrix for whole-day schedules)."""
+        return self.workdays if self.day_capacity is None else self.day_capacity
+
+    @property
+    def peak_daily(self) -> np.ndarray:
+        """Highest full-day target per user (part days get their share of it)."""
+        return self.monthly_rates.max(axis=1)
+
+    def targets_for(self, index: int) -> np.ndarray:
+        """Daily targets of one user for every day of the year, NaN on non-workdays (a view)."""
+        return self.targets[index]
+
+    def plan_for(self, index: int) -> DailyPlan:
+        """One user's plan as a zero-copy DailyPlan view of the matrix row."""
+        return DailyPlan(self.start, self.targets[index])
+
+def _user_day_positions(year: int, days_by_user: Sequence, num_days: int, start: date = None):
+    """Row (user) and column (day) of every date in days_by_user, with a mask of those inside the range."""
+    lengths = [len(days) for days in days_by_user]
+
+    # date.toordinal() is far cheaper than converting date objects one by one
+    rows = np.repeat(np.arange(len(days_by_user)), lengths)
+    columns = np.fromiter(
+        (day.toordinal() for days in days_by_user for day in days), dtype=np.int64, count=sum(lengths)
+    ) - (start or date(year, 1, 1)).toordinal()
+    return rows, columns, (columns >= 0) & (columns < num_days)
+
+def days_off_mask(year: int, days_off: Sequence[Sequence[date]], num_days: int,
+                  start: date = None) -> np.ndarray:
+    """Build a users x days boolean matrix that is True on each user's days off (from start, default January 1)."""
+    mask = np.zeros((len(days_off), num_days), dtype=bool)
+    rows, columns, in_range = _user_day_positions(year, days_off, num_days, start)
+    mask[rows[in_range], columns[in_range]] = True
+    return mask
+
+def capacity_matrix(year: int, workdays: np.ndarray, weekly_capacity: np.ndarray,
+                    partial_days: Sequence[Dict[date, float]] = None, start: date = None) -> np.ndarray:
+    """
+    Build a users x days matrix of each workday's share of a full day.
+
+    Args:
+        year: The plan year
+        workdays: Users x days boolean workday matrix
+        weekly_capacity: Capacity of every day of the range from the workweek
+        partial_days: Dictionary of partial days (date -> fraction off) per user
+        start: First day of the range (default: January 1 of year)
+    """
+    capacity = np.where(workdays, weekly_capacity, 0.0)
+    if partial_days is not None:
+        rows, columns, in_range = _user_day_positions(year, partial_days, workdays.shape[1], start)
+        fractions = np.fromiter(
+            (fraction for days in partial_days for fraction in days.values()), dtype=float, count=len(rows)
+        )
+        capacity[rows[in_range], columns[in_range]] *= 1 - np.clip(fractions[in_range], 0, 1)
+    return capacity
+
+def weight_matrix(monthly_weights: Sequence[Dict[int, float]]) -> np.ndarray:
+    """Build a users x 12 matrix of monthly weights (missing months default to 1.0)."""
+    weights = np.ones((len(monthly_weights), 12))
+    for row, user_weights in enumerate(monthly_weights):
+        for month, weight in (user_weights or {}).items():
+            weights[row, month - 1] = weight
+    return weights
+
+def generate_plans_bulk(
+    year: int,
+    total_hours: Sequence[float],
+    days_off: Sequence[Sequence[date]] = None,
+    monthly_weights: Sequence[Dict[int, float]] = None,
+    max_daily_hours: float = 10.0,
+    workweek: Sequence[int] = DEFAULT_WORKWEEK,
+    start_date: date = None,
+    end_date: date = None,
+    holidays: np.ndarray = None,
+    partial_days: Sequence[Dict[date, float]] = None
+) -> BulkPlans:
+    """
+    Generate the plans of many users for one year in a single vectorized pass.
+
+    Gives the same targets as calling generate_plan once per user.
+
+    Args:
+        year: The year to generate plans for
+        total_hours: Annual billable hour goal per user
+        days_off: Days to exclude per user (default: none)
+        monthly_weights: Dictionary of month weights per user (default: all 1.0)
+        max_daily_hours: Maximum target hours per day
+        workweek: Seven flags (or fractions) from Monday to Sunday marking working weekdays
+        start_date: First day of the plan year (default: January 1 of year)
+        end_date: Last day of the plan year (default: December 31 of year)
+        holidays: Shared datetime64[D] array of holidays every user has off
+        partial_days: Dictionary of partial days (date -> fraction off) per user
+
+    Returns:
+        BulkPlans holding the users x days target matrix
+    """
+    total_hours = np.asarray(total_hours, dtype=float)
+    num_users = len(total_hours)
+
+    start_date = start_date or date(year, 1, 1)
+    end_date = end_date or date(year, 12, 31)
+    days = np.arange(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1)
+
+    # Months are numbered from the first month of the range
+    periods = days.astype('datetime64[M]').astype(np.int64)
+    periods -= periods[0]
+    month_starts = np.flatnonzero(np.diff(periods, prepend=-1))
+
+    # Shared holidays are applied once to the common row, not per user
+    weekly_capacity = np.asarray(workweek, dtype=float)[weekday_array(days)]
+    common = weekly_capacity > 0
+    if holidays is not None and len(holidays):
+        common &= ~np.isin(days, holidays)
+    workdays = np.broadcast_to(common, (num_users, len(days)))
+    if days_off is not None:
+        workdays = workdays & ~days_off_mask(year, days_off, len(days), start_date)
+    else:
+        workdays = workdays.copy()
+
+    # Whole-day schedules keep integer counts; fractional capacity is only
+    # materialized when a part-time workweek or partial days call for it
+    whole_days = bool(np.all((weekly_capacity == 0) | (weekly_capacity == 1)))
+    capacity = None
+    if not whole_days or (partial_days is not None and any(partial_days)):
+        capacity = capacity_matrix(year, workdays, weekly_capacity, partial_days, start_date)
+        counts = np.add.reduceat(capacity, month_starts, axis=1)
+    else:
+        counts = np.add.reduceat(workdays, month_starts, axis=1, dtype=np.int64)
+    weights = None
+    if monthly_weights is not None:
+        weights = weight_matrix(monthly_weights)[:, month_index(days[month_starts])]
+
+    hours_by_month = distribute_hours_array(total_hours, counts, weights)
+    rates = water_fill(hours_by_month, counts, max_daily_hours)
+
+    targets = rates[:, periods]
+    if capacity is not None:
+        targets *= capacity
+    targets[~workdays] = np.nan
+
+    infeasible = total_hours > max_daily_hours * counts.sum(axis=1) * (1 + 1e-12)
+    return BulkPlans(year, targets, workdays, rates, rates * counts, infeasible, start_date, capacity)
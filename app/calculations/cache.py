@@ -0,0 +1,187 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+class PlanCache:
+    """
+    Bounded LRU cache for objects derived from a plan, with a time-to-live per entry.
+
+    Plans themselves are materialized in the PlannedDay table (app.plans),
+    which is what plan reads go through; this cache holds what is built on
+    top of them, such as the dashboard's catch-up planners.
+
+    Entries are keyed by (user_id, year, digest) where the digest covers every
+    input of the plan, so a stale entry can never be returned for changed
+    inputs. Writes to a user's plan inputs should still call invalidate() so
+    that superseded entries don't occupy space until they are evicted.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of plans kept before the least recently
+                used one is evicted
+            ttl: Seconds an entry stays valid after it was stored (None: forever)
+            clock: Monotonic time source, replaceable for testing
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_owner = {}
+        self._counters = {}
+        self.reset_stats()
+
+    def init_app(self, app):
+        """Read cache sizing from the Flask config and register the cache on the app."""
+        self.max_entries = app.config.get('PLAN_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('PLAN_CACHE_TTL', self.ttl)
+        app.extensions['plan_cache'] = self
+
+    @staticmethod
+    def make_digest(
+        year: int,
+        total_hours: float,
+        days_off: List[date] = None,
+        monthly_weights: Dict[int, float] = None,
+        max_daily_hours: float = None,
+        workweek: Tuple[float, ...] = None,
+        holidays: np.ndarray = None,
+        partial_days: Dict[date, float] = None,
+        start: date = None,
+        end: date = None
+    ) -> str:
+        """
+        Build a digest of all inputs that determine a plan.
+
+        Days off and holidays are merged, de-duplicated and sorted, and days
+        outside the plan's range are dropped since they cannot affect it. The
+        range is start to end (default: the calendar year), so fiscal plan
+        years keep the months they take from the previous calendar year.
+        """
+        start = start or date(year, 1, 1)
+        end = end or date(year, 12, 31)
+        if holidays is not None and len(holidays):
+            days_off = list(days_off or []) + np.asarray(holidays, dtype='datetime64[D]').tolist()
+        canonical = (
+            year,
+            start.isoformat(),
+            end.isoformat(),
+            float(total_hours),
+            sorted({day.isoformat() for day in (days_off or []) if start <= day <= end}),
+            sorted((int(month), float(weight)) for month, weight in (monthly_weights or {}).items()),
+            None if max_daily_hours is None else float(max_daily_hours),
+            None if workweek is None else tuple(workweek),
+            sorted((day.isoformat(), float(fraction)) for day, fraction in (partial_days or {}).items()
+                   if start <= day <= end),
+        )
+        return hashlib.blake2b(repr(canonical).encode(), digest_size=16).hexdigest()
+
+    def get(self, user_id: Hashable, year: int, digest: str):
+        """Return the cached plan, or None if it is missing or expired."""
+        key = (user_id, year, digest)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+
+            stored_at, plan = entry
+            if self.ttl is not None and self._clock() - stored_at > self.ttl:
+                self._remove(key)
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return plan
+
+    def set(self, user_id: Hashable, year: int, digest: str, plan) -> None:
+        """Store a plan, evicting the least recently used entries if full."""
+        key = (user_id, year, digest)
+        with self._lock:
+            self._entries[key] = (self._clock(), plan)
+            self._entries.move_to_end(key)
+            self._keys_by_owner.setdefault((user_id, year), set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._counters['evictions'] += 1
+
+    def get_or_create(self, user_id: Hashable, year: int, digest: str,
+                      factory: Callable[[], object]):
+        """Return the cached plan, building and storing it with factory() on a miss."""
+        plan = self.get(user_id, year, digest)
+        if plan is None:
+            plan = factory()
+            self.set(user_id, year, digest, plan)
+        return plan
+
+    def invalidate(self, user_id: Hashable, year: Optional[int] = None) -> int:
+        """
+        Drop cached plans for a user, either for one year or for all years.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if year is None:
+                owners = [owner for owner in self._keys_by_owner if owner[0] == user_id]
+            else:
+                owners = [(user_id, year)]
+
+            removed = 0
+            for owner in owners:
+                for key in list(self._keys_by_owner.get(owner, ())):
+                    self._remove(key)
+                    removed += 1
+
+            self._counters['invalidations'] += removed
+            return removed
+
+    def clear(self) -> None:
+        """Drop every cached plan (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_owner.clear()
+
+    def reset_stats(self) -> None:
+        """Reset the hit/miss/eviction counters."""
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    def stats(self) -> Dict[str, float]:
+        """Return the cache counters along with its current size and hit rate."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+            return stats
+
+    def _remove(self, key) -> None:
+        """Remove an entry and its owner index (caller holds the lock)."""
+        self._entries.pop(key, None)
+        owner = key[:2]
+        keys = self._keys_by_owner.get(owner)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_owner[owner]
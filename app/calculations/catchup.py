@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+from typing import Dict
+
+import numpy as np
+
+from app.calculations.plan import DailyPlan
+
+class CatchUpPlanner:
+    """
+    Spreads the hours still needed for the goal over the upcoming workdays.
+
+    Upcoming targets are scaled by one common factor, so the monthly weights
+    baked into the plan are kept, and capped at max_daily_hours; days that hit
+    the cap pass their share on to the others. The plan's upcoming targets are
+    sorted once with their prefix sums, so each new total of logged hours is
+    re-solved in O(log n) by bisection rather than by rebuilding the plan.
+    """
+
+    __slots__ = ('today', 'max_daily_hours', '_ordinals', '_planned', '_sorted', '_prefix', '_active')
+
+    def __init__(self, plan: DailyPlan, max_daily_hours: float, today: date):
+        """
+        Prepare the planner.
+
+        Args:
+            plan: The user's plan for the year
+            max_daily_hours: Maximum target hours per day
+            today: Last day already behind us; catch-up starts the day after
+        """
+        self.today = today
+        self.max_daily_hours = max_daily_hours
+
+        upcoming = plan.window(today + timedelta(days=1), plan.end)
+        offsets = upcoming.workday_offsets()
+        self._ordinals = offsets + upcoming.start_ordinal
+        self._planned = upcoming.targets[offsets].astype(np.float64)
+
+        self._sorted = np.sort(self._planned)[::-1]
+        self._prefix = np.concatenate(([0.0], np.cumsum(self._sorted)))
+        self._active = int(np.count_nonzero(self._sorted > 0))
+
+    @property
+    def remaining_workdays(self) -> int:
+        """Number of upcoming workdays."""
+        return len(self._planned)
+
+    @property
+    def planned_remaining(self) -> float:
+        """Hours the original plan still has scheduled after today."""
+        return float(self._prefix[-1])
+
+    def capacity(self) -> float:
+        """Most hours the upcoming workdays can take without exceeding the cap."""
+        return self.max_daily_hours * self._active
+
+    def level(self, remaining_hours: float) -> float:
+        """
+        Factor applied to the planned targets so the capped total matches remaining_hours.
+
+        Returns 0 when nothing is left to do and infinity when even capping
+        every day is not enough.
+        """
+        if remaining_hours <= 0 or not self._active:
+            return 0.0
+        if remaining_hours >= self.capacity():
+            return float('inf')
+
+        cap = self.max_daily_hours
+        total = self._prefix[self._active]
+        low, high = 0, self._active - 1
+        while low < high:
+            # With the k largest days capped, the rest share what is left
+            k = (low + high) // 2
+            level = (remaining_hours - cap * k) / (total - self._prefix[k])
+            if level * self._sorted[k] <= cap:
+                high = k
+            else:
+                low = k + 1
+
+        return float((remaining_hours - cap * low) / (total - self._prefix[low]))
+
+    def targets(self, remaining_hours: float) -> np.ndarray:
+        """Revised target for each upcoming workday, in date order."""
+        level = self.level(remaining_hours)
+        if np.isinf(level):
+            return np.where(self._planned > 0, self.max_daily_hours, 0.0)
+        return np.minimum(self.max_daily_hours, level * self._planned)
+
+    def suggest(self, goal_hours: float, total_logged: float, days: int = 5) -> Dict:
+        """
+        Build the catch-up suggestion for the current total of logged hours.
+
+        Args:
+            goal_hours: Goal for the plan's year
+            total_logged: Hours logged so far in that year
+            days: Number of upcoming workdays to list individually
+
+        Returns:
+            Dictionary with the remaining hours, shortfall against the plan,
+            recommended daily hours and the revised next workdays
+        """
+        remaining_hours = max(goal_hours - total_logged, 0.0)
+        revised = self.targets(remaining_hours)
+        workdays = self.remaining_workdays
+
+        next_days = [
+            {
+                'date': date.fromordinal(ordinal).isoformat(),
+                'planned': planned,
+                'suggested': suggested
+            }
+            for ordinal, planned, suggested in zip(
+                self._ordinals[:days].tolist(),
+                self._planned[:days].tolist(),
+                revised[:days].tolist()
+            )
+        ]
+
+        return {
+            'remaining_hours': remaining_hours,
+            'planned_remaining': self.planned_remaining,
+            'shortfall': remaining_hours - self.planned_remaining,
+            'remaining_workdays': workdays,
+            'recommended_daily': remaining_hours / workdays if workdays else 0.0,
+            'extra_per_day': (remaining_hours - self.planned_remaining) / workdays if workdays else 0.0,
+            'peak_daily': float(revised.max()) if workdays else 0.0,
+            'feasible': remaining_hours <= self.capacity() + 1e-9,
+            'next_days': next_days
+        }
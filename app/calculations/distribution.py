@@ -1,10 +1,12 @@
 # app/calculations/distribution.py
 from datetime import date
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
 
 def distribute_hours_by_month(
     total_hours: int, 
-    workdays_by_month: Dict[int, int], 
+    workdays_by_month: Dict[int, float], 
     monthly_weights: Dict[int, float] = None
 ) -> Dict[int, float]:
     """
@@ -13,6 +15,7 @@ def distribute_hours_by_month(
     Args:
         total_hours: Annual billable hour goal
         workdays_by_month: Dictionary with month number as key and workday count as value
+            (capacity-weighted counts from get_capacity_by_month work the same way)
         monthly_weights: Dictionary with month number as key and weight as value (default: all 1.0)
         
     Returns:
@@ -42,69 +45,150 @@ def distribute_hours_by_month(
     
     return hours_by_month
 
+def distribute_hours_array(total_hours, workday_counts, weights=None) -> np.ndarray:
+    """
+    Vectorized distribute_hours_by_month for many goals at once.
+    
+    Args:
+        total_hours: Goal per row, shape (n,)
+        workday_counts: Workdays per row and month, shape (n, 12)
+        weights: Weight per row and month, shape (n, 12) (default: all 1.0)
+        
+    Returns:
+        Allocated hours per row and month, shape (n, 12)
+    """
+    workday_counts = np.asarray(workday_counts, dtype=float)
+    weighted = workday_counts if weights is None else workday_counts * weights
+    totals = weighted.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = np.where(totals > 0, weighted / totals, 0.0)
+    return np.asarray(total_hours, dtype=float)[:, None] * shares
+
+class InfeasibleGoalError(ValueError):
+    """Raised when the hours to allocate exceed what the daily cap allows."""
+    
+    def __init__(self, total_hours: float, capacity: float):
+        self.total_hours = total_hours
+        self.capacity = capacity
+        self.shortfall = total_hours - capacity
+        super().__init__(
+            f'{total_hours:.1f} hours cannot be allocated without exceeding the daily cap '
+            f'(at most {capacity:.1f} hours, {self.shortfall:.1f} short)'
+        )
+
+def water_fill(demands, counts, cap: float, strict: bool = False) -> np.ndarray:
+    """
+    Find capped per-day rates that allocate the total demand exactly.
+    
+    Each group (e.g. a month) has a demand in hours and a number of days.
+    Groups are scaled by one common factor so their relative rates are kept,
+    except that no rate may exceed the cap: groups that would exceed it are
+    held at the cap and the remaining groups rise together until the total
+    demand is met. Sorting the groups by rate makes this O(n log n).
+    
+    Two-dimensional inputs are solved row by row in one vectorized pass, with
+    each row (e.g. a user) being an independent problem.
+    
+    Args:
+        demands: Hours wanted by each group
+        counts: Days (or capacity-weighted days) in each group
+        cap: Maximum hours per day
+        strict: Raise InfeasibleGoalError instead of capping every group when
+            the total demand exceeds the capacity
+        
+    Returns:
+        Array of hours per day for each group (0 for groups without days)
+    """
+    demands = np.asarray(demands, dtype=float)
+    single = demands.ndim == 1
+    demands = np.atleast_2d(demands)
+    counts = np.broadcast_to(np.asarray(counts, dtype=float), demands.shape)
+    
+    active = (counts > 0) & (demands > 0)
+    counts = np.where(active, counts, 0.0)
+    total = demands.sum(axis=1)
+    
+    # Detect infeasible goals up front instead of iterating
+    capacity = cap * counts.sum(axis=1)
+    infeasible = total > capacity * (1 + 1e-12)
+    if strict and infeasible.any():
+        row = int(np.argmax(infeasible))
+        raise InfeasibleGoalError(float(total[row]), float(capacity[row]))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        base = np.where(active, demands / np.where(active, counts, 1.0), 0.0)
+        order = np.argsort(-base, axis=1, kind='stable')
+        base = np.take_along_axis(base, order, axis=1)
+        n = np.take_along_axis(counts, order, axis=1)
+        
+        # With the k highest-rate groups capped, the others share what is left:
+        # level_k = (total - cap * days_in_first_k) / demand_of_the_rest
+        capped_days = np.cumsum(n, axis=1) - n
+        rest_demand = np.cumsum((base * n)[:, ::-1], axis=1)[:, ::-1]
+        level = (total[:, None] - cap * capped_days) / rest_demand
+        
+        # The first k whose highest uncapped rate stays within the cap is the solution
+        fits = (level * base <= cap * (1 + 1e-12)) | (base == 0)
+        k = np.argmax(fits, axis=1)
+        row_level = np.take_along_axis(level, k[:, None], axis=1)
+        filled = np.where(
+            np.arange(base.shape[1]) < k[:, None],
+            cap,
+            np.minimum(cap, row_level * base)
+        )
+    
+    filled = np.where(base > 0, filled, 0.0)
+    filled[infeasible] = np.where(base[infeasible] > 0, cap, 0.0)
+    
+    rates = np.empty_like(filled)
+    np.put_along_axis(rates, order, filled, axis=1)
+    return rates[0] if single else rates
+
 def calculate_daily_targets(
     hours_by_month: Dict[int, float], 
     workday_dates_by_month: Dict[int, List[date]],
-    max_daily_hours: float = 10.0
+    max_daily_hours: float = 10.0,
+    strict: bool = False,
+    day_capacity: Mapping[date, float] = None
 ) -> Dict[date, float]:
     """
     Calculate target billable hours for each workday.
     
+    Hours are spread evenly within each month. Months whose daily target would
+    exceed max_daily_hours are capped and their excess is shifted to the other
+    months in proportion to their allocation, so the annual total is kept
+    exactly whenever it fits under the cap.
+    
     Args:
         hours_by_month: Dictionary with month number as key and allocated hours as value
         workday_dates_by_month: Dictionary with month number as key and list of workday dates as value
         max_daily_hours: Maximum target hours per day (to avoid unrealistic targets)
+        strict: Raise InfeasibleGoalError if the total exceeds max_daily_hours
+            on every workday, instead of capping every day
+        day_capacity: Dictionary with date as key and share of a full day as
+            value (default: every workday is a full day); a half day gets half
+            the month's daily target and half the cap
         
     Returns:
         Dictionary with date as key and target hours as value
     """
+    months = range(1, 13)
+    demands = [hours_by_month.get(month, 0) for month in months]
+    if day_capacity is None:
+        counts = [len(workday_dates_by_month.get(month, [])) for month in months]
+    else:
+        counts = [
+            sum(day_capacity.get(day, 1.0) for day in workday_dates_by_month.get(month, []))
+            for month in months
+        ]
+    rates = water_fill(demands, counts, max_daily_hours, strict)
+    
     daily_targets = {}
-    excess_hours = 0  # Track hours that exceed max_daily_hours
+    for month, hours_per_day in zip(months, rates.tolist()):
+        for day in workday_dates_by_month.get(month, []):
+            if day_capacity is None:
+                daily_targets[day] = hours_per_day
+            else:
+                daily_targets[day] = hours_per_day * day_capacity.get(day, 1.0)
     
-    # First pass: Distribute hours evenly within each month
-    for month in range(1, 13):
-        month_hours = hours_by_month.get(month, 0)
-        workdays = workday_dates_by_month.get(month, [])
-        
-        if not workdays:
-            continue
-        
-        hours_per_day = month_hours / len(workdays)
-        
-        # If hours per day exceeds max, track the excess for redistribution
-        if hours_per_day > max_daily_hours:
-            excess_in_month = (hours_per_day - max_daily_hours) * len(workdays)
-            excess_hours += excess_in_month
-            hours_per_day = max_daily_hours
-        
-        for day in workdays:
-            daily_targets[day] = hours_per_day
-    
-    # Second pass: Redistribute excess hours if needed
-    if excess_hours > 0:
-        # Find days with target below max
-        available_days = []
-        for day, hours in daily_targets.items():
-            if hours < max_daily_hours:
-                available_days.append(day)
-        
-        # Sort available days by date (earlier dates first)
-        available_days.sort()
-        
-        # Redistribute excess hours
-        if available_days:
-            additional_per_day = min(
-                (max_daily_hours - daily_targets[available_days[0]]),
-                excess_hours / len(available_days)
-            )
-            
-            for day in available_days:
-                current_target = daily_targets[day]
-                new_target = min(current_target + additional_per_day, max_daily_hours)
-                daily_targets[day] = new_target
-                excess_hours -= (new_target - current_target)
-                
-                if excess_hours <= 0:
-                    break
-    
-    return daily_targets
\ No newline at end of file
+    return daily_targets
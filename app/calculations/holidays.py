@@ -0,0 +1,161 @@
+import calendar
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence
+
+import numpy as np
+
+class FixedDate:
+    """A holiday on the same calendar date every year (e.g. July 4)."""
+
+    def __init__(self, name: str, month: int, day: int, observed: bool = True, since: int = None):
+        """
+        Args:
+            name: Holiday name
+            month: Month of the holiday
+            day: Day of the month
+            observed: Move to Friday when on a Saturday and to Monday when on a Sunday
+            since: First year the holiday is kept (default: always)
+        """
+        self.name = name
+        self.month = month
+        self.day = day
+        self.observed = observed
+        self.since = since
+
+    def date_in(self, year: int) -> Optional[date]:
+        """The day off the holiday gives in a given year, or None before it was introduced."""
+        if self.since is not None and year < self.since:
+            return None
+        day = date(year, self.month, self.day)
+        if self.observed and day.weekday() == 5:
+            return day - timedelta(days=1)
+        if self.observed and day.weekday() == 6:
+            return day + timedelta(days=1)
+        return day
+
+class NthWeekday:
+    """A holiday on the nth weekday of a month (e.g. the fourth Thursday of November)."""
+
+    def __init__(self, name: str, month: int, weekday: int, n: int, offset: int = 0, since: int = None):
+        """
+        Args:
+            name: Holiday name
+            month: Month of the holiday
+            weekday: Weekday (Monday=0 ... Sunday=6)
+            n: Which occurrence in the month (1 = first, -1 = last)
+            offset: Days to add, e.g. 1 for the day after Thanksgiving
+            since: First year the holiday is kept (default: always)
+        """
+        self.name = name
+        self.month = month
+        self.weekday = weekday
+        self.n = n
+        self.offset = offset
+        self.since = since
+
+    def date_in(self, year: int) -> Optional[date]:
+        """The day off the holiday gives in a given year, or None before it was introduced."""
+        if self.since is not None and year < self.since:
+            return None
+        if self.n > 0:
+            first = date(year, self.month, 1)
+            day = first + timedelta(days=(self.weekday - first.weekday()) % 7 + 7 * (self.n - 1))
+        else:
+            last = date(year, self.month, calendar.monthrange(year, self.month)[1])
+            day = last - timedelta(days=(last.weekday() - self.weekday) % 7 + 7 * (-self.n - 1))
+        return day + timedelta(days=self.offset)
+
+class HolidayCalendar:
+    """
+    A named set of holiday rules shared by every user who subscribes to it.
+
+    Each year's holidays are computed once per process and kept as a
+    read-only datetime64[D] array, so plan generation can exclude them
+    without per-user rows or copies.
+    """
+
+    def __init__(self, name: str, title: str, rules: Sequence):
+        self.name = name
+        self.title = title
+        self.rules = tuple(rules)
+
+    def __repr__(self) -> str:
+        return f'<HolidayCalendar {self.name}>'
+
+    def year_array(self, year: int) -> np.ndarray:
+        """Holidays falling in a calendar year as a sorted, read-only datetime64[D] array (cached)."""
+        return _year_array(self, year)
+
+    def dates(self, year: int) -> FrozenSet[date]:
+        """Holidays falling in a calendar year."""
+        return frozenset(self.year_array(year).tolist())
+
+    def day_array(self, start_date: date, end_date: date) -> np.ndarray:
+        """
+        Holidays between two dates (inclusive) as a sorted datetime64[D] array.
+
+        Ranges within a single year return a view of the cached array.
+        """
+        years = range(start_date.year, end_date.year + 1)
+        days = self.year_array(years[0]) if len(years) == 1 else np.concatenate(
+            [self.year_array(year) for year in years]
+        )
+        first = int(np.searchsorted(days, np.datetime64(start_date, 'D'), side='left'))
+        last = int(np.searchsorted(days, np.datetime64(end_date, 'D'), side='right'))
+        return days[first:last]
+
+@lru_cache(maxsize=256)
+def _year_array(holiday_calendar: HolidayCalendar, year: int) -> np.ndarray:
+    """Evaluate a calendar's rules for one year."""
+    # Observed dates can cross into a neighbouring year (New Year's Day on a
+    # Saturday is observed on December 31), so look one year either side
+    days = {
+        day
+        for rule_year in (year - 1, year, year + 1)
+        for rule in holiday_calendar.rules
+        for day in (rule.date_in(rule_year),)
+        if day is not None and day.year == year
+    }
+    days = np.array(sorted(days), dtype='datetime64[D]')
+    days.flags.writeable = False
+    return days
+
+US_FEDERAL = HolidayCalendar('us_federal', 'US federal holidays', [
+    FixedDate("New Year's Day", 1, 1),
+    NthWeekday('Martin Luther King Jr. Day', 1, 0, 3),
+    NthWeekday("Washington's Birthday", 2, 0, 3),
+    NthWeekday('Memorial Day', 5, 0, -1),
+    FixedDate('Juneteenth', 6, 19, since=2021),
+    FixedDate('Independence Day', 7, 4),
+    NthWeekday('Labor Day', 9, 0, 1),
+    NthWeekday('Columbus Day', 10, 0, 2),
+    FixedDate('Veterans Day', 11, 11),
+    NthWeekday('Thanksgiving Day', 11, 3, 4),
+    FixedDate('Christmas Day', 12, 25),
+])
+
+US_FIRM = HolidayCalendar('us_firm', 'Typical US law firm holidays', [
+    FixedDate("New Year's Day", 1, 1),
+    NthWeekday('Memorial Day', 5, 0, -1),
+    FixedDate('Independence Day', 7, 4),
+    NthWeekday('Labor Day', 9, 0, 1),
+    NthWeekday('Thanksgiving Day', 11, 3, 4),
+    NthWeekday('Day after Thanksgiving', 11, 3, 4, offset=1),
+    FixedDate('Christmas Day', 12, 25),
+])
+
+# Calendars users can subscribe to, by name
+CALENDARS: Dict[str, HolidayCalendar] = {
+    holiday_calendar.name: holiday_calendar for holiday_calendar in (US_FEDERAL, US_FIRM)
+}
+
+def get_calendar(name: Optional[str]) -> Optional[HolidayCalendar]:
+    """Look up a holiday calendar by name (None for no calendar or an unknown name)."""
+    return CALENDARS.get(name) if name else None
+
+def calendar_choices() -> List[tuple]:
+    """(name, title) pairs for select fields, starting with no calendar."""
+    return [('', 'No firm holidays')] + [
+        (holiday_calendar.name, holiday_calendar.title) for holiday_calendar in CALENDARS.values()
+    ]
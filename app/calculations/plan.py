@@ -0,0 +1,157 @@
+from collections.abc import Mapping
+from datetime import date
+from typing import Dict, Iterable, Iterator, Tuple
+
+import numpy as np
+
+from app.calculations.workdays import month_index
+from app.calculations.progress import ProgressIndex
+
+class DailyPlan(Mapping):
+    """
+    Read-only mapping of workday -> target hours backed by a NumPy array.
+
+    The plan stores the ordinal of its first calendar day and one float per
+    calendar day from there, with NaN on days that are not workdays. Lookups,
+    monthly slices and windows are O(1), and slices share the parent's array
+    instead of copying it. It behaves like the Dict[date, float] plans used
+    elsewhere (get, keys, items, values, ==), so templates keep working.
+    """
+
+    __slots__ = ('start_ordinal', 'targets', '_index')
+
+    def __init__(self, start: date, targets: np.ndarray):
+        """
+        Wrap an array of daily targets.
+
+        Args:
+            start: Calendar day of targets[0]
+            targets: One target per calendar day, NaN on non-workdays; the array
+                is shared, not copied, and is made read-only
+        """
+        targets = targets.view()
+        targets.flags.writeable = False
+        self.start_ordinal = start.toordinal()
+        self.targets = targets
+        self._index = None
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[date, float]], start: date = None,
+                   end: date = None, dtype=np.float64) -> 'DailyPlan':
+        """
+        Build a plan from (date, target) pairs.
+
+        Args:
+            items: Pairs of workday and target hours
+            start: First calendar day covered (default: earliest date in items)
+            end: Last calendar day covered (default: latest date in items)
+            dtype: Array dtype (float32 halves the memory again)
+        """
+        items = list(items)
+        ordinals = np.fromiter((day.toordinal() for day, _ in items), dtype=np.int64, count=len(items))
+        hours = np.fromiter((value for _, value in items), dtype=np.float64, count=len(items))
+
+        if start is None:
+            start = date.fromordinal(int(ordinals.min())) if len(items) else date.today()
+        if end is None:
+            end = date.fromordinal(int(ordinals.max())) if len(items) else start
+
+        first = start.toordinal()
+        targets = np.full(end.toordinal() - first + 1, np.nan, dtype=dtype)
+        targets[ordinals - first] = hours
+        return cls(start, targets)
+
+    @property
+    def start(self) -> date:
+        """First calendar day covered by the plan."""
+        return date.fromordinal(self.start_ordinal)
+
+    @property
+    def end(self) -> date:
+        """Last calendar day covered by the plan."""
+        return date.fromordinal(self.start_ordinal + len(self.targets) - 1)
+
+    def _offset(self, day: date) -> int:
+        """Position of a day in the array, or -1 if it is not a workday of the plan."""
+        offset = day.toordinal() - self.start_ordinal
+        if 0 <= offset < len(self.targets) and not np.isnan(self.targets[offset]):
+            return offset
+        return -1
+
+    def __getitem__(self, day: date) -> float:
+        offset = self._offset(day) if isinstance(day, date) else -1
+        if offset < 0:
+            raise KeyError(day)
+        return float(self.targets[offset])
+
+    def __contains__(self, day) -> bool:
+        return isinstance(day, date) and self._offset(day) >= 0
+
+    def __iter__(self) -> Iterator[date]:
+        for offset in self.workday_offsets().tolist():
+            yield date.fromordinal(self.start_ordinal + offset)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self.targets)))
+
+    def __repr__(self) -> str:
+        return f'<DailyPlan {self.start} to {self.end}: {len(self)} workdays>'
+
+    def __reduce__(self):
+        return (self.__class__, (self.start, np.array(self.targets)))
+
+    def workday_offsets(self) -> np.ndarray:
+        """Array positions of the plan's workdays."""
+        return np.flatnonzero(~np.isnan(self.targets))
+
+    def items(self):
+        offsets = self.workday_offsets()
+        days = map(date.fromordinal, (offsets + self.start_ordinal).tolist())
+        return list(zip(days, self.targets[offsets].tolist()))
+
+    def values(self):
+        return self.targets[self.workday_offsets()].tolist()
+
+    def to_dict(self) -> Dict[date, float]:
+        """Copy the plan into a plain dictionary."""
+        return dict(self.items())
+
+    def total(self) -> float:
+        """Sum of all targets."""
+        return float(np.nansum(self.targets))
+
+    def window(self, start: date, end: date) -> 'DailyPlan':
+        """
+        Zero-copy view of the plan between two dates (clipped to the plan's range).
+
+        A window that misses the plan returns a one-day plan without workdays
+        on the plan day nearest the window, so its start never passes its end.
+        """
+        first = max(start.toordinal() - self.start_ordinal, 0)
+        last = min(end.toordinal() - self.start_ordinal, len(self.targets) - 1)
+        if last < first:
+            nearest = min(first, len(self.targets) - 1)
+            if nearest < 0:
+                return self
+            return DailyPlan(date.fromordinal(self.start_ordinal + nearest),
+                             np.full(1, np.nan, dtype=self.targets.dtype))
+        return DailyPlan(date.fromordinal(self.start_ordinal + first), self.targets[first:last + 1])
+
+    def month(self, year: int, month: int) -> 'DailyPlan':
+        """Zero-copy view of one calendar month of the plan."""
+        first = date(year, month, 1)
+        last = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        return self.window(first, date.fromordinal(last.toordinal() - 1))
+
+    def monthly_totals(self) -> Dict[int, float]:
+        """Total target per month number (1-12), summed over every year in the plan."""
+        days = np.datetime64(self.start, 'D') + np.arange(len(self.targets))
+        totals = np.bincount(month_index(days), weights=np.nan_to_num(self.targets), minlength=12)
+        return {month: float(total) for month, total in enumerate(totals, 1)}
+
+    def progress_index(self) -> ProgressIndex:
+        """The plan's ProgressIndex, built on first use and kept with the plan."""
+        if self._index is None:
+            offsets = self.workday_offsets()
+            self._index = ProgressIndex.from_arrays(offsets + self.start_ordinal, self.targets[offsets])
+        return self._index
@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+from typing import Mapping
+
+import numpy as np
+
+class ProgressIndex:
+    """
+    Sorted-date, cumulative-sum index over a plan's daily targets.
+
+    Every query is answered by bisection over the sorted workday ordinals,
+    so any number of pace windows can be evaluated without rescanning the plan.
+    """
+
+    __slots__ = ('_ordinals', '_cumulative')
+
+    def __init__(self, daily_targets: Mapping[date, float]):
+        """
+        Build the index.
+
+        Args:
+            daily_targets: Dictionary with date as key and target hours as value
+        """
+        days = sorted(daily_targets)
+        self._ordinals = np.fromiter((day.toordinal() for day in days), dtype=np.int64, count=len(days))
+        self._cumulative = np.zeros(len(days) + 1)
+        np.cumsum([daily_targets[day] for day in days], out=self._cumulative[1:])
+
+    @classmethod
+    def from_arrays(cls, ordinals: np.ndarray, hours: np.ndarray) -> 'ProgressIndex':
+        """Build the index from sorted day ordinals and their targets without a dict."""
+        index = cls.__new__(cls)
+        index._ordinals = np.asarray(ordinals, dtype=np.int64)
+        index._cumulative = np.zeros(len(index._ordinals) + 1)
+        np.cumsum(hours, out=index._cumulative[1:])
+        return index
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def _position(self, day: date) -> int:
+        """Number of planned workdays on or before the given day."""
+        return int(np.searchsorted(self._ordinals, day.toordinal(), side='right'))
+
+    def target_to_date(self, day: date) -> float:
+        """Sum of targets for all workdays up to and including the given day."""
+        return float(self._cumulative[self._position(day)])
+
+    def target_between(self, start: date, end: date) -> float:
+        """Sum of targets for workdays from start to end (inclusive)."""
+        if end < start:
+            return 0.0
+        return float(
+            self._cumulative[self._position(end)]
+            - self._cumulative[self._position(start - timedelta(days=1))]
+        )
+
+    def workdays_between(self, start: date, end: date) -> int:
+        """Number of planned workdays from start to end (inclusive)."""
+        if end < start:
+            return 0
+        return self._position(end) - self._position(start - timedelta(days=1))
+
+    def remaining_workdays(self, day: date) -> int:
+        """Number of planned workdays strictly after the given day."""
+        return len(self._ordinals) - self._position(day)
+
+    def remaining_target(self, day: date) -> float:
+        """Sum of targets for workdays strictly after the given day."""
+        return float(self._cumulative[-1] - self._cumulative[self._position(day)])
+
+    def month_to_date(self, day: date) -> float:
+        """Sum of targets from the first of the day's month through the day."""
+        return self.target_between(day.replace(day=1), day)
+
+    def week_to_date(self, day: date) -> float:
+        """Sum of targets from the Monday of the day's week through the day."""
+        return self.target_between(day - timedelta(days=day.weekday()), day)
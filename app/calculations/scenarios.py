@@ -0,0 +1,134 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from app.calculations.workdays import DEFAULT_WORKWEEK
+from app.calculations.bulk import generate_plans_bulk
+
+class Scenario:
+    """
+    One what-if variant of a user's plan inputs.
+
+    Days off are added to the user's existing days off and monthly weights
+    override the user's weights for the months they name.
+    """
+
+    __slots__ = ('total_hours', 'days_off', 'monthly_weights', 'label')
+
+    def __init__(self, total_hours: float, days_off: Sequence[date] = (),
+                 monthly_weights: Dict[int, float] = None, label: str = None):
+        """
+        Describe a scenario.
+
+        Args:
+            total_hours: Annual billable hour goal to test
+            days_off: Extra dates to take off
+            monthly_weights: Dictionary with month number as key and weight as value
+            label: Name echoed back in the result
+        """
+        self.total_hours = total_hours
+        self.days_off = list(days_off)
+        self.monthly_weights = dict(monthly_weights or {})
+        self.label = label
+
+    def __reduce__(self):
+        return (self.__class__, (self.total_hours, self.days_off, self.monthly_weights, self.label))
+
+def date_span(start: date, end: date) -> List[date]:
+    """Every calendar day from start to end (inclusive), e.g. to turn a vacation into days off."""
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+def _simulate_chunk(year, scenarios, base_days_off, base_weights, max_daily_hours,
+                    workweek, start_date, end_date, holidays, partial_days) -> List[Dict]:
+    """Evaluate one batch of scenarios with a single vectorized bulk generation."""
+    base_days_off = set(base_days_off or ())
+    base_weights = base_weights or {}
+
+    plans = generate_plans_bulk(
+        year,
+        [scenario.total_hours for scenario in scenarios],
+        [sorted(base_days_off.union(scenario.days_off)) for scenario in scenarios],
+        [{**base_weights, **scenario.monthly_weights} for scenario in scenarios],
+        max_daily_hours, workweek, start_date, end_date, holidays,
+        [partial_days] * len(scenarios) if partial_days else None
+    )
+
+    start = plans.start
+    month_numbers = [(start.month - 1 + offset) % 12 + 1 for offset in range(plans.monthly_totals.shape[1])]
+    workdays = plans.workdays.sum(axis=1)
+    capacities = max_daily_hours * plans.capacity.sum(axis=1)
+    peaks = plans.peak_daily.tolist()
+    totals = plans.monthly_totals.tolist()
+
+    results = []
+    for i, scenario in enumerate(scenarios):
+        capacity = float(capacities[i])
+        results.append({
+            'label': scenario.label,
+            'total_hours': scenario.total_hours,
+            'feasible': not bool(plans.infeasible[i]),
+            'shortfall': max(scenario.total_hours - capacity, 0.0),
+            'peak_daily': peaks[i],
+            'workdays': int(workdays[i]),
+            'capacity': capacity,
+            'monthly_totals': dict(zip(month_numbers, totals[i]))
+        })
+    return results
+
+def simulate_scenarios(
+    year: int,
+    scenarios: Sequence[Scenario],
+    base_days_off: Sequence[date] = None,
+    base_weights: Dict[int, float] = None,
+    max_daily_hours: float = 10.0,
+    workweek: Sequence[int] = DEFAULT_WORKWEEK,
+    start_date: date = None,
+    end_date: date = None,
+    workers: int = 0,
+    chunk_size: int = 1000,
+    holidays: np.ndarray = None,
+    partial_days: Dict[date, float] = None
+) -> List[Dict]:
+    """
+    Evaluate many what-if scenarios on top of a user's plan inputs.
+
+    Scenarios are evaluated in batches of chunk_size through the bulk
+    engine; with workers > 0 and more than one batch, the batches are spread
+    over a process pool. Nothing is written anywhere.
+
+    Args:
+        year: Plan year to simulate
+        scenarios: Scenarios to evaluate
+        base_days_off: The user's current days off
+        base_weights: The user's current monthly weights
+        max_daily_hours: Maximum target hours per day
+        workweek: Seven flags from Monday to Sunday marking working weekdays
+        start_date: First day of the plan year (default: January 1 of year)
+        end_date: Last day of the plan year (default: December 31 of year)
+        workers: Number of worker processes for large sweeps (0 = in-process)
+        chunk_size: Scenarios per vectorized batch
+        holidays: Shared datetime64[D] array of the user's calendar holidays
+        partial_days: The user's partial days (date -> fraction off)
+
+    Returns:
+        One dictionary per scenario, in order, with feasibility, shortfall,
+        peak daily target, workdays, capacity and monthly totals
+    """
+    scenarios = list(scenarios)
+    if not scenarios:
+        return []
+
+    chunks = [scenarios[i:i + chunk_size] for i in range(0, len(scenarios), chunk_size)]
+    shared = (base_days_off, base_weights, max_daily_hours, tuple(workweek), start_date, end_date,
+              holidays, partial_days)
+
+    if workers and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            futures = [executor.submit(_simulate_chunk, year, chunk, *shared) for chunk in chunks]
+            batches = [future.result() for future in futures]
+    else:
+        batches = [_simulate_chunk(year, chunk, *shared) for chunk in chunks]
+
+    return [result for batch in batches for result in batch]
@@ -1,29 +1,45 @@
 # app/calculations/service.py
-from datetime import date
-from typing import Dict, List, Optional
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
 
-from app.calculations.workdays import get_workdays_by_month, get_workday_dates_by_month
-from app.calculations.distribution import distribute_hours_by_month, calculate_daily_targets
+import numpy as np
+
+from app.calculations.workdays import DEFAULT_WORKWEEK, WorkdayIndex, fiscal_year_bounds
+from app.calculations.distribution import distribute_hours_array, water_fill
+from app.calculations.progress import ProgressIndex
+from app.calculations.plan import DailyPlan
+from app.calculations.catchup import CatchUpPlanner
+from app.calculations.bulk import BulkPlans, generate_plans_bulk
+from app.calculations.scenarios import Scenario, simulate_scenarios
 
 class BillableHourCalculationService:
     """Service for calculating billable hour plans based on user inputs."""
     
-    def __init__(self, max_daily_hours: float = 10.0):
+    def __init__(self, max_daily_hours: float = 10.0, workweek=DEFAULT_WORKWEEK, dtype=np.float64):
         """
         Initialize the calculation service.
         
         Args:
             max_daily_hours: Maximum target hours per day (default: 10.0)
+            workweek: Seven flags from Monday to Sunday marking working weekdays
+                (default: Monday to Friday)
+            dtype: Float type of the arrays backing generated plans (float32
+                halves their memory when many plans are kept)
         """
         self.max_daily_hours = max_daily_hours
+        self.workweek = tuple(workweek)
+        self.dtype = dtype
     
     def generate_plan(
         self, 
         year: int, 
         total_hours: int, 
         days_off: List[date] = None,
-        monthly_weights: Dict[int, float] = None
-    ) -> Dict[date, float]:
+        monthly_weights: Dict[int, float] = None,
+        strict: bool = False,
+        holidays: np.ndarray = None,
+        partial_days: Dict[date, float] = None
+    ) -> DailyPlan:
         """
         Generate a complete daily billable hour plan for the year.
         
@@ -32,25 +48,177 @@ class BillableHourCalculationService:
             total_hours: Annual billable hour goal
             days_off: List of dates to exclude (holidays, vacation, etc.)
             monthly_weights: Dictionary with month number as key and weight as value
+            strict: Raise InfeasibleGoalError if the goal cannot be met without
+                exceeding max_daily_hours (default: cap every day instead)
+            holidays: Shared datetime64[D] array of calendar holidays to exclude
+            partial_days: Dictionary with date as key and fraction of the day taken off as value
+            
+        Returns:
+            DailyPlan mapping each workday to its target billable hours
+        """
+        return self.generate_plan_range(
+            date(year, 1, 1), date(year, 12, 31), total_hours,
+            days_off, monthly_weights, strict=strict, holidays=holidays,
+            partial_days=partial_days
+        )
+    
+    def generate_plan_range(
+        self,
+        start_date: date,
+        end_date: date,
+        total_hours: float,
+        days_off: List[date] = None,
+        monthly_weights: Dict = None,
+        window: Tuple[date, date] = None,
+        strict: bool = False,
+        holidays: np.ndarray = None,
+        partial_days: Dict[date, float] = None
+    ) -> DailyPlan:
+        """
+        Generate a daily billable hour plan for an arbitrary date range.
+        
+        The goal is distributed over every calendar month the range touches
+        (partial months count only their workdays inside the range), so the
+        range can be a fiscal year or span several years. Part-time workweeks
+        and partial days count as fractions of a workday: such a day gets
+        that fraction of its month's daily target.
+        
+        Args:
+            start_date: First day of the plan
+            end_date: Last day of the plan
+            total_hours: Billable hour goal for the whole range
+            days_off: List of dates to exclude (holidays, vacation, etc.)
+            monthly_weights: Dictionary of weights keyed by (year, month) or by
+                month number (applies to that month in every year)
+            window: Optional (first, last) dates; only targets inside it are
+                returned, while the allocation still covers the whole range
+            strict: Raise InfeasibleGoalError if the goal cannot be met without
+                exceeding max_daily_hours (default: cap every day instead)
+            holidays: Shared datetime64[D] array of calendar holidays to exclude
+            partial_days: Dictionary with date as key and fraction of the day taken off as value
             
         Returns:
-            Dictionary with date as key and target billable hours as value
+            DailyPlan mapping each workday to its target billable hours
+        """
+        index = WorkdayIndex(start_date, end_date, days_off, self.workweek, holidays, partial_days)
+        counts = index.capacity_by_period()
+        
+        monthly_weights = monthly_weights or {}
+        weights = np.array([
+            monthly_weights.get((year, month), monthly_weights.get(month, 1.0))
+            for year, month in index.months
+        ])
+        
+        # Distribute hours across months, then cap and even out the daily rates
+        hours_by_period = distribute_hours_array([total_hours], counts[None], weights[None])[0]
+        rates = water_fill(hours_by_period, counts, self.max_daily_hours, strict)
+        
+        days, periods, capacity = index.days, index.month_periods(), index.capacity
+        first, last = start_date, end_date
+        if window is not None:
+            selected = index.slice(*window)
+            days, periods = days[selected], periods[selected]
+            if capacity is not None:
+                capacity = capacity[selected]
+            first, last = max(window[0], start_date), min(window[1], end_date)
+        
+        daily = rates[periods]
+        if capacity is not None:
+            daily *= capacity
+        
+        # One slot per calendar day, NaN where there is no workday
+        targets = np.full(max(last.toordinal() - first.toordinal() + 1, 0), np.nan, dtype=self.dtype)
+        targets[(days - np.datetime64(first, 'D')).astype(np.int64)] = daily
+        return DailyPlan(first, targets)
+    
+    def generate_fiscal_plan(
+        self,
+        fiscal_year: int,
+        start_month: int,
+        total_hours: float,
+        days_off: List[date] = None,
+        monthly_weights: Dict = None,
+        window: Tuple[date, date] = None,
+        holidays: np.ndarray = None,
+        partial_days: Dict[date, float] = None
+    ) -> DailyPlan:
         """
-        # Get workdays counts and dates by month
-        workdays_by_month = get_workdays_by_month(year, days_off)
-        workday_dates_by_month = get_workday_dates_by_month(year, days_off)
+        Generate a plan for a fiscal year starting in start_month.
         
-        # Distribute hours across months
-        hours_by_month = distribute_hours_by_month(
-            total_hours, workdays_by_month, monthly_weights
+        See fiscal_year_bounds for how fiscal years are named.
+        """
+        start_date, end_date = fiscal_year_bounds(fiscal_year, start_month)
+        return self.generate_plan_range(
+            start_date, end_date, total_hours, days_off, monthly_weights, window,
+            holidays=holidays, partial_days=partial_days
         )
+    
+    def generate_plans_bulk(
+        self,
+        year: int,
+        total_hours: List[float],
+        days_off: List[List[date]] = None,
+        monthly_weights: List[Dict[int, float]] = None,
+        holidays: np.ndarray = None,
+        partial_days: List[Dict[date, float]] = None
+    ) -> BulkPlans:
+        """
+        Generate plans for many users at once as a users x days matrix.
         
-        # Calculate daily targets
-        daily_targets = calculate_daily_targets(
-            hours_by_month, workday_dates_by_month, self.max_daily_hours
+        Args:
+            year: The year to generate the plans for
+            total_hours: Annual billable hour goal per user
+            days_off: List of dates to exclude per user
+            monthly_weights: Dictionary of month weights per user
+            holidays: Shared datetime64[D] array of holidays all users have off
+            partial_days: Dictionary of partial days (date -> fraction off) per user
+            
+        Returns:
+            BulkPlans with per-user views (plan_for, targets_for) and
+            monthly totals, peak daily targets and infeasible flags per user
+        """
+        return generate_plans_bulk(
+            year, total_hours, days_off, monthly_weights,
+            self.max_daily_hours, self.workweek, holidays=holidays,
+            partial_days=partial_days
         )
+    
+    def simulate_scenarios(
+        self,
+        year: int,
+        scenarios: List[Scenario],
+        days_off: List[date] = None,
+        monthly_weights: Dict[int, float] = None,
+        start_date: date = None,
+        end_date: date = None,
+        workers: int = 0,
+        chunk_size: int = 1000,
+        holidays: np.ndarray = None,
+        partial_days: Dict[date, float] = None
+    ) -> List[Dict]:
+        """
+        Evaluate what-if scenarios against a user's current plan inputs.
         
-        return daily_targets
+        Args:
+            year: The plan year to simulate
+            scenarios: Scenarios adding days off or overriding weights and goal
+            days_off: The user's current days off
+            monthly_weights: The user's current monthly weights
+            start_date: First day of the plan year (default: January 1 of year)
+            end_date: Last day of the plan year (default: December 31 of year)
+            workers: Number of worker processes for large sweeps (0 = in-process)
+            chunk_size: Scenarios evaluated per vectorized batch
+            holidays: Shared datetime64[D] array of the user's calendar holidays
+            partial_days: The user's partial days (date -> fraction off)
+            
+        Returns:
+            One result dictionary per scenario (see scenarios.simulate_scenarios)
+        """
+        return simulate_scenarios(
+            year, scenarios, days_off, monthly_weights,
+            self.max_daily_hours, self.workweek, start_date, end_date, workers, chunk_size,
+            holidays, partial_days
+        )
     
     def get_monthly_summary(self, daily_targets: Dict[date, float]) -> Dict[int, float]:
         """
@@ -62,6 +230,9 @@ class BillableHourCalculationService:
         Returns:
             Dictionary with month number as key and total hours as value
         """
+        if isinstance(daily_targets, DailyPlan):
+            return daily_targets.monthly_totals()
+        
         monthly_totals = {month: 0.0 for month in range(1, 13)}
         
         for day, hours in daily_targets.items():
@@ -69,11 +240,43 @@ class BillableHourCalculationService:
         
         return monthly_totals
     
+    def build_progress_index(self, daily_targets: Dict[date, float]) -> ProgressIndex:
+        """
+        Build a prefix-sum index over a plan for repeated pace queries.
+        
+        Args:
+            daily_targets: Dictionary with date as key and target hours as value
+            
+        Returns:
+            ProgressIndex answering target/workday range queries by bisection
+        """
+        if isinstance(daily_targets, DailyPlan):
+            return daily_targets.progress_index()
+        return ProgressIndex(daily_targets)
+    
+    def build_catch_up_planner(self, daily_targets: DailyPlan, today: date = None) -> CatchUpPlanner:
+        """
+        Prepare catch-up planning over the workdays after today.
+        
+        Args:
+            daily_targets: The plan to catch up on
+            today: Last day already behind us (default: date.today())
+            
+        Returns:
+            CatchUpPlanner that re-solves revised targets for any total logged
+        """
+        if not isinstance(daily_targets, DailyPlan):
+            daily_targets = DailyPlan.from_items(daily_targets.items())
+        return CatchUpPlanner(daily_targets, self.max_daily_hours, today or date.today())
+    
     def calculate_progress_metrics(
         self,
         goal_hours: int,
         daily_targets: Dict[date, float],
-        logged_hours: Dict[date, float]
+        logged_hours: Dict[date, float],
+        today: date = None,
+        index: ProgressIndex = None,
+        total_logged: float = None
     ) -> Dict[str, float]:
         """
         Calculate progress metrics based on logged hours vs targets.
@@ -82,27 +285,48 @@ class BillableHourCalculationService:
             goal_hours: Annual billable hour goal
             daily_targets: Dictionary with date as key and target hours as value
             logged_hours: Dictionary with date as key and actual logged hours as value
+            today: Date to measure progress at (default: date.today())
+            index: Prebuilt progress index for daily_targets, to skip rebuilding it
+            total_logged: Total hours logged in the plan year, e.g. summed by the
+                database; logged_hours then only needs to cover the current month
+                and week (default: the sum of logged_hours)
         
         Returns:
             Dictionary with metrics (total_logged, target_to_date, current_pace, etc.)
         """
-        today = date.today()
+        if today is None:
+            today = date.today()
+        if index is None:
+            index = self.build_progress_index(daily_targets)
+        
+        month_start = today.replace(day=1)
+        week_start = today - timedelta(days=today.weekday())
         
-        # Calculate total logged hours
-        total_logged = sum(logged_hours.values())
+        # Calculate total, month-to-date and week-to-date logged hours in one pass
+        logged_sum = month_logged = week_logged = 0.0
+        for day, hours in logged_hours.items():
+            logged_sum += hours
+            if month_start <= day <= today:
+                month_logged += hours
+            if week_start <= day <= today:
+                week_logged += hours
+        if total_logged is None:
+            total_logged = logged_sum
         
         # Calculate target to date (sum of targets for days that have passed)
-        target_to_date = sum(hours for day, hours in daily_targets.items() if day <= today)
+        target_to_date = index.target_to_date(today)
+        month_target_to_date = index.month_to_date(today)
+        week_target_to_date = index.week_to_date(today)
         
         # Calculate current pace (ahead or behind)
         current_pace = total_logged - target_to_date
         
         # Calculate recommended daily hours going forward
-        remaining_workdays = [day for day in daily_targets.keys() if day > today]
+        remaining_workdays = index.remaining_workdays(today)
         remaining_target = goal_hours - total_logged
         
         if remaining_workdays:
-            recommended_daily = remaining_target / len(remaining_workdays)
+            recommended_daily = remaining_target / remaining_workdays
         else:
             recommended_daily = 0
         
@@ -110,7 +334,13 @@ class BillableHourCalculationService:
             'total_logged': total_logged,
             'target_to_date': target_to_date,
             'current_pace': current_pace,
-            'remaining_workdays': len(remaining_workdays),
+            'remaining_workdays': remaining_workdays,
             'remaining_target': remaining_target,
-            'recommended_daily': recommended_daily
-        }
\ No newline at end of file
+            'recommended_daily': recommended_daily,
+            'month_logged': month_logged,
+            'month_target_to_date': month_target_to_date,
+            'month_pace': month_logged - month_target_to_date,
+            'week_logged': week_logged,
+            'week_target_to_date': week_target_to_date,
+            'week_pace': week_logged - week_target_to_date
+        }
@@ -1,80 +1,333 @@
 # app/calculations/workdays.py
-import calendar
-from datetime import date, datetime, timedelta
-from typing import List, Set, Dict
+from datetime import date, timedelta
+from typing import List, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Working-day mask from Monday to Sunday (1 = working day). Fractions describe
+# recurring part-time schedules, e.g. 0.5 on Friday for half-day Fridays.
+DEFAULT_WORKWEEK = (1, 1, 1, 1, 1, 0, 0)
+
+# Day 0 of datetime64[D] (1970-01-01) was a Thursday
+_EPOCH_WEEKDAY = 3
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
 
 def is_weekend(day: date) -> bool:
     """Check if a date is a weekend (Saturday or Sunday)."""
     return day.weekday() >= 5  # 5 is Saturday, 6 is Sunday
 
-def get_workdays_in_year(year: int, days_off: List[date] = None) -> List[date]:
+def to_day_array(days: Sequence[date] = None) -> np.ndarray:
+    """Convert a sequence of dates to a datetime64[D] array."""
+    if days is None or len(days) == 0:
+        return np.empty(0, dtype='datetime64[D]')
+    if isinstance(days, np.ndarray):
+        return days.astype('datetime64[D]', copy=False)
+    # Going through date.toordinal() is much cheaper than numpy's per-object parsing
+    ordinals = np.fromiter((day.toordinal() for day in days), dtype=np.int64, count=len(days))
+    return (ordinals - _EPOCH_ORDINAL).astype('datetime64[D]')
+
+def weekday_array(days: np.ndarray) -> np.ndarray:
+    """Weekday (Monday=0 ... Sunday=6) for each entry of a datetime64[D] array."""
+    return (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+
+def month_index(days: np.ndarray) -> np.ndarray:
+    """Zero-based month (January=0) for each entry of a datetime64[D] array."""
+    return days.astype('datetime64[M]').astype(np.int64) % 12
+
+def workday_array(
+    start_date: date,
+    end_date: date,
+    days_off: Sequence[date] = None,
+    workweek: Sequence[int] = DEFAULT_WORKWEEK,
+    holidays: np.ndarray = None
+) -> np.ndarray:
+    """
+    Get all working days between two dates (inclusive) as a datetime64[D] array.
+
+    Args:
+        start_date: First day of the range
+        end_date: Last day of the range
+        days_off: List of dates to exclude (holidays, vacation, etc.)
+        workweek: Seven flags from Monday to Sunday marking working weekdays
+        holidays: Shared datetime64[D] array of holidays to exclude as well
+            (e.g. HolidayCalendar.day_array); it is read, never copied
+
+    Returns:
+        Sorted datetime64[D] array of working days
+    """
+    days = np.arange(
+        np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1
+    )
+    mask = np.asarray(workweek, dtype=bool)[weekday_array(days)]
+
+    off = to_day_array(days_off)
+    if off.size:
+        mask &= ~np.isin(days, off)
+    if holidays is not None and len(holidays):
+        mask &= ~np.isin(days, holidays)
+
+    return days[mask]
+
+def parse_workweek(text: Optional[str]) -> Tuple[float, ...]:
+    """
+    Parse a stored schedule such as "1,1,1,1,0.5,0,0" (Monday to Sunday).
+
+    Returns DEFAULT_WORKWEEK for an empty schedule and raises ValueError
+    unless there are seven fractions between 0 and 1.
+    """
+    if not text:
+        return DEFAULT_WORKWEEK
+    workweek = tuple(float(value) for value in text.split(','))
+    if len(workweek) != 7 or not all(0 <= value <= 1 for value in workweek):
+        raise ValueError(f'invalid work schedule: {text!r}')
+    return workweek
+
+def workday_capacity(
+    workdays: np.ndarray,
+    workweek: Sequence[float] = DEFAULT_WORKWEEK,
+    partial_days: Mapping[date, float] = None
+) -> Optional[np.ndarray]:
+    """
+    Share of a full day available on each workday.
+
+    Args:
+        workdays: Sorted datetime64[D] array of workdays
+        workweek: Seven fractions from Monday to Sunday
+        partial_days: Dictionary with date as key and the fraction of the day
+            taken off as value (0.5 = half day off)
+
+    Returns:
+        Float array aligned with workdays, or None when every workday is a
+        full day so callers can keep using plain day counts
+    """
+    weekly = np.asarray(workweek, dtype=float)
+    whole_days = bool(np.all((weekly == 0) | (weekly == 1)))
+    if whole_days and not partial_days:
+        return None
+
+    capacity = weekly[weekday_array(workdays)]
+    if partial_days and len(workdays):
+        days = to_day_array(list(partial_days))
+        fractions = np.fromiter(partial_days.values(), dtype=float, count=len(partial_days))
+        # Partial days that are not workdays (weekends, days off) are ignored
+        positions = np.minimum(np.searchsorted(workdays, days), len(workdays) - 1)
+        found = workdays[positions] == days
+        capacity[positions[found]] *= 1 - np.clip(fractions[found], 0, 1)
+    return capacity
+
+def year_workday_array(
+    year: int,
+    days_off: Sequence[date] = None,
+    workweek: Sequence[int] = DEFAULT_WORKWEEK,
+    holidays: np.ndarray = None
+) -> np.ndarray:
+    """Get the working days of a calendar year as a datetime64[D] array."""
+    return workday_array(date(year, 1, 1), date(year, 12, 31), days_off, workweek, holidays)
+
+def count_by_month(workdays: np.ndarray) -> np.ndarray:
+    """Count the entries of a single-year datetime64[D] array per month (index 0 = January)."""
+    return np.bincount(month_index(workdays), minlength=12)
+
+def split_by_month(workdays: np.ndarray) -> Dict[int, List[date]]:
+    """Group a sorted single-year datetime64[D] array into lists of dates per month."""
+    boundaries = np.cumsum(count_by_month(workdays))[:-1]
+    return {
+        month: chunk.tolist()
+        for month, chunk in enumerate(np.split(workdays, boundaries), 1)
+    }
+
+def fiscal_year_bounds(fiscal_year: int, start_month: int = 1) -> tuple:
+    """
+    First and last day of a fiscal year.
+
+    Fiscal years are named after the calendar year they end in, so with
+    start_month=10, fiscal year 2026 runs from 2025-10-01 to 2026-09-30.
+    With the default start_month=1 this is the calendar year.
+    """
+    if start_month == 1:
+        return date(fiscal_year, 1, 1), date(fiscal_year, 12, 31)
+    return (
+        date(fiscal_year - 1, start_month, 1),
+        date(fiscal_year, start_month, 1) - timedelta(days=1)
+    )
+
+def fiscal_year_of(day: date, start_month: int = 1) -> int:
+    """The fiscal year (see fiscal_year_bounds) a date falls in."""
+    if start_month == 1 or day.month < start_month:
+        return day.year
+    return day.year + 1
+
+class WorkdayIndex:
+    """
+    Workdays of an arbitrary date range with an ordinal index over them.
+
+    Maps a date to its position among the range's workdays (the nth workday)
+    and back by bisection, so windows such as "the next N workdays" are array
+    slices rather than day-by-day iteration. Ranges may span several years.
+    """
+
+    __slots__ = ('start_date', 'end_date', 'days', 'capacity', '_first_month')
+
+    def __init__(
+        self,
+        start_date: date,
+        end_date: date,
+        days_off: Sequence[date] = None,
+        workweek: Sequence[int] = DEFAULT_WORKWEEK,
+        holidays: np.ndarray = None,
+        partial_days: Mapping[date, float] = None
+    ):
+        """
+        Build the index.
+
+        Args:
+            start_date: First day of the range
+            end_date: Last day of the range
+            days_off: List of dates to exclude (holidays, vacation, etc.)
+            workweek: Seven flags (or fractions) from Monday to Sunday marking working weekdays
+            holidays: Shared datetime64[D] array of holidays to exclude as well
+            partial_days: Dictionary with date as key and fraction of the day taken off as value
+        """
+        self.start_date = start_date
+        self.end_date = end_date
+        self.days = workday_array(start_date, end_date, days_off, workweek, holidays)
+        # None when every workday is a full day
+        self.capacity = workday_capacity(self.days, workweek, partial_days)
+        self._first_month = int(np.datetime64(start_date, 'M').astype(np.int64))
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __contains__(self, day: date) -> bool:
+        position = self.position(day)
+        return position < len(self.days) and self.days[position] == np.datetime64(day, 'D')
+
+    def position(self, day: date) -> int:
+        """Number of workdays in the range strictly before the given day."""
+        return int(np.searchsorted(self.days, np.datetime64(day, 'D'), side='left'))
+
+    def ordinal(self, day: date) -> int:
+        """Zero-based ordinal of a workday within the range (KeyError if not a workday)."""
+        if day not in self:
+            raise KeyError(day)
+        return self.position(day)
+
+    def date_at(self, ordinal: int) -> date:
+        """The workday with the given zero-based ordinal."""
+        return self.days[ordinal].item()
+
+    def slice(self, start: date, end: date) -> slice:
+        """Slice of self.days covering the workdays from start to end (inclusive)."""
+        return slice(
+            self.position(start),
+            int(np.searchsorted(self.days, np.datetime64(end, 'D'), side='right'))
+        )
+
+    def next_workdays(self, after: date, count: int) -> np.ndarray:
+        """The next count workdays strictly after the given day."""
+        first = int(np.searchsorted(self.days, np.datetime64(after, 'D'), side='right'))
+        return self.days[first:first + count]
+
+    @property
+    def months(self) -> List[tuple]:
+        """(year, month) of every calendar month the range touches, in order."""
+        last_month = int(np.datetime64(self.end_date, 'M').astype(np.int64))
+        return [
+            (month // 12 + 1970, month % 12 + 1)
+            for month in range(self._first_month, last_month + 1)
+        ]
+
+    def month_periods(self) -> np.ndarray:
+        """Index into self.months of the month each workday falls in."""
+        return self.days.astype('datetime64[M]').astype(np.int64) - self._first_month
+
+    def count_by_period(self) -> np.ndarray:
+        """Number of workdays in each month of self.months."""
+        return np.bincount(self.month_periods(), minlength=len(self.months))
+
+    def capacity_by_period(self) -> np.ndarray:
+        """Capacity-weighted workdays (full days = 1.0) in each month of self.months."""
+        if self.capacity is None:
+            return self.count_by_period()
+        return np.bincount(self.month_periods(), weights=self.capacity, minlength=len(self.months))
+
+def get_workdays_in_year(
+    year: int,
+    days_off: List[date] = None,
+    workweek: Sequence[int] = DEFAULT_WORKWEEK
+) -> List[date]:
     """
     Get all working days (excluding weekends and specified days off) in a year.
-    
+
     Args:
         year: The year to calculate workdays for
         days_off: List of dates to exclude (holidays, vacation, etc.)
-        
+        workweek: Seven flags from Monday to Sunday marking working weekdays
+
     Returns:
         List of dates that are working days
     """
-    if days_off is None:
-        days_off = []
-    
-    # Convert days_off to a set for faster lookups
-    days_off_set = set(days_off)
-    
-    start_date = date(year, 1, 1)
-    end_date = date(year, 12, 31)
-    
-    # Generate all days in the year
-    workdays = []
-    current_date = start_date
-    while current_date <= end_date:
-        # If it's not a weekend and not in days_off, it's a workday
-        if not is_weekend(current_date) and current_date not in days_off_set:
-            workdays.append(current_date)
-        
-        current_date += timedelta(days=1)
-    
-    return workdays
-
-def get_workdays_by_month(year: int, days_off: List[date] = None) -> Dict[int, int]:
+    return year_workday_array(year, days_off, workweek).tolist()
+
+def get_workdays_by_month(
+    year: int,
+    days_off: List[date] = None,
+    workweek: Sequence[int] = DEFAULT_WORKWEEK
+) -> Dict[int, int]:
     """
     Get the number of working days for each month in a year.
-    
+
     Args:
         year: The year to calculate for
         days_off: List of dates to exclude (holidays, vacation, etc.)
-        
+        workweek: Seven flags from Monday to Sunday marking working weekdays
+
     Returns:
         Dictionary with month number (1-12) as key and number of workdays as value
     """
-    workdays = get_workdays_in_year(year, days_off)
-    
-    # Count workdays per month
-    workdays_by_month = {month: 0 for month in range(1, 13)}
-    for day in workdays:
-        workdays_by_month[day.month] += 1
-    
-    return workdays_by_month
+    counts = count_by_month(year_workday_array(year, days_off, workweek))
+    return {month: int(count) for month, count in enumerate(counts, 1)}
 
-def get_workday_dates_by_month(year: int, days_off: List[date] = None) -> Dict[int, List[date]]:
+def get_capacity_by_month(
+    year: int,
+    days_off: List[date] = None,
+    workweek: Sequence[float] = DEFAULT_WORKWEEK,
+    partial_days: Mapping[date, float] = None
+) -> Dict[int, float]:
+    """
+    Get the capacity-weighted number of working days for each month in a year.
+
+    Like get_workdays_by_month, but half days count as 0.5 and so on, so the
+    result can be passed to distribute_hours_by_month directly.
+
+    Args:
+        year: The year to calculate for
+        days_off: List of dates to exclude (holidays, vacation, etc.)
+        workweek: Seven fractions from Monday to Sunday (e.g. 0.5 for half-day Fridays)
+        partial_days: Dictionary with date as key and fraction of the day taken off as value
+
+    Returns:
+        Dictionary with month number (1-12) as key and weighted workdays as value
+    """
+    workdays = year_workday_array(year, days_off, workweek)
+    capacity = workday_capacity(workdays, workweek, partial_days)
+    totals = np.bincount(month_index(workdays), weights=capacity, minlength=12)
+    return {month: float(total) for month, total in enumerate(totals, 1)}
+
+def get_workday_dates_by_month(
+    year: int,
+    days_off: List[date] = None,
+    workweek: Sequence[int] = DEFAULT_WORKWEEK
+) -> Dict[int, List[date]]:
     """
     Get the actual workday dates for each month in a year.
-    
+
     Args:
         year: The year to calculate for
         days_off: List of dates to exclude (holidays, vacation, etc.)
-        
+        workweek: Seven flags from Monday to Sunday marking working weekdays
+
     Returns:
         Dictionary with month number (1-12) as key and list of workday dates as value
     """
-    workdays = get_workdays_in_year(year, days_off)
-    
-    # Group workdays by month
-    workday_dates_by_month = {month: [] for month in range(1, 13)}
-    for day in workdays:
-        workday_dates_by_month[day.month].append(day)
-    
-    return workday_dates_by_month
\ No newline at end of file
+    return split_by_month(year_workday_array(year, days_off, workweek))
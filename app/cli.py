@@ -0,0 +1,199 @@
+# app/cli.py
+"""Flask CLI commands (run `flask --app run <command> --help`)."""
+import csv
+from datetime import date
+
+import click
+from flask.cli import with_appcontext
+
+from app.imports import DEFAULT_CHUNK_SIZE, import_time_entries
+from app import db
+from app.models import User
+from app.calculations.holidays import CALENDARS
+from app.plans import plan_year_bounds, plan_year_of, subscribe_holiday_calendar
+from app.query_audit import ROUTE_TESTS, audit_tests
+from app.reports import FORMATS, iter_report_rows
+from app.rollups import rebuild_log_rollups, verify_log_rollups
+
+@click.command('import-hours')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user', 'email', help='Import every row for this user instead of mapping rows by email.')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=DEFAULT_CHUNK_SIZE, show_default=True,
+              help='User-day totals written per transaction.')
+@click.option('--rejects', type=click.Path(dir_okay=False, writable=True),
+              help='Write rejected rows (line, reason) to this CSV file.')
+@click.option('--restart', is_flag=True, help='Import from the start even if this file was imported before.')
+@click.option('--email-column', default='email', show_default=True)
+@click.option('--date-column', default='date', show_default=True)
+@click.option('--hours-column', default='hours', show_default=True)
+@with_appcontext
+def import_hours(path, email, chunk_size, rejects, restart, email_column, date_column, hours_column):
+    """Import time entries from a practice-management CSV export into daily logs.
+
+    An interrupted import resumes where it stopped when run again on the same file.
+    """
+    user_id = None
+    if email:
+        user = User.query.filter_by(email=email).first()
+        if user is None:
+            raise click.BadParameter(f'No user with email {email}', param_hint='--user')
+        user_id = user.id
+
+    rejects_file = open(rejects, 'a', newline='') if rejects else None
+    on_reject = None
+    if rejects_file:
+        writer = csv.writer(rejects_file)
+        on_reject = lambda line, reason: writer.writerow([line, reason])
+
+    try:
+        with open(path, 'rb') as stream:
+            result = import_time_entries(
+                stream, path, user_id=user_id, chunk_size=chunk_size, on_reject=on_reject,
+                restart=restart, email_column=email_column, date_column=date_column,
+                hours_column=hours_column
+            )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    finally:
+        if rejects_file:
+            rejects_file.close()
+
+    if result.already_imported:
+        click.echo(f'{path} was already imported ({result.rows_imported} rows); use --restart to import it again.')
+        return
+    if result.resumed_from:
+        click.echo(f'Resumed after row {result.resumed_from}.')
+    click.echo(f'{result.rows_read} rows read, {result.rows_imported} imported, {result.rows_rejected} rejected.')
+    for line, reason in result.rejected[:10]:
+        click.echo(f'  line {line}: {reason}')
+
+@click.command('export-report')
+@click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='csv', show_default=True)
+@click.option('--start', type=click.DateTime(['%Y-%m-%d']), help='First day (default: start of the current plan year).')
+@click.option('--end', type=click.DateTime(['%Y-%m-%d']), help='Last day (default: end of the current plan year).')
+@click.option('--user', 'emails', multiple=True, help='Only export this user (repeatable).')
+@click.option('--output', type=click.File('w'), default='-', help='File to write (default: stdout).')
+@with_appcontext
+def export_report(fmt, start, end, emails, output):
+    """Stream daily targets and logged hours of every user (or --user) as CSV or JSON Lines."""
+    default_start, default_end = plan_year_bounds(plan_year_of(date.today()))
+    start = start.date() if start else default_start
+    end = end.date() if end else default_end
+
+    _, render = FORMATS[fmt]
+    for chunk in render(iter_report_rows(start, end, _user_ids(emails))):
+        output.write(chunk)
+
+def _user_ids(emails):
+    """IDs of the users with the given emails (None for everyone when no email is given)."""
+    if not emails:
+        return None
+    user_ids = [user_id for (user_id,) in User.query.with_entities(User.id).filter(User.email.in_(emails))]
+    if len(user_ids) != len(set(emails)):
+        raise click.BadParameter('Unknown user email', param_hint='--user')
+    return user_ids
+
+@click.group('rollups')
+def rollups():
+    """Check or rebuild the monthly logged-hour rollups."""
+
+@rollups.command('verify')
+@click.option('--user', 'emails', multiple=True, help='Only check this user (repeatable).')
+@with_appcontext
+def verify_rollups(emails):
+    """Compare the rollups with the daily logs; exit 1 if any month drifted."""
+    drift = verify_log_rollups(_user_ids(emails))
+    for month in drift:
+        click.echo(f"user {month['user_id']} {month['year']}-{month['month']:02d}: "
+                   f"expected {month['expected']}, stored {month['stored']}")
+    if drift:
+        raise click.ClickException(f'{len(drift)} drifted months; run `flask rollups rebuild` to repair them.')
+    click.echo('Rollups match the daily logs.')
+
+@rollups.command('rebuild')
+@click.option('--user', 'emails', multiple=True, help='Only rebuild this user (repeatable).')
+@with_appcontext
+def rebuild_rollups(emails):
+    """Recompute the rollups from the daily logs."""
+    written = rebuild_log_rollups(_user_ids(emails))
+    db.session.commit()
+    click.echo(f'Wrote {written} monthly rollups.')
+
+@click.group('holidays')
+def holidays():
+    """Manage users' shared holiday calendars."""
+
+@holidays.command('subscribe')
+@click.option('--calendar', 'calendar_name', type=click.Choice(sorted(CALENDARS)),
+              help="Calendar to subscribe to (default: the one matching most of each user's holidays).")
+@click.option('--user', 'emails', multiple=True, help='Only move this user (repeatable).')
+@click.option('--dry-run', is_flag=True, help='Report what would change without writing it.')
+@with_appcontext
+def subscribe_holidays(calendar_name, emails, dry_run):
+    """Replace users' per-user 'Holiday' days off with a holiday calendar subscription.
+
+    Plans keep their targets: calendar holidays a user did not take off in
+    their goal years are kept as 'Worked Holiday' days.
+    """
+    query = User.query.filter(User.holiday_calendar.is_(None))
+    user_ids = _user_ids(emails)
+    if user_ids is not None:
+        query = query.filter(User.id.in_(user_ids))
+
+    moved = deleted = worked = 0
+    for user_id in [user_id for (user_id,) in query.with_entities(User.id).order_by(User.id)]:
+        user = db.session.get(User, user_id)
+        result = subscribe_holiday_calendar(user, calendar_name)
+        if result is None:
+            db.session.rollback()
+            continue
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()  # One user per transaction; each commit refreshes that user's plans
+        moved += 1
+        deleted += result[1]
+        worked += result[2]
+        click.echo(f'{user.email}: {result[0]}, {result[1]} holiday days off removed, '
+                   f'{result[2]} worked holidays added')
+    verb = 'Would move' if dry_run else 'Moved'
+    click.echo(f'{verb} {moved} users: {deleted} holiday days off removed, {worked} worked holidays added.')
+
+@click.command('audit-queries')
+@click.argument('paths', nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option('--all', 'show_all', is_flag=True,
+              help='List every statement with its plan, including those the tests run themselves.')
+def audit_queries(paths, show_all):
+    """Run the route tests (or PATHS) and flag full scans and temp B-trees in the plans of their SQL.
+
+    Each distinct statement is explained (EXPLAIN QUERY PLAN on SQLite, EXPLAIN
+    on PostgreSQL) with the parameters it first ran with.
+    """
+    audit, result = audit_tests(paths or ROUTE_TESTS)
+    statements = sorted(audit.statements.values(), key=lambda audited: -audited.count)
+    if not show_all:
+        statements = [audited for audited in statements if audited.findings and audited.origin]
+
+    for audited in statements:
+        click.echo(f"{audited.count:5d}x {audited.origin or 'test code'}: {', '.join(audited.findings) or 'ok'}")
+        click.echo(f'       {audited.statement}')
+        for step in audited.plan:
+            click.echo(f'         {step}')
+    for statement, error in audit.errors.items():
+        click.echo(f'Could not explain {statement}: {error}', err=True)
+
+    flagged = [audited for audited in audit.flagged if audited.origin]
+    click.echo(f'{len(audit.statements)} distinct statements from {result.testsRun} tests; '
+               f'{len(flagged)} run by the app have findings.')
+    if not result.wasSuccessful():
+        raise click.ClickException(
+            f'{len(result.failures) + len(result.errors)} tests failed; their remaining statements were not audited.'
+        )
+
+def register(app):
+    """Add the commands to an app's CLI."""
+    app.cli.add_command(import_hours)
+    app.cli.add_command(export_report)
+    app.cli.add_command(rollups)
+    app.cli.add_command(holidays)
+    app.cli.add_command(audit_queries)
@@ -0,0 +1,97 @@
+# app/dashboard/data.py
+"""Dashboard and calendar data shared by the HTML views and the JSON API."""
+from calendar import monthcalendar, monthrange
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from app.calculations import BillableHourCalculationService
+from app.plans import PlanInputs, get_planned_days, logged_hours_by_month, logged_hours_by_day
+
+def dashboard_data(inputs: PlanInputs, today: date) -> Dict:
+    """
+    Plan and progress figures for a user's dashboard.
+
+    Args:
+        inputs: The user's plan inputs for the plan year containing today,
+            with a goal
+        today: Current date
+
+    Returns:
+        Dictionary with monthly_summary and monthly_logged (month number ->
+        hours, in plan-year order) and the progress metrics
+    """
+    # Read the materialized plan
+    user_id = inputs.user_id
+    calculation_service = BillableHourCalculationService()
+    plan = get_planned_days(user_id, inputs.year)
+
+    # Months in plan-year order, starting with the month the plan year starts in
+    months = [(inputs.start.month - 1 + offset) % 12 + 1 for offset in range(12)]
+
+    # Get monthly summary
+    monthly_totals = calculation_service.get_monthly_summary(plan)
+    monthly_summary = {month: monthly_totals.get(month, 0.0) for month in months}
+
+    # Sum logged hours per month of the plan year in the database
+    logged_totals = logged_hours_by_month(user_id, inputs.year)
+    monthly_logged = {month: logged_totals.get(month, 0.0) for month in months}
+
+    # Only this month's and week's logs are needed day by day
+    recent_start = min(today.replace(day=1), today - timedelta(days=today.weekday()))
+    recent_logs = logged_hours_by_day(user_id, recent_start, today)
+
+    # Calculate progress metrics
+    metrics = calculation_service.calculate_progress_metrics(
+        inputs.total_hours, plan, recent_logs, today=today,
+        total_logged=sum(monthly_logged.values())
+    )
+
+    return {
+        'monthly_summary': monthly_summary,
+        'monthly_logged': monthly_logged,
+        'metrics': metrics
+    }
+
+def calendar_weeks(user_id: int, plan_year: int, year: int, month: int,
+                   today: date) -> List[List[Optional[Dict]]]:
+    """
+    Daily targets and logged hours for one month, laid out Monday to Sunday.
+
+    Only the month's materialized targets and logs are read.
+
+    Args:
+        user_id: ID of the user
+        plan_year: Plan year containing the month
+        year: Calendar year of the month
+        month: Month number (1-12)
+        today: Current date
+
+    Returns:
+        List of weeks, each a list of seven day dictionaries (date,
+        target_hours, logged_hours, is_today) or None outside the month
+    """
+    # Read the materialized targets for the displayed month only
+    month_start = date(year, month, 1)
+    month_end = date(year, month, monthrange(year, month)[1])
+    plan = get_planned_days(user_id, plan_year, month_start, month_end)
+
+    # Get logged hours for the displayed month only
+    daily_logged = logged_hours_by_day(user_id, month_start, month_end)
+
+    weeks = []
+    for week in monthcalendar(year, month):
+        week_data = []
+        for day_num in week:
+            if day_num == 0:
+                # Day not in month
+                week_data.append(None)
+            else:
+                current_date = date(year, month, day_num)
+                week_data.append({
+                    'date': current_date,
+                    'target_hours': plan.get(current_date, 0),
+                    'logged_hours': daily_logged.get(current_date, 0),
+                    'is_today': current_date == today
+                })
+        weeks.append(week_data)
+    return weeks
@@ -1,61 +1,36 @@
 # app/dashboard/routes.py
-from datetime import date
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from calendar import monthrange
+from datetime import date, timedelta
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import current_user, login_required
 
-from app import db
+from app import db, plan_cache
 from app.dashboard import bp
-from app.models import Goal, DayOff, MonthlyWeight, DailyLog
-from app.calculations import BillableHourCalculationService
+from app.dashboard.data import dashboard_data, calendar_weeks
+from app.imports import import_time_entries
+from app.calculations.scenarios import Scenario, date_span
+from app.plans import (
+    get_planned_days, plan_year_of, request_goal_inputs, logged_hours_total, upsert_daily_logs
+)
 
 @bp.route('/')
 @login_required
 def index():
     """Display the user's dashboard."""
-    # Get the current goal
-    current_year = date.today().year
-    goal = Goal.query.filter_by(user_id=current_user.id, year=current_year).first()
+    # Get the goal and plan inputs for the current plan year
+    current_year = plan_year_of(date.today())
+    inputs = request_goal_inputs(current_user, current_year)
     
-    if not goal:
+    if not inputs:
         # Redirect to setup if no goal exists
         return render_template('dashboard/no_goal.html', year=current_year)
     
-    # Get days off
-    days_off = [day.date for day in DayOff.query.filter_by(user_id=current_user.id)]
-    
-    # Get monthly weights
-    monthly_weights_db = MonthlyWeight.query.filter_by(user_id=current_user.id, year=current_year).all()
-    monthly_weights = {mw.month: mw.weight for mw in monthly_weights_db}
-    
-    # Calculate plan
-    calculation_service = BillableHourCalculationService()
-    plan = calculation_service.generate_plan(
-        current_year, goal.total_hours, days_off, monthly_weights
-    )
-    
-    # Get monthly summary
-    monthly_summary = calculation_service.get_monthly_summary(plan)
-    
-    # Get daily logs for progress tracking
-    daily_logs = DailyLog.query.filter_by(user_id=current_user.id).all()
-    daily_progress = {log.date: log.hours_billed for log in daily_logs}
-    
-    # Calculate monthly logged hours
-    monthly_logged = {month: 0.0 for month in range(1, 13)}
-    for log in daily_logs:
-        monthly_logged[log.date.month] += log.hours_billed
-    
-    # Calculate progress metrics
-    metrics = calculation_service.calculate_progress_metrics(
-        goal.total_hours, plan, daily_progress
-    )
+    data = dashboard_data(inputs, date.today())
     
     return render_template(
         'dashboard/index.html',
-        goal=goal,
-        monthly_summary=monthly_summary,
-        monthly_logged=monthly_logged,
-        metrics=metrics
+        goal=inputs,
+        **data
     )
 
 @bp.route('/calendar')
@@ -66,59 +41,110 @@ def calendar():
     year = request.args.get('year', date.today().year, type=int)
     month = request.args.get('month', date.today().month, type=int)
     
-    # Get the goal for this year
-    goal = Goal.query.filter_by(user_id=current_user.id, year=year).first()
-    
-    if not goal:
+    # Get the goal for the plan year containing this month
+    month_start = date(year, month, 1)
+    plan_year = plan_year_of(month_start)
+    if not current_user.has_goal_for(plan_year):
         # Redirect if no goal exists
-        return render_template('dashboard/no_goal.html', year=year)
+        return render_template('dashboard/no_goal.html', year=plan_year)
     
-    # Get days off
-    days_off = [day.date for day in DayOff.query.filter_by(user_id=current_user.id)]
+    calendar_data = calendar_weeks(current_user.id, plan_year, year, month, date.today())
     
-    # Get monthly weights
-    monthly_weights_db = MonthlyWeight.query.filter_by(user_id=current_user.id, year=year).all()
-    monthly_weights = {mw.month: mw.weight for mw in monthly_weights_db}
-    
-    # Calculate plan
-    calculation_service = BillableHourCalculationService()
-    plan = calculation_service.generate_plan(
-        year, goal.total_hours, days_off, monthly_weights
-    )
-    
-    # Get daily logs for actual hours
-    daily_logs = DailyLog.query.filter_by(user_id=current_user.id).all()
-    daily_logged = {log.date: log.hours_billed for log in daily_logs}
-    
-    # Generate calendar data
-    import calendar
-    cal = calendar.monthcalendar(year, month)
-    
-    # Prepare calendar weeks
-    calendar_weeks = []
-    for week in cal:
-        week_data = []
-        for day_num in week:
-            if day_num == 0:
-                # Day not in month
-                week_data.append(None)
-            else:
-                current_date = date(year, month, day_num)
-                day_data = {
-                    'date': current_date,
-                    'target_hours': plan.get(current_date, 0),
-                    'logged_hours': daily_logged.get(current_date, 0),
-                    'is_today': current_date == date.today()
-                }
-                week_data.append(day_data)
-        calendar_weeks.append(week_data)
+    # Neighbouring months for prev/next navigation
+    prev_month = month_start - timedelta(days=1)
+    next_month = month_start + timedelta(days=monthrange(year, month)[1])
     
     return render_template(
         'dashboard/calendar.html',
         year=year,
         month=month,
-        calendar_weeks=calendar_weeks
+        calendar_weeks=calendar_data,
+        prev_month=prev_month,
+        next_month=next_month
+    )
+
+def _catch_up_suggestion(log_date):
+    """Revised upcoming targets after logging hours on log_date, or None without a goal."""
+    plan_year = plan_year_of(log_date)
+    inputs = request_goal_inputs(current_user, plan_year)
+    if not inputs:
+        return None
+    
+    # The planner only depends on the plan and today's date, so it is cached
+    # under the digest of the plan's inputs; each log just re-solves it in O(log n)
+    today = date.today()
+    planner = plan_cache.get_or_create(
+        current_user.id, plan_year, f'catch-up:{today.isoformat()}:{inputs.digest()}',
+        lambda: inputs.service().build_catch_up_planner(
+            get_planned_days(current_user.id, plan_year), today
+        )
     )
+    return planner.suggest(inputs.total_hours, logged_hours_total(current_user.id, plan_year))
+
+def _parse_scenario(data, default_hours):
+    """Build a Scenario from its JSON description (raises ValueError on bad input)."""
+    days_off = [date.fromisoformat(day) for day in data.get('days_off', [])]
+    for vacation in data.get('vacations', []):
+        days_off.extend(date_span(
+            date.fromisoformat(vacation['start']), date.fromisoformat(vacation['end'])
+        ))
+    
+    monthly_weights = {}
+    for month, weight in (data.get('monthly_weights') or {}).items():
+        month = int(month)
+        if not 1 <= month <= 12 or float(weight) < 0:
+            raise ValueError(f'invalid weight for month {month}')
+        monthly_weights[month] = float(weight)
+    
+    total_hours = float(data.get('total_hours', default_hours))
+    if total_hours < 0:
+        raise ValueError('total_hours must not be negative')
+    
+    return Scenario(total_hours, days_off, monthly_weights, data.get('label'))
+
+@bp.route('/scenarios', methods=['GET', 'POST'])
+@login_required
+def scenarios():
+    """Evaluate what-if scenarios against the current plan without changing it."""
+    year = request.args.get('year', plan_year_of(date.today()), type=int)
+    inputs = request_goal_inputs(current_user, year)
+    
+    if request.method == 'GET':
+        if not inputs:
+            return render_template('dashboard/no_goal.html', year=year)
+        return render_template('dashboard/scenarios.html', goal=inputs)
+    
+    if not inputs:
+        return jsonify({'success': False, 'error': f'No goal for {year}'}), 404
+    
+    payload = request.get_json(silent=True) or {}
+    entries = payload.get('scenarios') or []
+    if len(entries) > current_app.config['SCENARIO_MAX_BATCH']:
+        return jsonify({
+            'success': False,
+            'error': f"At most {current_app.config['SCENARIO_MAX_BATCH']} scenarios per request"
+        }), 400
+    
+    try:
+        batch = [_parse_scenario(entry, inputs.total_hours) for entry in entries]
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return jsonify({'success': False, 'error': f'Invalid scenario: {e}'}), 400
+    
+    results = inputs.service().simulate_scenarios(
+        year, batch, inputs.days_off, inputs.monthly_weights, inputs.start, inputs.end,
+        workers=current_app.config['SCENARIO_WORKERS'],
+        chunk_size=current_app.config['SCENARIO_CHUNK_SIZE'],
+        holidays=inputs.holidays, partial_days=inputs.partial_days
+    )
+    return jsonify({'success': True, 'year': year, 'results': results})
+
+@bp.route('/plan_cache')
+@login_required
+def plan_cache_stats():
+    """Return this worker's catch-up planner cache counters for sizing the cache (report admins only)."""
+    if current_user.email.lower() not in current_app.config['REPORT_ADMINS']:
+        return jsonify({'success': False, 'error': 'Cache statistics are limited to report admins'}), 403
+    return jsonify(plan_cache.stats())
 
 @bp.route('/log_hours', methods=['GET', 'POST'])
 @login_required
@@ -129,23 +155,83 @@ def log_hours():
         log_date = datetime.strptime(request.form['date'], '%Y-%m-%d').date()
         hours_billed = float(request.form['hours'])
         
-        # Check if we already have a log for this date
-        log = DailyLog.query.filter_by(user_id=current_user.id, date=log_date).first()
-        
-        if log:
-            # Update existing log
-            log.hours_billed = hours_billed
-        else:
-            # Create new log
-            log = DailyLog(
-                user_id=current_user.id,
-                date=log_date,
-                hours_billed=hours_billed
-            )
-            db.session.add(log)
+        # Insert or update atomically, so concurrent posts for a day cannot collide
+        upsert_daily_logs(current_user.id, [(log_date, hours_billed)])
         
         db.session.commit()
-        return jsonify({'success': True})
+        return jsonify({'success': True, 'catch_up': _catch_up_suggestion(log_date)})
     
     # For GET requests, return the form
-    return render_template('dashboard/log_hours.html', today=date.today())
\ No newline at end of file
+    return render_template('dashboard/log_hours.html', today=date.today())
+
+@bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_hours():
+    """Import the user's hours from a CSV export of their billing system."""
+    result = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Choose a CSV file to import.')
+            return redirect(url_for('dashboard.import_hours'))
+        
+        # The upload is spooled to disk by Werkzeug and read as a stream
+        try:
+            result = import_time_entries(upload.stream, upload.filename, user_id=current_user.id)
+        except ValueError as e:
+            flash(f'Could not import {upload.filename}: {e}')
+            return redirect(url_for('dashboard.import_hours'))
+    
+    return render_template('dashboard/import_hours.html', result=result)
+
+def _parse_log_entry(entry):
+    """Read a (date, hours) pair from a JSON log entry (raises ValueError on bad input)."""
+    if not isinstance(entry, dict):
+        raise ValueError('Entry must be an object')
+    log_date = date.fromisoformat(str(entry.get('date')))
+    hours = float(entry.get('hours'))
+    if not 0 <= hours <= 24:
+        raise ValueError('Hours must be between 0 and 24')
+    return log_date, hours
+
+@bp.route('/log_hours/batch', methods=['POST'])
+@login_required
+def log_hours_batch():
+    """Log billable hours for many days in one transaction."""
+    data = request.get_json(silent=True) or {}
+    entries = data.get('entries')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'success': False, 'error': 'Expected a non-empty list of entries'}), 400
+    
+    max_batch = current_app.config['LOG_BATCH_MAX']
+    if len(entries) > max_batch:
+        return jsonify({'success': False, 'error': f'At most {max_batch} entries per batch'}), 400
+    
+    # Validate every entry up front; only valid entries are written
+    results = []
+    valid = {}
+    for entry in entries:
+        try:
+            log_date, hours = _parse_log_entry(entry)
+        except (TypeError, ValueError) as e:
+            results.append({'date': entry.get('date') if isinstance(entry, dict) else None,
+                            'status': 'error', 'error': str(e)})
+            continue
+        if log_date in valid:
+            results.append({'date': log_date.isoformat(), 'status': 'error', 'error': 'Duplicate date in batch'})
+            continue
+        valid[log_date] = hours
+        results.append({'date': log_date.isoformat(), 'hours': hours, 'status': None})
+    
+    statuses = upsert_daily_logs(current_user.id, valid.items())
+    db.session.commit()
+    
+    for result in results:
+        if result['status'] is None:
+            result['status'] = statuses[date.fromisoformat(result['date'])]
+    
+    return jsonify({
+        'success': all(result['status'] != 'error' for result in results),
+        'results': results,
+        'catch_up': _catch_up_suggestion(max(valid)) if valid else None
+    })
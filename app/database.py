@@ -0,0 +1,128 @@
+# app/database.py
+"""Named database performance profiles: engine options and connect-time PRAGMAs per dialect."""
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+# Profile name -> dialect -> settings. SQLite profiles set PRAGMAs on every
+# new connection; PostgreSQL profiles set pool options on the engine.
+DB_PROFILES: Dict[str, Dict[str, Dict]] = {
+    # The drivers' and SQLAlchemy's defaults
+    'untuned': {},
+    # A small office: a handful of concurrent users
+    'small_office': {
+        'sqlite': {'pragmas': {
+            'journal_mode': 'WAL',      # Readers no longer block the writer, nor the writer readers
+            'synchronous': 'NORMAL',    # Safe with WAL; fsyncs at checkpoints rather than every commit
+            'busy_timeout': 5000,       # Milliseconds a writer waits for the lock before failing
+            'mmap_size': 64 * 2 ** 20,  # Read pages through a memory map
+        }},
+        'postgresql': {'engine_options': {
+            'pool_size': 5,
+            'max_overflow': 10,
+            'pool_pre_ping': True,   # Replace connections dropped by the server or a proxy
+            'pool_recycle': 1800,    # Seconds before a connection is reopened
+        }},
+    },
+    # A large firm: many concurrent users, e.g. the 9am login burst
+    'large_firm': {
+        'sqlite': {'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 15000,
+            'mmap_size': 256 * 2 ** 20,
+        }},
+        'postgresql': {'engine_options': {
+            'pool_size': 20,
+            'max_overflow': 20,
+            'pool_pre_ping': True,
+            'pool_recycle': 1800,
+            'pool_timeout': 10,      # Seconds a request waits for a free connection
+        }},
+    },
+}
+
+# PRAGMA synchronous levels as SQLite reports them
+SYNCHRONOUS_LEVELS = {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}
+
+def profile_settings(profile: str, uri: str) -> Dict:
+    """
+    The settings a profile defines for a database URI's dialect.
+
+    Raises:
+        ValueError: If the profile does not exist
+    """
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}; choose one of {', '.join(sorted(DB_PROFILES))}")
+    return DB_PROFILES[profile].get(make_url(uri).get_backend_name(), {})
+
+def apply_db_profile(app) -> None:
+    """
+    Merge the DB_PROFILE engine options into SQLALCHEMY_ENGINE_OPTIONS.
+
+    Options set explicitly in the config win. Must run before db.init_app,
+    which creates the engines.
+    """
+    settings = profile_settings(app.config.get('DB_PROFILE', 'untuned'), app.config['SQLALCHEMY_DATABASE_URI'])
+    options = dict(settings.get('engine_options', {}))
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def configure_engine(app, engine: Engine) -> None:
+    """
+    Register the DB_PROFILE PRAGMAs on an engine's new connections.
+
+    Nothing connects here: the PRAGMAs are set when the pool opens each
+    connection, and the effective settings are logged once, on the first one.
+    """
+    pragmas = profile_settings(app.config.get('DB_PROFILE', 'untuned'), str(engine.url)).get('pragmas', {})
+    if pragmas:
+        @event.listens_for(engine, 'connect')
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+            cursor.close()
+
+    @event.listens_for(engine, 'connect', once=True)
+    def log_first_connection(dbapi_connection, connection_record):
+        log_db_settings(app, engine, pragmas, _connection_settings(engine, dbapi_connection))
+
+def _connection_settings(engine: Engine, dbapi_connection) -> Dict:
+    """The settings a DB-API connection runs with (see effective_db_settings)."""
+    settings = {'dialect': engine.dialect.name, 'pool': type(engine.pool).__name__}
+    if engine.dialect.name == 'sqlite':
+        cursor = dbapi_connection.cursor()
+        for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size'):
+            row = cursor.execute(f'PRAGMA {name}').fetchone()
+            settings[name] = row[0] if row else None
+        cursor.close()
+    else:
+        settings['pool_status'] = engine.pool.status()
+    return settings
+
+def effective_db_settings(engine: Engine) -> Dict:
+    """
+    Read back the settings a connection actually runs with.
+
+    SQLite reports its PRAGMAs; other dialects report the connection pool.
+    """
+    with engine.connect() as connection:
+        return _connection_settings(engine, connection.connection.dbapi_connection)
+
+def log_db_settings(app, engine: Engine, pragmas: Dict, settings: Dict) -> None:
+    """Log the effective database settings, warning about PRAGMAs SQLite did not accept."""
+    profile = app.config.get('DB_PROFILE', 'untuned')
+    app.logger.info('Database profile %s: %s', profile, settings)
+
+    # In-memory databases have no journal file or memory map to configure
+    if make_url(str(engine.url)).database in (None, '', ':memory:'):
+        return
+    for name, value in pragmas.items():
+        expected = SYNCHRONOUS_LEVELS.get(str(value).upper(), value) if name == 'synchronous' else value
+        actual = settings.get(name)
+        if isinstance(expected, str) and isinstance(actual, str):
+            expected, actual = expected.lower(), actual.lower()
+        if actual != expected:
+            app.logger.warning('Database profile %s: PRAGMA %s is %r, not %r', profile, name, actual, expected)
@@ -0,0 +1,122 @@
+# app/events.py
+"""Database event hooks that keep derived plan data in step with user inputs."""
+from sqlalchemy import event, inspect, update
+
+from app import db, plan_cache, user_cache
+from app.models import User, Goal, DayOff, MonthlyWeight, DailyLog
+from app.plans import plan_year_of, refresh_planned_days, refresh_goal_years, forget_request_plan_inputs
+from app.rollups import refresh_log_rollups
+
+# Models whose rows are inputs to a user's plan
+PLAN_INPUT_MODELS = (Goal, DayOff, MonthlyWeight)
+
+# Models whose rows change what the dashboard and calendar show
+VERSIONED_MODELS = PLAN_INPUT_MODELS + (DailyLog,)
+
+# User columns that are inputs to all of a user's plans
+USER_PLAN_ATTRIBUTES = ('holiday_calendar', 'work_schedule')
+
+def _plan_years(obj):
+    """Return every plan year a plan-input row belongs to, before and after the change."""
+    if isinstance(obj, DayOff):
+        attribute = 'date'
+    else:
+        attribute = 'year'
+
+    history = inspect(obj).attrs[attribute].history
+    values = set(history.added) | set(history.unchanged) | set(history.deleted)
+    values.add(getattr(obj, attribute))
+
+    years = set()
+    for value in values:
+        if value is None:
+            continue
+        years.add(plan_year_of(value) if isinstance(obj, DayOff) else value)
+    return years
+
+def _log_months(obj):
+    """Return every (user_id, year, month) a DailyLog row counts towards, before and after the change."""
+    history = inspect(obj).attrs['date'].history
+    days = set(history.added) | set(history.unchanged) | set(history.deleted)
+    days.add(obj.date)
+    days.discard(None)
+    return {(user_id, day.year, day.month) for user_id in _plan_owners(obj) for day in days}
+
+def _plan_owners(obj):
+    """Return every user that owns a plan-input row, before and after the change."""
+    history = inspect(obj).attrs['user_id'].history
+    owners = set(history.added) | set(history.unchanged) | set(history.deleted)
+    owners.add(obj.user_id)
+    owners.discard(None)
+    return owners
+
+@event.listens_for(db.session, 'after_flush')
+def collect_touched_plans(session, flush_context):
+    """Record which (user_id, year) plans, log months, users and user data versions the flushed rows affect."""
+    touched = session.info.setdefault('touched_plans', set())
+    versions = session.info.setdefault('touched_versions', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            # Any change to the user row supersedes its cached identity
+            session.info.setdefault('touched_users', set()).add(obj.id)
+            if any(inspect(obj).attrs[attribute].history.has_changes() for attribute in USER_PLAN_ATTRIBUTES):
+                # A new calendar or schedule affects every plan year the user has a goal for
+                session.info.setdefault('touched_calendars', set()).add(obj.id)
+                versions.add(obj.id)
+            continue
+        if not isinstance(obj, VERSIONED_MODELS):
+            continue
+        owners = _plan_owners(obj)
+        versions.update(owners)
+        if isinstance(obj, DailyLog):
+            session.info.setdefault('touched_log_months', set()).update(_log_months(obj))
+            continue
+        if isinstance(obj, Goal):
+            session.info.setdefault('touched_goal_users', set()).update(owners)
+        for user_id in owners:
+            for year in _plan_years(obj):
+                touched.add((user_id, year))
+
+@event.listens_for(db.session, 'before_commit')
+def refresh_touched_plans(session):
+    """Rewrite materialized plans and log rollups touched by the transaction, inside it."""
+    session.flush()
+    touched = session.info.setdefault('touched_plans', set())
+    for user_id in session.info.pop('touched_calendars', set()):
+        for (year,) in session.query(Goal.year).filter_by(user_id=user_id):
+            touched.add((user_id, year))
+    
+    for user_id, year in sorted(touched):
+        refresh_planned_days(user_id, year, session)
+    
+    refresh_log_rollups(session.info.pop('touched_log_months', set()), session)
+    refresh_goal_years(session.info.pop('touched_goal_users', set()), session)
+    
+    # Bump the data version of every user whose data changed, which
+    # invalidates the ETags the JSON API handed out for their data
+    versions = session.info.pop('touched_versions', set())
+    session.info.setdefault('touched_users', set()).update(versions)
+    if versions:
+        session.execute(
+            update(User).where(User.id.in_(sorted(versions)))
+            .values(data_version=User.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_touched_plans(session):
+    """Drop cached plans, plan inputs and users written in the committed transaction."""
+    for user_id, year in session.info.pop('touched_plans', set()):
+        plan_cache.invalidate(user_id, year)
+        forget_request_plan_inputs(user_id, year)
+    user_cache.invalidate(session.info.pop('touched_users', set()))
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_touched_plans(session):
+    """Forget touched plans when the transaction is rolled back."""
+    session.info.pop('touched_plans', None)
+    session.info.pop('touched_calendars', None)
+    session.info.pop('touched_versions', None)
+    session.info.pop('touched_log_months', None)
+    session.info.pop('touched_goal_users', None)
+    session.info.pop('touched_users', None)
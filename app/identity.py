@@ -0,0 +1,109 @@
+# app/identity.py
+"""Short-lived cache of logged-in users' column values, so most requests need no identity query."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+class UserCache:
+    """
+    Bounded LRU cache of user column values keyed by user ID, with a short time-to-live.
+
+    Values are plain dictionaries rather than ORM instances, so entries can
+    be shared between threads and sessions. Writes to a user should call
+    invalidate() (see app.events); the TTL bounds how long another process
+    can serve a superseded entry.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of users kept before the least recently
+                used one is evicted
+            ttl: Seconds an entry stays valid after it was stored (0: caching off)
+            clock: Monotonic time source, replaceable for testing
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.reset_stats()
+
+    def init_app(self, app):
+        """Read cache sizing from the Flask config and register the cache on the app."""
+        self.max_entries = app.config.get('USER_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        # User IDs are only meaningful for one database
+        self.clear()
+        app.extensions['user_cache'] = self
+
+    def get(self, user_id: Hashable) -> Optional[Dict]:
+        """Return the cached values, or None if they are missing or expired."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+
+            stored_at, values = entry
+            if self._clock() - stored_at > self.ttl:
+                del self._entries[user_id]
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return None
+
+            self._entries.move_to_end(user_id)
+            self._counters['hits'] += 1
+            return values
+
+    def set(self, user_id: Hashable, values: Dict) -> None:
+        """Store a user's values, evicting the least recently used entries if full."""
+        if not self.ttl:
+            return
+        with self._lock:
+            self._entries[user_id] = (self._clock(), values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def invalidate(self, user_ids: Iterable[Hashable]) -> int:
+        """
+        Drop the cached values of the given users.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            removed = sum(self._entries.pop(user_id, None) is not None for user_id in user_ids)
+            self._counters['invalidations'] += removed
+            return removed
+
+    def clear(self) -> None:
+        """Drop every cached user (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self) -> None:
+        """Reset the hit/miss/eviction counters."""
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    def stats(self) -> Dict[str, float]:
+        """Return the cache counters along with its current size and hit rate."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+            return stats
@@ -0,0 +1,252 @@
+# app/imports.py
+"""Streaming import of time entries exported by practice-management systems."""
+import csv
+import hashlib
+import io
+from collections import defaultdict
+from datetime import date, datetime
+from functools import lru_cache
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from app import db
+from app.models import User, ImportCheckpoint
+from app.plans import upsert_log_rows
+
+# Date formats accepted in the date column, tried in order
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y')
+
+# Distinct (user, day) totals buffered before they are written and committed
+DEFAULT_CHUNK_SIZE = 5000
+
+# Rejected rows kept on the result; the rest are only counted (and passed to on_reject)
+MAX_REJECTS_KEPT = 100
+
+class ImportResult:
+    """Outcome of an import run."""
+
+    __slots__ = ('filename', 'rows_read', 'rows_imported', 'rows_rejected', 'rejected',
+                 'resumed_from', 'already_imported')
+
+    def __init__(self, filename: str = None):
+        self.filename = filename
+        self.rows_read = 0
+        self.rows_imported = 0
+        self.rows_rejected = 0
+        self.rejected: List[Tuple[int, str]] = []  # (line number, reason)
+        self.resumed_from = 0
+        self.already_imported = False
+
+def file_fingerprint(stream: BinaryIO, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a seekable binary stream, read in blocks; the stream is rewound afterwards."""
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(block_size), b''):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+@lru_cache(maxsize=4096)
+def parse_entry_date(text: str) -> date:
+    """
+    Read a date in any of DATE_FORMATS (raises ValueError otherwise).
+
+    Exports repeat the same few hundred dates, so results are cached.
+    """
+    text = text.strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Invalid date: {text!r}')
+
+def read_time_entries(
+    text: Iterator[str],
+    email_column: str = 'email',
+    date_column: str = 'date',
+    hours_column: str = 'hours'
+) -> Iterator[Tuple[int, int, Optional[str], Optional[date], Optional[float], Optional[str]]]:
+    """
+    Parse time entries from CSV text one row at a time.
+
+    Header names are matched case-insensitively; the email column is
+    optional (single-user exports).
+
+    Args:
+        text: Lines of CSV text with a header row
+        email_column: Header of the column naming the timekeeper
+        date_column: Header of the entry date column
+        hours_column: Header of the hours column
+
+    Yields:
+        (row number, line number, email, date, hours, error) for each data
+        row; error is None for valid rows and a reason otherwise
+
+    Raises:
+        ValueError: If the date or hours column is missing
+    """
+    reader = csv.reader(text)
+    header = [name.strip().lower() for name in next(reader, [])]
+    columns = {}
+    for key, name in (('email', email_column), ('date', date_column), ('hours', hours_column)):
+        if name.lower() in header:
+            columns[key] = header.index(name.lower())
+        elif key != 'email':
+            raise ValueError(f'Missing column: {name}')
+    width = max(columns.values()) + 1
+
+    for row_number, row in enumerate(reader, start=1):
+        line = reader.line_num
+        if not any(field.strip() for field in row):
+            continue
+        if len(row) < width:
+            yield row_number, line, None, None, None, 'Missing value'
+            continue
+
+        email = row[columns['email']].strip().lower() if 'email' in columns else None
+        try:
+            day = parse_entry_date(row[columns['date']])
+        except ValueError as e:
+            yield row_number, line, email, None, None, str(e)
+            continue
+        try:
+            hours = float(row[columns['hours']])
+        except ValueError:
+            yield row_number, line, email, day, None, f"Invalid hours: {row[columns['hours']]!r}"
+            continue
+        if not 0 <= hours <= 24:
+            yield row_number, line, email, day, hours, 'Hours must be between 0 and 24'
+            continue
+        yield row_number, line, email, day, hours, None
+
+def import_time_entries(
+    stream: BinaryIO,
+    filename: str = None,
+    user_id: int = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_reject: Callable[[int, str], None] = None,
+    restart: bool = False,
+    session=None,
+    **columns
+) -> ImportResult:
+    """
+    Import a CSV of time entries into DailyLog, summing entries per user and day.
+
+    The file is read as a stream: entries are aggregated per (user, day)
+    into a buffer of at most chunk_size totals, which is upserted and
+    committed together with the import's checkpoint. Memory therefore stays
+    bounded by the chunk size and the set of user-days already written,
+    whatever the number of rows. A day's first chunk replaces its DailyLog
+    hours and later chunks add to them, so a day's log ends up equal to
+    the sum of its entries in the file.
+
+    Re-running a file that crashed part way resumes after the last
+    committed chunk; re-running a completed file does nothing unless
+    restart is set.
+
+    Args:
+        stream: Seekable binary stream of UTF-8 CSV with a header row
+        filename: Name recorded on the checkpoint
+        user_id: Import every row for this user (rows naming another email
+            are rejected); None to map rows to users by email
+        chunk_size: (user, day) totals written per transaction
+        on_reject: Called with (line number, reason) for every rejected row
+        restart: Import the file from the start even if it was imported before
+        session: Session to write with (default: db.session)
+        **columns: email_column, date_column and hours_column header names
+
+    Returns:
+        ImportResult with row counts and the first rejected rows
+
+    Raises:
+        ValueError: If a required column is missing
+    """
+    session = session or db.session
+    result = ImportResult(filename)
+
+    fingerprint = file_fingerprint(stream)
+    checkpoint = session.query(ImportCheckpoint).filter_by(fingerprint=fingerprint, owner_id=user_id).first()
+    if checkpoint is None:
+        checkpoint = ImportCheckpoint(fingerprint=fingerprint, owner_id=user_id, filename=filename,
+                                      rows_done=0, rows_imported=0, rows_rejected=0, completed=False)
+        session.add(checkpoint)
+    elif restart:
+        checkpoint.rows_done = checkpoint.rows_imported = checkpoint.rows_rejected = 0
+        checkpoint.completed = False
+    elif checkpoint.completed:
+        result.already_imported = True
+        result.rows_read = checkpoint.rows_done
+        result.rows_imported = checkpoint.rows_imported
+        result.rows_rejected = checkpoint.rows_rejected
+        return result
+    result.resumed_from = checkpoint.rows_done
+    imported_before = checkpoint.rows_imported
+    rejected_before = checkpoint.rows_rejected
+
+    if user_id is None:
+        user_ids = dict(session.query(func.lower(User.email), User.id))
+    else:
+        user_ids = {session.query(func.lower(User.email)).filter_by(id=user_id).scalar(): user_id}
+
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    pending: Dict[Tuple[int, date], float] = defaultdict(float)
+    written = set()  # (user_id, day) keys committed by this import
+    last_row = 0
+
+    def reject(line, reason):
+        result.rows_rejected += 1
+        if len(result.rejected) < MAX_REJECTS_KEPT:
+            result.rejected.append((line, reason))
+        if on_reject is not None:
+            on_reject(line, reason)
+
+    def flush():
+        replace = [key for key in pending if key not in written]
+        add = [key for key in pending if key in written]
+        for keys, additive in ((replace, False), (add, True)):
+            upsert_log_rows(
+                [{'user_id': key[0], 'date': key[1], 'hours_billed': pending[key]} for key in keys],
+                add=additive, session=session
+            )
+        written.update(pending)
+        pending.clear()
+
+        checkpoint.rows_done = last_row
+        checkpoint.rows_imported = imported_before + result.rows_imported
+        checkpoint.rows_rejected = rejected_before + result.rows_rejected
+        checkpoint.updated_at = datetime.now()
+        session.commit()
+
+    try:
+        for row_number, line, email, day, hours, error in read_time_entries(text, **columns):
+            last_row = row_number
+            owner = user_ids.get(email) if user_id is None or email is not None else user_id
+            if row_number <= checkpoint.rows_done:
+                # Committed before a crash: only remember which days were written
+                if error is None and owner is not None:
+                    written.add((owner, day))
+                continue
+
+            result.rows_read += 1
+            if error is None and owner is None:
+                error = 'Unknown user' if user_id is None else 'Entry belongs to another user'
+            if error is not None:
+                reject(line, error)
+                continue
+            pending[(owner, day)] += hours
+            result.rows_imported += 1
+            if len(pending) >= chunk_size:
+                flush()
+        flush()
+        checkpoint.completed = True
+        session.commit()
+    except Exception:
+        # Chunks committed so far stay, and the checkpoint says how far they got
+        session.rollback()
+        raise
+    finally:
+        # Leave the caller's stream open
+        text.detach()
+
+    return result
@@ -1,31 +1,46 @@
 # app/models.py
 from datetime import date
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import make_transient_to_detached
 
-from app import db, login
+from app import db, login, user_cache, password_hasher
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), index=True, unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
+    holiday_calendar = db.Column(db.String(32), nullable=True)  # Name in app.calculations.holidays.CALENDARS
+    work_schedule = db.Column(db.String(64), nullable=True)  # Monday-Sunday fractions, e.g. '1,1,1,1,0.5,0,0'
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped by app.events on every data write
+    # Summary of the user's goals, kept up to date by app.events
+    setup_complete = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    goal_years = db.Column(db.String(255), nullable=True)  # Comma-separated plan years with a goal, e.g. '2025,2026'
     
     # Relationships
     goals = db.relationship('Goal', backref='user', lazy='dynamic')
     days_off = db.relationship('DayOff', backref='user', lazy='dynamic')
     monthly_weights = db.relationship('MonthlyWeight', backref='user', lazy='dynamic')
     daily_logs = db.relationship('DailyLog', backref='user', lazy='dynamic')
+    planned_days = db.relationship('PlannedDay', backref='user', lazy='dynamic')
 
     def __repr__(self):
         return f'<User {self.email}>'
 
     def set_password(self, password):
-        """Create hashed password"""
-        self.password_hash = generate_password_hash(password)
+        """Create hashed password with the configured method (see app.passwords)"""
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """Check hashed password"""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Whether the password hash was made under another hashing policy"""
+        return password_hasher.needs_rehash(self.password_hash)
+    
+    def has_goal_for(self, year):
+        """Whether the user has a goal for a plan year, without querying the goals"""
+        return str(year) in (self.goal_years or '').split(',')
 
 class Goal(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -42,7 +57,8 @@ class DayOff(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     date = db.Column(db.Date, nullable=False)
-    type = db.Column(db.String(20), nullable=True)  # 'Holiday', 'Vacation', 'Personal'
+    type = db.Column(db.String(20), nullable=True)  # 'Holiday', 'Vacation', 'Personal', 'Worked Holiday'
+    fraction = db.Column(db.Float, nullable=True)  # Share of the day taken off (None or 1.0 = whole day)
     
     __table_args__ = (db.UniqueConstraint('user_id', 'date'),)
     
@@ -63,16 +79,83 @@ class MonthlyWeight(db.Model):
 
 class DailyLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    date = db.Column(db.Date, nullable=False)
+    # Old values are loaded before a change so that both months' rollups are refreshed
+    user_id = db.column_property(db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False), active_history=True)
+    date = db.column_property(db.Column(db.Date, nullable=False), active_history=True)
     hours_billed = db.Column(db.Float, nullable=False)
     target_hours_override = db.Column(db.Float, nullable=True)
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'date'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'date'),
+        # Covers the day and month sums, which then never read the table rows
+        db.Index('ix_daily_log_user_id_date_hours_billed', 'user_id', 'date', 'hours_billed'),
+    )
     
     def __repr__(self):
         return f'<DailyLog {self.date}: {self.hours_billed} hours>'
 
+class MonthlyLogRollup(db.Model):
+    """Total logged hours and logged days per user and calendar month (kept in sync by app.events)."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)  # 1-12
+    total_hours = db.Column(db.Float, nullable=False)
+    logged_days = db.Column(db.Integer, nullable=False)
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'year', 'month'),)
+    
+    def __repr__(self):
+        return f'<MonthlyLogRollup {self.year}-{self.month:02d}: {self.total_hours} hours>'
+
+class PlannedDay(db.Model):
+    """Materialized daily target from the user's plan (kept in sync by app.events)."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    target_hours = db.Column(db.Float, nullable=False)
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'date'),)
+    
+    def __repr__(self):
+        return f'<PlannedDay {self.date}: {self.target_hours} hours>'
+
+class ImportCheckpoint(db.Model):
+    """Progress of a time entry import, committed with each chunk so a crashed import can resume."""
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(64), index=True, nullable=False)  # SHA-256 of the file
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # None for firm-wide imports
+    filename = db.Column(db.String(255), nullable=True)
+    rows_done = db.Column(db.Integer, nullable=False, default=0)  # Data rows committed so far
+    rows_imported = db.Column(db.Integer, nullable=False, default=0)
+    rows_rejected = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<ImportCheckpoint {self.filename}: {self.rows_done} rows>'
+
+# User columns kept in user_cache (the password hash is left out and loaded on demand)
+CACHED_USER_ATTRIBUTES = (
+    'id', 'email', 'holiday_calendar', 'work_schedule', 'data_version', 'setup_complete', 'goal_years'
+)
+
 @login.user_loader
 def load_user(id):
-    return User.query.get(int(id))
\ No newline at end of file
+    """
+    Load the logged-in user, answering from user_cache without a query when possible.
+    
+    Cached values are attached to the session as a clean persistent instance,
+    so the user can still be modified and lazy-loads what is not cached.
+    """
+    user_id = int(id)
+    values = user_cache.get(user_id)
+    if values is None:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            user_cache.set(user_id, {key: getattr(user, key) for key in CACHED_USER_ATTRIBUTES})
+        return user
+    
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
\ No newline at end of file
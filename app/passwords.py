@@ -0,0 +1,96 @@
+# app/passwords.py
+"""Password hashing with a per-deployment method and cost, run on a bounded worker pool."""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import lru_cache
+from typing import Callable
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# werkzeug's default method, used when PASSWORD_HASH_METHOD is not set
+DEFAULT_METHOD = 'scrypt'
+
+class PasswordHasherBusy(Exception):
+    """Raised when a hash could not be computed within the hasher's timeout."""
+
+@lru_cache(maxsize=16)
+def method_prefix(method: str) -> str:
+    """
+    The parameter prefix werkzeug stores for a method, e.g. 'scrypt' -> 'scrypt:32768:8:1'.
+
+    Computed once per method by hashing an empty password, so defaults are
+    resolved exactly as werkzeug resolves them.
+    """
+    return generate_password_hash('', method).split('$', 1)[0]
+
+class PasswordHasher:
+    """
+    Hash and verify passwords with the configured method, at most `workers` at a time.
+
+    scrypt and PBKDF2 release the GIL, so without a bound a burst of logins
+    can occupy every core while dashboard requests wait. Here hashing runs on
+    a small thread pool and callers wait up to `timeout` seconds for their
+    turn before PasswordHasherBusy is raised.
+    """
+
+    def __init__(self, method: str = DEFAULT_METHOD, workers: int = 1, timeout: float = 10.0):
+        """
+        Initialize the hasher.
+
+        Args:
+            method: werkzeug method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'
+            workers: Hashes computed concurrently (0: in the calling thread)
+            timeout: Seconds a caller waits for a worker and its hash
+        """
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def init_app(self, app):
+        """Read the hashing policy from the Flask config and register the hasher on the app."""
+        self.method = app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_METHOD
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self.shutdown()
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password: str) -> str:
+        """Hash a password with the configured method."""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        """Check a password against a stored hash, whatever method it was made with."""
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """Whether a stored hash was made with another method or cost than the configured one."""
+        return pwhash.split('$', 1)[0] != method_prefix(self.method)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool (a new one is started on the next hash)."""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _run(self, func: Callable, *args):
+        """Run func(*args) on the pool and wait for its result."""
+        if not self.workers:
+            return func(*args)
+
+        with self._lock:
+            # A forked worker process inherits the object but not the threads
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+                self._pid = os.getpid()
+            future = self._executor.submit(func, *args)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy(f'No password hash within {self.timeout} seconds') from None
@@ -0,0 +1,531 @@
+# app/plans.py
+"""Materialized per-day plans stored in the PlannedDay table."""
+from datetime import date
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from flask import current_app, g, has_request_context
+from sqlalchemy import Date, Float, Integer, String, bindparam, func, insert, literal, null, select, type_coerce, union_all, update
+from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.models import User, Goal, DayOff, MonthlyWeight, PlannedDay, DailyLog, MonthlyLogRollup
+from app.calculations import BillableHourCalculationService, DailyPlan, PlanCache
+from app.calculations.holidays import CALENDARS, get_calendar
+from app.calculations.workdays import fiscal_year_bounds, fiscal_year_of, parse_workweek, to_day_array
+
+# Targets closer than this are treated as unchanged
+TARGET_TOLERANCE = 1e-9
+
+# Kinds of row returned by the combined plan-input query
+_DAY_OFF_ROW, _WEIGHT_ROW, _USER_ROW = 0, 1, 2
+
+# DayOff type marking a calendar holiday the user works
+WORKED_HOLIDAY = 'Worked Holiday'
+
+# DayOff type of firm holidays entered per user, which holiday calendars replace
+HOLIDAY = 'Holiday'
+
+# INSERT constructs supporting ON CONFLICT DO UPDATE, by dialect name
+UPSERT_DIALECTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+def plan_year_bounds(year: int) -> Tuple[date, date]:
+    """First and last day of a plan year under the configured fiscal year start."""
+    return fiscal_year_bounds(year, current_app.config.get('FISCAL_YEAR_START_MONTH', 1))
+
+def plan_year_of(day: date) -> int:
+    """The plan year a date belongs to under the configured fiscal year start."""
+    return fiscal_year_of(day, current_app.config.get('FISCAL_YEAR_START_MONTH', 1))
+
+def changed_months(stored: Mapping[date, float], plan: Mapping[date, float]) -> Set[int]:
+    """
+    Work out which months of a plan have to be rewritten.
+
+    Monthly allocation is proportional to each month's share of the year's
+    weighted workdays, so any change to one month's weighted workday count
+    (a day off on a workday, a new weight on a month with workdays) shifts
+    every month and needs a whole-year rewrite. Changes that keep every
+    month's weighted count, such as a day off on a weekend, moving a day off
+    within its month or re-saving an unchanged weight, only touch the months
+    whose dates differ, or none at all.
+
+    Args:
+        stored: Currently materialized targets by date
+        plan: Freshly computed targets by date
+
+    Returns:
+        Set of month numbers (1-12) whose rows differ
+    """
+    months = set()
+    for day in stored.keys() ^ plan.keys():
+        months.add(day.month)
+
+    for day, hours in plan.items():
+        if day.month in months or day not in stored:
+            continue
+        if abs(stored[day] - hours) > TARGET_TOLERANCE:
+            months.add(day.month)
+
+    return months
+
+def load_planned_days(user_id: int, start: date, end: date, session=None) -> DailyPlan:
+    """Read materialized targets for a date range with a single indexed range scan."""
+    session = session or db.session
+    rows = session.query(PlannedDay.date, PlannedDay.target_hours).filter(
+        PlannedDay.user_id == user_id,
+        PlannedDay.date >= start,
+        PlannedDay.date <= end
+    )
+    return DailyPlan.from_items(rows, start, end)
+
+class PlanInputs:
+    """Everything a user's plan for one plan year is generated from."""
+
+    __slots__ = ('user_id', 'year', 'start', 'end', 'total_hours', 'days_off',
+                 'partial_days', 'monthly_weights', 'holidays', 'workweek')
+
+    def __init__(self, user_id: int, year: int, total_hours: Optional[float],
+                 days_off: List[date], partial_days: Dict[date, float],
+                 monthly_weights: Dict[int, float], holidays: Optional[np.ndarray],
+                 workweek: Tuple[float, ...]):
+        self.user_id = user_id
+        self.year = year
+        self.start, self.end = plan_year_bounds(year)
+        self.total_hours = total_hours
+        self.days_off = days_off
+        self.partial_days = partial_days
+        self.monthly_weights = monthly_weights
+        self.holidays = holidays
+        self.workweek = workweek
+
+    @property
+    def has_goal(self) -> bool:
+        """Whether the user has a goal for the plan year."""
+        return self.total_hours is not None
+
+    def service(self) -> BillableHourCalculationService:
+        """A calculation service for the user's work schedule."""
+        return BillableHourCalculationService(workweek=self.workweek)
+    
+    def digest(self) -> str:
+        """PlanCache digest of every input, including the service's daily cap and work schedule."""
+        service = self.service()
+        return PlanCache.make_digest(
+            self.year, self.total_hours or 0, self.days_off, self.monthly_weights,
+            service.max_daily_hours, service.workweek, self.holidays, self.partial_days,
+            self.start, self.end
+        )
+
+    def generate(self, window: Tuple[date, date] = None) -> DailyPlan:
+        """Generate the plan (empty when the user has no goal for the year)."""
+        if not self.has_goal:
+            return DailyPlan.from_items([], self.start, self.end)
+        return self.service().generate_plan_range(
+            self.start, self.end, self.total_hours, self.days_off, self.monthly_weights,
+            window, holidays=self.holidays, partial_days=self.partial_days
+        )
+
+def _plan_input_rows(user_id: int, year: int):
+    """
+    One UNION ALL over the user's days off, monthly weights and user row (with the goal).
+
+    Rows are (kind, date, text, text, number, month); unused columns are NULL.
+    """
+    start, end = plan_year_bounds(year)
+    no_date = type_coerce(null(), Date)
+    no_text = type_coerce(null(), String)
+    no_number = type_coerce(null(), Float)
+    no_month = type_coerce(null(), Integer)
+    goal_hours = select(Goal.total_hours).where(Goal.user_id == user_id, Goal.year == year).scalar_subquery()
+    return union_all(
+        select(literal(_DAY_OFF_ROW), DayOff.date, DayOff.type, no_text, DayOff.fraction, no_month).where(
+            DayOff.user_id == user_id, DayOff.date >= start, DayOff.date <= end
+        ),
+        select(literal(_WEIGHT_ROW), no_date, no_text, no_text, MonthlyWeight.weight, MonthlyWeight.month).where(
+            MonthlyWeight.user_id == user_id, MonthlyWeight.year == year
+        ),
+        select(literal(_USER_ROW), no_date, User.holiday_calendar, User.work_schedule, goal_hours, no_month).where(
+            User.id == user_id
+        )
+    )
+
+def load_plan_inputs(user_id: int, year: int, session=None) -> PlanInputs:
+    """
+    Load the goal, days off, weights, holidays and schedule behind a user's plan for a plan year.
+
+    Everything is read with a single statement, so a plan costs one round
+    trip however its inputs are spread across tables. Holidays come from the
+    user's shared holiday calendar; DayOff rows only hold personal exceptions.
+    A 'Worked Holiday' row takes a calendar holiday back as a workday, and
+    only then is the shared holiday array copied. DayOff rows with a fraction
+    below 1 are partial days rather than days off.
+
+    Raises:
+        NoResultFound: If the user does not exist
+    """
+    session = session or db.session
+    start, end = plan_year_bounds(year)
+    
+    user_row = None
+    days_off = []
+    partial_days = {}
+    worked_holidays = []
+    monthly_weights = {}
+    for kind, day, text, schedule, number, month in session.execute(_plan_input_rows(user_id, year)):
+        if kind == _USER_ROW:
+            user_row = (text, schedule, number)
+        elif kind == _WEIGHT_ROW:
+            monthly_weights[month] = number
+        elif text == WORKED_HOLIDAY:
+            worked_holidays.append(day)
+        elif number is not None and number < 1:
+            partial_days[day] = number
+        else:
+            days_off.append(day)
+    if user_row is None:
+        raise NoResultFound(f'No user with id {user_id}')
+    calendar_name, work_schedule, total_hours = user_row
+    
+    holiday_calendar = get_calendar(calendar_name)
+    holidays = None
+    if holiday_calendar is not None:
+        holidays = holiday_calendar.day_array(start, end)
+        if worked_holidays:
+            holidays = np.setdiff1d(holidays, to_day_array(worked_holidays))
+    
+    return PlanInputs(
+        user_id, year, total_hours, days_off, partial_days, monthly_weights,
+        holidays, parse_workweek(work_schedule)
+    )
+
+def request_plan_inputs(user_id: int, year: int) -> PlanInputs:
+    """
+    load_plan_inputs, memoized on flask.g for the rest of the request.
+
+    Views, API handlers and helpers that need the same user's goal or plan
+    inputs share one read. Entries are dropped when a commit touches the
+    plan (see app.events), so a request that writes and then reads again
+    sees its own changes. Outside a request nothing is memoized. The result
+    is shared; do not modify it.
+    """
+    if not has_request_context():
+        return load_plan_inputs(user_id, year)
+    memo = g.setdefault('plan_inputs', {})
+    key = (user_id, year)
+    if key not in memo:
+        memo[key] = load_plan_inputs(user_id, year)
+    return memo[key]
+
+def request_goal_inputs(user, year: int) -> Optional[PlanInputs]:
+    """
+    request_plan_inputs for a plan year the user has a goal for, else None.
+
+    The user's goal years answer the no-goal case without a query.
+    """
+    if not user.has_goal_for(year):
+        return None
+    inputs = request_plan_inputs(user.id, year)
+    return inputs if inputs.has_goal else None
+
+def forget_request_plan_inputs(user_id: int, year: int) -> None:
+    """Drop a memoized request_plan_inputs entry, if any."""
+    if has_request_context():
+        g.get('plan_inputs', {}).pop((user_id, year), None)
+
+def clear_request_plan_inputs(exc=None) -> None:
+    """Drop every memoized request_plan_inputs entry (registered as a teardown_request handler)."""
+    g.pop('plan_inputs', None)
+
+def refresh_planned_days(user_id: int, year: int, session=None) -> Set[int]:
+    """
+    Bring a user's materialized plan for a year in line with their inputs.
+
+    Only the months whose targets changed are deleted and re-inserted; the
+    caller is responsible for committing.
+
+    Returns:
+        Set of month numbers (1-12) that were rewritten
+    """
+    session = session or db.session
+    start, end = plan_year_bounds(year)
+
+    plan = load_plan_inputs(user_id, year, session).generate()
+
+    stored = load_planned_days(user_id, start, end, session)
+    months = changed_months(stored, plan)
+    if not months:
+        return months
+
+    if len(months) == 12:
+        session.query(PlannedDay).filter(
+            PlannedDay.user_id == user_id,
+            PlannedDay.date >= start,
+            PlannedDay.date <= end
+        ).delete(synchronize_session=False)
+    else:
+        for month in months:
+            # A plan year covers twelve consecutive months, so each month number
+            # maps to exactly one calendar month inside it
+            month_year = start.year if month >= start.month else start.year + 1
+            month_start = date(month_year, month, 1)
+            month_end = date(month_year + 1, 1, 1) if month == 12 else date(month_year, month + 1, 1)
+            session.query(PlannedDay).filter(
+                PlannedDay.user_id == user_id,
+                PlannedDay.date >= month_start,
+                PlannedDay.date < month_end
+            ).delete(synchronize_session=False)
+
+    rows = [
+        {'user_id': user_id, 'date': day, 'target_hours': hours}
+        for day, hours in plan.items() if day.month in months
+    ]
+    if rows:
+        session.execute(insert(PlannedDay), rows)
+
+    return months
+
+def refresh_goal_years(user_ids: Iterable[int], session=None) -> None:
+    """
+    Recompute the goal_years and setup_complete summary of the given users from their goals.
+
+    The caller is responsible for committing.
+    """
+    session = session or db.session
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    
+    years = {user_id: [] for user_id in user_ids}
+    for user_id, year in session.query(Goal.user_id, Goal.year).filter(Goal.user_id.in_(user_ids)).order_by(
+        Goal.user_id, Goal.year  # The order of the unique (user_id, year) index, so no sort is needed
+    ):
+        years[user_id].append(str(year))
+    
+    table = User.__table__
+    session.execute(
+        update(table).where(table.c.id == bindparam('user_key')).values(
+            goal_years=bindparam('goal_years'), setup_complete=bindparam('setup_complete')
+        ),
+        [
+            {'user_key': user_id, 'goal_years': ','.join(goals) or None, 'setup_complete': bool(goals)}
+            for user_id, goals in years.items()
+        ]
+    )
+
+def subscribe_holiday_calendar(user: User, calendar_name: str = None, session=None) -> Optional[Tuple[str, int, int]]:
+    """
+    Move a user's per-user 'Holiday' days off onto a shared holiday calendar, keeping their plans unchanged.
+
+    Holiday rows the calendar provides are deleted. Calendar holidays in the
+    user's goal years that the user did not take off get a 'Worked Holiday'
+    row, so every existing plan keeps its targets. The caller is responsible
+    for committing.
+
+    Args:
+        user: User without a holiday calendar
+        calendar_name: Calendar to subscribe to (default: the one matching
+            most of the user's holiday rows)
+        session: Session to write with (default: db.session)
+
+    Returns:
+        (calendar name, holiday rows deleted, worked holiday rows added), or
+        None if the user was left alone: already subscribed, without holiday
+        rows or a matching calendar, or with a partial day on a calendar
+        holiday (which the calendar would turn into a whole day off)
+    """
+    session = session or db.session
+    if user.holiday_calendar is not None:
+        return None
+    days_off = {day_off.date: day_off for day_off in session.query(DayOff).filter(DayOff.user_id == user.id)}
+    holiday_rows = {
+        day: day_off for day, day_off in days_off.items()
+        if day_off.type == HOLIDAY and (day_off.fraction is None or day_off.fraction >= 1)
+    }
+    if not holiday_rows:
+        return None
+    
+    def calendar_days(holiday_calendar, years):
+        return {day for year in years for day in holiday_calendar.dates(year)}
+    
+    holiday_years = {day.year for day in holiday_rows}
+    if calendar_name is None:
+        # Most holidays matched, then fewest calendar holidays the user did not take
+        scores = {}
+        for name, holiday_calendar in CALENDARS.items():
+            days = calendar_days(holiday_calendar, holiday_years)
+            scores[name] = (len(days & holiday_rows.keys()), -len(days - holiday_rows.keys()))
+        calendar_name = max(sorted(scores), key=scores.get)
+        if not scores[calendar_name][0]:
+            return None
+    holiday_calendar = CALENDARS[calendar_name]
+    
+    # Calendar holidays within the plan years the user has goals for
+    goal_holidays = set()
+    for (year,) in session.query(Goal.year).filter(Goal.user_id == user.id):
+        start, end = plan_year_bounds(year)
+        goal_holidays.update(holiday_calendar.day_array(start, end).tolist())
+    if any(
+        day in goal_holidays and day_off.fraction is not None and day_off.fraction < 1
+        for day, day_off in days_off.items()
+    ):
+        return None
+    
+    provided = calendar_days(holiday_calendar, holiday_years) & holiday_rows.keys()
+    for day in provided:
+        session.delete(holiday_rows[day])
+    worked = sorted(goal_holidays - days_off.keys())
+    session.add_all([DayOff(user_id=user.id, date=day, type=WORKED_HOLIDAY) for day in worked])
+    user.holiday_calendar = calendar_name
+    return calendar_name, len(provided), len(worked)
+
+def has_planned_days(user_id: int, start: date, end: date, session=None) -> bool:
+    """Whether any targets are materialized between two dates."""
+    session = session or db.session
+    return session.query(session.query(PlannedDay).filter(
+        PlannedDay.user_id == user_id,
+        PlannedDay.date >= start,
+        PlannedDay.date <= end
+    ).exists()).scalar()
+
+def get_planned_days(user_id: int, year: int, start: date = None, end: date = None) -> DailyPlan:
+    """
+    Return a user's daily targets for a plan year, or a window of it.
+
+    Plans that were never materialized (e.g. created before the PlannedDay
+    table existed) are materialized on first read. A window with no targets
+    (e.g. a month entirely off) only costs an existence check once the year
+    is materialized, so month-by-month reads never regenerate the year.
+    """
+    year_start, year_end = plan_year_bounds(year)
+    start = start or year_start
+    end = end or year_end
+
+    plan = load_planned_days(user_id, start, end)
+    if plan or has_planned_days(user_id, year_start, year_end):
+        return plan
+    if refresh_planned_days(user_id, year):
+        db.session.commit()
+        plan = load_planned_days(user_id, start, end)
+    return plan
+
+def _plan_year_rollups(user_id: int, year: int, session):
+    """Query of a user's MonthlyLogRollup rows within a plan year."""
+    start, end = plan_year_bounds(year)
+    ordinal = MonthlyLogRollup.year * 12 + MonthlyLogRollup.month
+    return session.query(MonthlyLogRollup).filter(
+        MonthlyLogRollup.user_id == user_id,
+        ordinal >= start.year * 12 + start.month,
+        ordinal <= end.year * 12 + end.month
+    )
+
+def logged_hours_total(user_id: int, year: int, session=None) -> float:
+    """Total hours a user has logged within a plan year, read from the monthly rollups."""
+    session = session or db.session
+    total = _plan_year_rollups(user_id, year, session).with_entities(
+        func.sum(MonthlyLogRollup.total_hours)
+    ).scalar()
+    return total or 0.0
+
+def logged_hours_by_month(user_id: int, year: int, session=None) -> Dict[int, float]:
+    """Hours logged per month number (1-12) within a plan year, read from the monthly rollups."""
+    session = session or db.session
+    rows = _plan_year_rollups(user_id, year, session).with_entities(
+        MonthlyLogRollup.month, MonthlyLogRollup.total_hours
+    )
+    
+    totals = {month: 0.0 for month in range(1, 13)}
+    for month_number, hours in rows:
+        totals[month_number] = hours
+    return totals
+
+def logged_hours_by_day(user_id: int, start: date, end: date, session=None) -> Dict[date, float]:
+    """Hours logged per day between two dates (inclusive), read as plain (date, hours) rows."""
+    session = session or db.session
+    return dict(session.query(DailyLog.date, DailyLog.hours_billed).filter(
+        DailyLog.user_id == user_id,
+        DailyLog.date >= start,
+        DailyLog.date <= end
+    ))
+
+def upsert_log_rows(rows: Sequence[Dict], add: bool = False, session=None) -> None:
+    """
+    Write DailyLog rows for any number of users with a single upsert statement.
+
+    Uses the dialect's native upsert (INSERT ... ON CONFLICT on SQLite and
+    PostgreSQL), so concurrent writers of the same day cannot collide on the
+    (user_id, date) unique constraint. Other dialects fall back to
+    read-then-write. The caller is responsible for committing.
+
+    Args:
+        rows: Dictionaries with user_id, date and hours_billed; each
+            (user_id, date) may appear only once
+        add: Add hours_billed to an existing log instead of replacing it
+        session: Session to write with (default: db.session)
+    """
+    session = session or db.session
+    rows = list(rows)
+    if not rows:
+        return
+
+    dialect = session.get_bind().dialect.name
+    if dialect in UPSERT_DIALECTS:
+        # One statement run with executemany, so it is compiled once and cached
+        table = DailyLog.__table__
+        stmt = UPSERT_DIALECTS[dialect](table)
+        hours = stmt.excluded.hours_billed
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.date],
+            set_={'hours_billed': table.c.hours_billed + hours if add else hours}
+        ), rows)
+    else:
+        keys = {(row['user_id'], row['date']) for row in rows}
+        logs = {
+            (log.user_id, log.date): log for log in session.query(DailyLog).filter(
+                DailyLog.user_id.in_({user_id for user_id, _ in keys}),
+                DailyLog.date.in_({day for _, day in keys})
+            )
+        }
+        for row in rows:
+            log = logs.get((row['user_id'], row['date']))
+            if log is None:
+                session.add(DailyLog(**row))
+            elif add:
+                log.hours_billed += row['hours_billed']
+            else:
+                log.hours_billed = row['hours_billed']
+
+    # Core statements skip the flush hooks, so tell app.events directly
+    session.info.setdefault('touched_versions', set()).update(row['user_id'] for row in rows)
+    session.info.setdefault('touched_log_months', set()).update(
+        (row['user_id'], row['date'].year, row['date'].month) for row in rows
+    )
+
+def upsert_daily_logs(user_id: int, entries: Sequence[Tuple[date, float]], session=None) -> Dict[date, str]:
+    """
+    Write one user's logged hours for many days atomically (see upsert_log_rows).
+
+    Args:
+        user_id: ID of the user
+        entries: (date, hours) pairs with distinct dates
+        session: Session to write with (default: db.session)
+
+    Returns:
+        Dictionary with date as key and 'created' or 'updated' as value
+    """
+    session = session or db.session
+    entries = list(entries)
+    if not entries:
+        return {}
+
+    days = [day for day, _ in entries]
+    existing = {
+        day for (day,) in session.query(DailyLog.date).filter(
+            DailyLog.user_id == user_id, DailyLog.date.in_(days)
+        )
+    }
+    upsert_log_rows(
+        [{'user_id': user_id, 'date': day, 'hours_billed': hours} for day, hours in entries],
+        session=session
+    )
+    return {day: 'updated' if day in existing else 'created' for day in days}
@@ -0,0 +1,180 @@
+# app/query_audit.py
+"""Capture the SQL statements a workload issues and flag full scans and temporary B-trees in their plans."""
+import io
+import logging
+import os
+import re
+import traceback
+import unittest
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Statements are attributed to the innermost frame in this package
+APP_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Test modules that exercise the routes, audited by default
+ROUTE_TESTS = (
+    'tests/test_api.py', 'tests/testt_dashbaord_views.py', 'tests/test_identity.py', 'tests/test_imports.py',
+    'tests/test_passwords.py', 'tests/test_reports.py',
+)
+
+# Statements that read or write rows; DDL, PRAGMAs and transaction control are not explained
+EXPLAINED_STATEMENTS = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|INSERT\b.*\bSELECT\b)', re.IGNORECASE | re.DOTALL)
+
+# SQLite: 'SCAN daily_log' (or 'SCAN TABLE daily_log' before 3.36), but not scans of
+# a subquery's or CTE's result or of the single row of a query without FROM
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW)(?!\()(\w+)')
+SQLITE_TEMP_BTREE = re.compile(r'^USE TEMP B-TREE FOR (.+)')
+
+# PostgreSQL: 'Seq Scan on daily_log' and sorts that no index provides
+POSTGRESQL_SCAN = re.compile(r'Seq Scan on (\w+)')
+POSTGRESQL_SORT = re.compile(r'->\s+Sort\b|^Sort\b')
+
+class AuditedStatement:
+    """A distinct statement, how often it ran, where it came from, its query plan and what the audit flagged in it."""
+
+    __slots__ = ('statement', 'count', 'origin', 'plan', 'findings')
+
+    def __init__(self, statement: str, origin: str, plan: List[str], findings: List[str]):
+        self.statement = statement
+        self.count = 0
+        self.origin = origin  # 'app/plans.py:123 (load_planned_days)', or None if not run by app code
+        self.plan = plan
+        self.findings = findings
+
+def normalize(statement: str) -> str:
+    """Collapse whitespace, so that the same statement built twice is audited once."""
+    return ' '.join(statement.split())
+
+def statement_origin() -> str:
+    """
+    The innermost app frame that ran the current statement, as 'app/module.py:line (function)'.
+
+    Returns None for statements the workload (e.g. a test's own assertions) ran directly.
+    """
+    # Skip this function's and the listener's frames; stop at the frame that started the workload
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = os.path.abspath(frame.filename)
+        if filename == os.path.abspath(__file__):
+            return None
+        if filename.startswith(APP_DIRECTORY + os.sep):
+            return f'{os.path.relpath(filename, os.path.dirname(APP_DIRECTORY))}:{frame.lineno} ({frame.name})'
+    return None
+
+def explain(cursor, dialect: str, statement: str, parameters) -> List[str]:
+    """
+    The query plan of a statement, one line per plan step.
+
+    Args:
+        cursor: DB-API cursor on the connection the statement ran on
+        dialect: SQLAlchemy dialect name ('sqlite' or 'postgresql')
+        statement: SQL as sent to the driver
+        parameters: Parameters as sent to the driver (the first set of an executemany)
+    """
+    if dialect == 'sqlite':
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    # EXPLAIN without ANALYZE plans the statement without running it
+    cursor.execute('EXPLAIN ' + statement, parameters)
+    return [row[0] for row in cursor.fetchall()]
+
+def plan_findings(dialect: str, plan: Iterable[str]) -> List[str]:
+    """Full table scans and sorts or groupings that need a temporary B-tree, as found in a plan."""
+    findings = []
+    for step in plan:
+        step = step.strip()
+        if dialect == 'sqlite':
+            scan = SQLITE_SCAN.match(step)
+            if scan:
+                using = ' using a covering index' if 'COVERING INDEX' in step else ''
+                findings.append(f'full scan of {scan.group(1)}{using}')
+            temp = SQLITE_TEMP_BTREE.match(step)
+            if temp:
+                findings.append(f'temp B-tree for {temp.group(1).lower()}')
+        else:
+            scan = POSTGRESQL_SCAN.search(step)
+            if scan:
+                findings.append(f'full scan of {scan.group(1)}')
+            if POSTGRESQL_SORT.search(step):
+                findings.append('sort without an index')
+    return findings
+
+class QueryAudit:
+    """
+    Record and explain every statement run on any engine while the audit is active.
+
+    Each distinct statement is explained once, on the connection it first ran
+    on and with the parameters it ran with, so the plan reflects the schema
+    and indexes of the database the workload actually used.
+    """
+
+    def __init__(self):
+        self.statements: Dict[str, AuditedStatement] = {}
+        self.errors: Dict[str, str] = {}  # Statement -> why it could not be explained
+
+    def __enter__(self):
+        event.listen(Engine, 'after_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(Engine, 'after_cursor_execute', self._record)
+
+    @property
+    def flagged(self) -> List[AuditedStatement]:
+        """Statements with findings, the most frequently run first."""
+        return sorted((s for s in self.statements.values() if s.findings), key=lambda s: -s.count)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        """after_cursor_execute listener: count the statement, explaining it the first time."""
+        if not EXPLAINED_STATEMENTS.match(statement):
+            return
+        key = normalize(statement)
+        audited = self.statements.get(key)
+        if audited is None:
+            if executemany:
+                parameters = parameters[0] if parameters else ()
+            dialect = conn.dialect.name
+            explain_cursor = cursor.connection.cursor()
+            try:
+                plan = explain(explain_cursor, dialect, statement, parameters)
+            except Exception as e:
+                # E.g. a driver that cannot EXPLAIN this statement; report it rather than fail the workload
+                self.errors[key] = str(e)
+                return
+            finally:
+                explain_cursor.close()
+            audited = self.statements[key] = AuditedStatement(
+                key, statement_origin(), plan, plan_findings(dialect, plan)
+            )
+        audited.count += 1
+
+def run_tests(paths: Iterable[str]) -> unittest.TestResult:
+    """Run unittest modules (file paths) quietly and return their result."""
+    suite = unittest.TestSuite()
+    for path in paths:
+        directory, filename = os.path.split(os.path.abspath(path))
+        suite.addTests(unittest.defaultTestLoader.discover(directory, pattern=filename, top_level_dir=directory))
+    return unittest.TextTestRunner(stream=io.StringIO(), verbosity=0).run(suite)
+
+def audit_tests(paths: Iterable[str] = ROUTE_TESTS) -> Tuple[QueryAudit, unittest.TestResult]:
+    """
+    Audit every statement the given test modules issue.
+
+    The tests configure their own in-memory SQLite database, so the audit
+    never touches the configured one.
+
+    Returns:
+        The audit and the test result (failed tests leave statements unaudited)
+    """
+    # Every test's app logs its database settings on its first connection
+    logger = logging.getLogger('app')
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        with QueryAudit() as audit:
+            result = run_tests(paths)
+    finally:
+        logger.setLevel(level)
+    return audit, result
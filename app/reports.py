@@ -0,0 +1,117 @@
+# app/reports.py
+"""Streaming exports of daily plan targets against logged hours."""
+import csv
+import io
+import json
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, Sequence, Tuple
+
+from app import db
+from app.models import User
+from app.plans import (
+    plan_year_bounds, plan_year_of, load_planned_days, has_planned_days, load_plan_inputs,
+    logged_hours_by_day
+)
+
+# Columns of every report row
+REPORT_COLUMNS = ('email', 'date', 'target_hours', 'logged_hours')
+
+# Users fetched per round trip while streaming
+USER_BATCH_SIZE = 100
+
+# Approximate characters buffered before a chunk of output is yielded
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+def iter_report_rows(
+    start: date,
+    end: date,
+    user_ids: Sequence[int] = None,
+    session=None
+) -> Iterator[Tuple[str, date, float, float]]:
+    """
+    Yield one row per user and day with a target or logged hours, in user then date order.
+
+    Users are streamed from the database in batches and each user's plan
+    is only read when their rows are reached, one plan year at a time, so
+    memory holds at most one user-year however many are exported. Plans
+    that were never materialized are generated in memory without being
+    written.
+
+    Args:
+        start: First day to export
+        end: Last day to export (inclusive)
+        user_ids: Users to export (default: everyone)
+        session: Session to read with (default: db.session)
+
+    Yields:
+        (email, date, target hours, logged hours)
+    """
+    session = session or db.session
+    users = session.query(User.id, User.email).order_by(User.id)
+    if user_ids is not None:
+        users = users.filter(User.id.in_(user_ids))
+
+    years = range(plan_year_of(start), plan_year_of(end) + 1)
+    for user_id, email in users.execution_options(yield_per=USER_BATCH_SIZE):
+        for year in years:
+            year_start, year_end = plan_year_bounds(year)
+            window_start, window_end = max(start, year_start), min(end, year_end)
+
+            plan = load_planned_days(user_id, window_start, window_end, session)
+            if not plan and not has_planned_days(user_id, year_start, year_end, session):
+                plan = load_plan_inputs(user_id, year, session).generate((window_start, window_end))
+            logged = logged_hours_by_day(user_id, window_start, window_end, session)
+
+            for day in sorted(set(plan).union(logged)):
+                yield email, day, plan.get(day, 0.0), logged.get(day, 0.0)
+
+def _chunked(lines: Iterable[str]) -> Iterator[str]:
+    """Join small lines into chunks of about OUTPUT_CHUNK_SIZE characters."""
+    chunk = []
+    size = 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= OUTPUT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield ''.join(chunk)
+
+def csv_lines(rows: Iterable[Tuple[str, date, float, float]]) -> Iterator[str]:
+    """Render report rows as CSV text with a header, in chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    def lines():
+        yield line(REPORT_COLUMNS)
+        for email, day, target_hours, logged_hours in rows:
+            yield line((email, day.isoformat(), round(target_hours, 4), round(logged_hours, 4)))
+
+    return _chunked(lines())
+
+def jsonl_lines(rows: Iterable[Tuple[str, date, float, float]]) -> Iterator[str]:
+    """Render report rows as JSON Lines, in chunks."""
+    return _chunked(
+        json.dumps({
+            'email': email,
+            'date': day.isoformat(),
+            'target_hours': round(target_hours, 4),
+            'logged_hours': round(logged_hours, 4)
+        }) + '\n'
+        for email, day, target_hours, logged_hours in rows
+    )
+
+# Export format name -> (mimetype, renderer)
+FORMATS: Dict[str, Tuple[str, Callable]] = {
+    'csv': ('text/csv', csv_lines),
+    'jsonl': ('application/x-ndjson', jsonl_lines),
+}
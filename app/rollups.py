@@ -0,0 +1,138 @@
+# app/rollups.py
+"""Monthly totals of logged hours, maintained alongside DailyLog (see app.events)."""
+from calendar import monthrange
+from datetime import date
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import Integer, cast, extract, func, insert, select, tuple_
+
+from app import db
+from app.models import DailyLog, MonthlyLogRollup
+from app.plans import UPSERT_DIALECTS
+
+# Rollup totals closer than this are treated as equal when verifying
+ROLLUP_TOLERANCE = 1e-6
+
+# (user_id, year, month)
+MonthKey = Tuple[int, int, int]
+
+def _aggregate(user_ids: Iterable[int] = None, start: date = None, end: date = None):
+    """SELECT of (user_id, year, month, total_hours, logged_days) from DailyLog, grouped by month."""
+    year = cast(extract('year', DailyLog.date), Integer)
+    month = cast(extract('month', DailyLog.date), Integer)
+    query = select(
+        DailyLog.user_id, year, month, func.sum(DailyLog.hours_billed), func.count(DailyLog.id)
+    ).group_by(DailyLog.user_id, year, month)
+    if user_ids is not None:
+        query = query.where(DailyLog.user_id.in_(sorted(set(user_ids))))
+    if start is not None:
+        query = query.where(DailyLog.date >= start, DailyLog.date <= end)
+    return query
+
+def _write_rollups(rows: List[Dict], session) -> None:
+    """Insert or replace rollup rows (dictionaries with every rollup column)."""
+    if not rows:
+        return
+    table = MonthlyLogRollup.__table__
+    dialect = session.get_bind().dialect.name
+    if dialect in UPSERT_DIALECTS:
+        stmt = UPSERT_DIALECTS[dialect](table)
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.year, table.c.month],
+            set_={'total_hours': stmt.excluded.total_hours, 'logged_days': stmt.excluded.logged_days}
+        ), rows)
+    else:
+        _delete_rollups([(row['user_id'], row['year'], row['month']) for row in rows], session)
+        session.execute(insert(table), rows)
+
+def _delete_rollups(keys: Sequence[MonthKey], session) -> None:
+    """Delete the rollup rows of the given months."""
+    if keys:
+        session.query(MonthlyLogRollup).filter(
+            tuple_(MonthlyLogRollup.user_id, MonthlyLogRollup.year, MonthlyLogRollup.month).in_(keys)
+        ).delete(synchronize_session=False)
+
+def refresh_log_rollups(keys: Iterable[MonthKey], session=None) -> None:
+    """
+    Recompute the rollup rows of the given months from DailyLog.
+
+    All months are summed by one grouped query over the touched users and
+    date span, then written with one upsert; months left without logs lose
+    their row. The caller is responsible for committing.
+
+    Args:
+        keys: (user_id, year, month) of every month whose logs changed
+        session: Session to write with (default: db.session)
+    """
+    session = session or db.session
+    keys = set(keys)
+    if not keys:
+        return
+
+    first_year, first_month = min((year, month) for _, year, month in keys)
+    last_year, last_month = max((year, month) for _, year, month in keys)
+    start = date(first_year, first_month, 1)
+    end = date(last_year, last_month, monthrange(last_year, last_month)[1])
+
+    rows = []
+    for user_id, year, month, total_hours, logged_days in session.execute(
+        _aggregate({key[0] for key in keys}, start, end)
+    ):
+        if (user_id, year, month) in keys:
+            rows.append({'user_id': user_id, 'year': year, 'month': month,
+                         'total_hours': total_hours or 0.0, 'logged_days': logged_days})
+
+    _write_rollups(rows, session)
+    _delete_rollups(sorted(keys - {(row['user_id'], row['year'], row['month']) for row in rows}), session)
+
+def rebuild_log_rollups(user_ids: Sequence[int] = None, session=None) -> int:
+    """
+    Replace the rollup rows of the given users (default: everyone) with fresh totals.
+
+    The caller is responsible for committing.
+
+    Returns:
+        Number of rollup rows written
+    """
+    session = session or db.session
+    query = session.query(MonthlyLogRollup)
+    if user_ids is not None:
+        query = query.filter(MonthlyLogRollup.user_id.in_(user_ids))
+    query.delete(synchronize_session=False)
+
+    result = session.execute(insert(MonthlyLogRollup.__table__).from_select(
+        ['user_id', 'year', 'month', 'total_hours', 'logged_days'], _aggregate(user_ids)
+    ))
+    return result.rowcount
+
+def verify_log_rollups(user_ids: Sequence[int] = None, session=None) -> List[Dict]:
+    """
+    Compare the rollup rows of the given users (default: everyone) with DailyLog.
+
+    Returns:
+        One dictionary per drifted month with user_id, year, month and the
+        expected and stored (total_hours, logged_days), None when missing
+    """
+    session = session or db.session
+    expected = {
+        (user_id, year, month): (total_hours or 0.0, logged_days)
+        for user_id, year, month, total_hours, logged_days in session.execute(_aggregate(user_ids))
+    }
+    query = session.query(
+        MonthlyLogRollup.user_id, MonthlyLogRollup.year, MonthlyLogRollup.month,
+        MonthlyLogRollup.total_hours, MonthlyLogRollup.logged_days
+    )
+    if user_ids is not None:
+        query = query.filter(MonthlyLogRollup.user_id.in_(user_ids))
+    stored = {(user_id, year, month): (total_hours, logged_days)
+              for user_id, year, month, total_hours, logged_days in query}
+
+    drift = []
+    for key in sorted(set(expected) | set(stored)):
+        want, have = expected.get(key), stored.get(key)
+        if want is not None and have is not None and (
+            abs(want[0] - have[0]) <= ROLLUP_TOLERANCE and want[1] == have[1]
+        ):
+            continue
+        drift.append({'user_id': key[0], 'year': key[1], 'month': key[2], 'expected': want, 'stored': have})
+    return drift
@@ -4,18 +4,29 @@ from flask_wtf import FlaskForm
 from wtforms import IntegerField, DateField, SelectField, FloatField, SubmitField, FieldList, FormField, StringField
 from wtforms.validators import DataRequired, NumberRange, Optional
 
+from app.calculations.holidays import calendar_choices
+
 class GoalForm(FlaskForm):
     year = IntegerField('Year', validators=[DataRequired(), NumberRange(min=2000, max=2100)], 
                         default=date.today().year)
     total_hours = IntegerField('Annual Billable Hour Goal', 
                                validators=[DataRequired(), NumberRange(min=0, max=4000)])
+    work_schedule = SelectField('Work Schedule', choices=[
+        ('', 'Full time (Monday to Friday)'),
+        ('1,1,1,1,0.5,0,0', 'Half-day Fridays'),
+        ('1,1,1,1,0,0,0', '80% (Monday to Thursday)'),
+        ('0.8,0.8,0.8,0.8,0.8,0,0', '80% (shorter days)'),
+    ], default='')
     submit = SubmitField('Next')
 
 class DayOffSubForm(FlaskForm):
     date = DateField('Date', validators=[DataRequired()])
     day_type = StringField('Day Type', validators=[DataRequired()])
+    fraction = FloatField('Share of Day Off', validators=[Optional(), NumberRange(min=0.1, max=1.0)],
+                          default=1.0)
 
 class DaysOffForm(FlaskForm):
+    holiday_calendar = SelectField('Firm Holidays', choices=calendar_choices(), default='us_firm')
     days_off = FieldList(FormField(DayOffSubForm), min_entries=1)
     add_day = SubmitField('Add Another Day')
     submit = SubmitField('Next')
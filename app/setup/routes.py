@@ -11,7 +11,7 @@ from app.models import Goal, DayOff, MonthlyWeight
 @login_required
 def wizard():
     # Check if user already has goals set up
-    if current_user.goals.first() and 'setup_step' not in session:
+    if current_user.setup_complete and 'setup_step' not in session:
         flash('You have already completed the setup process.')
         return redirect(url_for('main.index'))
     
@@ -25,6 +25,7 @@ def wizard():
             # Store data in session
             session['setup_year'] = form.year.data
             session['setup_total_hours'] = form.total_hours.data
+            session['setup_work_schedule'] = form.work_schedule.data or None
             session['setup_step'] = 2  # Move to next step
             return redirect(url_for('setup.wizard'))
         
@@ -46,11 +47,13 @@ def wizard():
             for day_off_form in form.days_off:
                 day_off = {
                     'date': day_off_form.date.data.strftime('%Y-%m-%d'),
-                    'type': day_off_form.type.data
+                    'type': day_off_form.day_type.data,
+                    'fraction': day_off_form.fraction.data
                 }
                 days_off_data.append(day_off)
             
             session['setup_days_off'] = days_off_data
+            session['setup_holiday_calendar'] = form.holiday_calendar.data or None
             session['setup_step'] = 3  # Move to next step
             return redirect(url_for('setup.wizard'))
         
@@ -75,10 +78,15 @@ def wizard():
                 day_off = DayOff(
                     user_id=current_user.id,
                     date=date.fromisoformat(day_off_data['date']),
-                    type=day_off_data['type']
+                    type=day_off_data['type'],
+                    fraction=day_off_data.get('fraction')
                 )
                 db.session.add(day_off)
             
+            # Subscribe to the shared holiday calendar and save the work schedule
+            current_user.holiday_calendar = session.get('setup_holiday_calendar')
+            current_user.work_schedule = session.get('setup_work_schedule')
+            
             # Save Monthly Weights
             months = [
                 form.january.data, form.february.data, form.march.data, 
@@ -104,6 +112,8 @@ def wizard():
             session.pop('setup_year', None)
             session.pop('setup_total_hours', None)
             session.pop('setup_days_off', None)
+            session.pop('setup_holiday_calendar', None)
+            session.pop('setup_work_schedule', None)
             
             flash('Setup completed successfully!')
             return redirect(url_for('main.index'))
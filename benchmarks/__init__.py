@@ -0,0 +1,103 @@
+"""
+Performance benchmarks with a stored baseline and regression budgets.
+
+Each suite module exposes SUITE (its name) and run(), which returns a
+dictionary of stage name -> result, where a result holds the best wall time
+over the repeats ('seconds'), the number of operations timed ('ops') and
+the derived cost per operation ('per_op_us'). Stages are only compared
+with a baseline taken at the same size, since batched stages get cheaper
+per operation as the batch grows.
+
+Run `python -m benchmarks --help` for the command line.
+"""
+import json
+import os
+import platform
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+BUDGETS_FILE = os.path.join(BENCHMARK_DIR, 'budgets.json')
+
+# Allowed slowdown (current / baseline per-op time) for stages without their own budget
+DEFAULT_BUDGET = 1.5
+
+def measure(func: Callable[[], object], ops: int, repeat: int = 5) -> Dict[str, float]:
+    """
+    Time a callable and keep the best of several runs.
+
+    Args:
+        func: Work to time; called once per repeat
+        ops: Number of operations (users, rows, queries...) one call performs
+        repeat: Number of timed calls
+
+    Returns:
+        Dictionary with seconds, ops and per_op_us
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return {'seconds': best, 'ops': ops, 'per_op_us': best / max(ops, 1) * 1e6}
+
+def environment() -> Dict[str, str]:
+    """Describe the machine a run was made on, stored alongside the baseline."""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'system': platform.system()
+    }
+
+def load_json(path: str) -> Dict:
+    """Read a JSON file, returning an empty dictionary when it doesn't exist."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_baseline(results: Dict[str, Dict[str, Dict]], path: str = BASELINE_FILE) -> None:
+    """
+    Merge suite results into the baseline file.
+
+    Suites that were not run keep their previous baseline.
+    """
+    baseline = load_json(path)
+    baseline.setdefault('suites', {}).update(results)
+    baseline['environment'] = environment()
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def check_regressions(results: Dict[str, Dict[str, Dict]], baseline: Dict, budgets: Dict) -> List[Dict]:
+    """
+    Compare results with the baseline under the configured budgets.
+
+    Budgets are ratios of current to baseline per-op time, looked up as
+    budgets['stages']['<suite>.<stage>'], then budgets['default'].
+    Stages missing from the baseline, or measured with a different number
+    of ops, are not checked.
+
+    Returns:
+        One dictionary per stage over budget with stage, ratio and budget
+    """
+    default = budgets.get('default', DEFAULT_BUDGET)
+    stage_budgets = budgets.get('stages', {})
+    failures = []
+
+    for suite, stages in results.items():
+        reference = baseline.get('suites', {}).get(suite, {})
+        for stage, result in stages.items():
+            if stage not in reference or reference[stage]['ops'] != result['ops']:
+                continue
+            name = f'{suite}.{stage}'
+            budget = stage_budgets.get(name, default)
+            ratio = result['per_op_us'] / max(reference[stage]['per_op_us'], 1e-9)
+            if ratio > budget:
+                failures.append({'stage': name, 'ratio': ratio, 'budget': budget})
+
+    return failures
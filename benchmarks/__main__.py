@@ -0,0 +1,66 @@
+"""
+Command line for the benchmark suites.
+
+    python -m benchmarks                   # run and print every suite
+    python -m benchmarks --save            # run and store the results as the baseline
+    python -m benchmarks --check           # exit 1 if a stage is slower than its budget
+    python -m benchmarks calculations --users 50   # quick run of one suite
+    python -m benchmarks imports           # import throughput (ops are CSV rows)
+    python -m benchmarks logins            # password hashing cost per login
+    python -m benchmarks database          # concurrent hour logging per database profile
+"""
+import argparse
+import json
+import sys
+
+from benchmarks import BASELINE_FILE, BUDGETS_FILE, load_json, save_baseline, check_regressions
+from benchmarks import calculations, database, imports, logins
+
+SUITES = {module.SUITE: module for module in (calculations, database, imports, logins)}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('suites', nargs='*', help=f"Suites to run: {', '.join(sorted(SUITES))} (default: all)")
+    parser.add_argument('--users', type=int, default=200, help='Synthetic users per suite')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per stage')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for synthetic data')
+    parser.add_argument('--save', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--check', action='store_true', help='Fail when a stage exceeds its budget')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='Baseline file')
+    parser.add_argument('--budgets', default=BUDGETS_FILE, help='Budgets file')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suite: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name in args.suites or sorted(SUITES):
+        results[name] = SUITES[name].run(args.users, args.repeat, args.seed)
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        for suite, stages in results.items():
+            for stage, result in stages.items():
+                errors = f", {result['errors']} errors" if 'errors' in result else ''
+                print(f"{suite}.{stage:<28} {result['seconds'] * 1000:10.2f} ms "
+                      f"{result['per_op_us']:12.1f} us/op {result['ops'] / result['seconds']:12,.0f} ops/s "
+                      f"({result['ops']} ops{errors})")
+
+    status = 0
+    if args.check:
+        failures = check_regressions(results, load_json(args.baseline), load_json(args.budgets))
+        for failure in failures:
+            print(f"REGRESSION {failure['stage']}: {failure['ratio']:.2f}x baseline "
+                  f"(budget {failure['budget']:.2f}x)", file=sys.stderr)
+        status = 1 if failures else 0
+
+    if args.save:
+        save_baseline(results, args.baseline)
+
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Benchmarks for app.calculations: each stage of plan generation and progress tracking."""
+from collections import defaultdict
+from datetime import date
+from typing import Dict
+
+from app.calculations.workdays import get_workdays_by_month, get_workday_dates_by_month, WorkdayIndex
+from app.calculations.distribution import distribute_hours_by_month, calculate_daily_targets
+from app.calculations.service import BillableHourCalculationService
+from benchmarks import measure
+from benchmarks.synthetic import make_users
+
+SUITE = 'calculations'
+
+def run(num_users: int = 200, repeat: int = 5, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Time every calculation stage over the same synthetic users.
+
+    Stages:
+        workdays: workday counts and dates by month
+        workday_index: WorkdayIndex over the user's year
+        distribution: monthly allocation from precomputed workdays
+        daily_targets: capped daily targets from precomputed allocations
+        generate_plan: the whole single-user pipeline
+        generate_plan_multi_year: a three-year generate_plan_range
+        progress_metrics: calculate_progress_metrics with a fresh index
+        progress_metrics_indexed: calculate_progress_metrics reusing the plan's index
+        generate_plans_bulk: all users at once, one bulk call per year
+
+    Args:
+        num_users: Number of synthetic users
+        repeat: Timed runs per stage (the best is kept)
+        seed: Random seed for the synthetic users
+
+    Returns:
+        Dictionary of stage name -> measure() result, with users as ops
+    """
+    users = make_users(num_users, seed)
+    service = BillableHourCalculationService()
+    results = {}
+
+    counts = [get_workdays_by_month(user.year, user.days_off) for user in users]
+    dates = [get_workday_dates_by_month(user.year, user.days_off) for user in users]
+    allocations = [
+        distribute_hours_by_month(user.total_hours, count, user.monthly_weights)
+        for user, count in zip(users, counts)
+    ]
+    plans = [
+        service.generate_plan(user.year, user.total_hours, user.days_off, user.monthly_weights)
+        for user in users
+    ]
+
+    def workdays():
+        for user in users:
+            get_workdays_by_month(user.year, user.days_off)
+            get_workday_dates_by_month(user.year, user.days_off)
+
+    def workday_index():
+        for user in users:
+            WorkdayIndex(date(user.year, 1, 1), date(user.year, 12, 31), user.days_off)
+
+    def distribution():
+        for user, count in zip(users, counts):
+            distribute_hours_by_month(user.total_hours, count, user.monthly_weights)
+
+    def daily_targets():
+        for allocation, workday_dates in zip(allocations, dates):
+            calculate_daily_targets(allocation, workday_dates, service.max_daily_hours)
+
+    def generate_plan():
+        for user in users:
+            service.generate_plan(user.year, user.total_hours, user.days_off, user.monthly_weights)
+
+    def generate_plan_multi_year():
+        for user in users:
+            service.generate_plan_range(
+                date(user.year, 1, 1), date(user.year + 2, 12, 31),
+                user.total_hours * 3, user.days_off, user.monthly_weights
+            )
+
+    def progress_metrics():
+        for user, plan in zip(users, plans):
+            # A fresh DailyPlan view has no index yet, so it is rebuilt each time
+            service.calculate_progress_metrics(
+                user.total_hours, plan.window(plan.start, plan.end), user.logged_hours, user.today
+            )
+
+    def progress_metrics_indexed():
+        for user, plan in zip(users, plans):
+            service.calculate_progress_metrics(user.total_hours, plan, user.logged_hours, user.today)
+
+    by_year = defaultdict(list)
+    for user in users:
+        by_year[user.year].append(user)
+
+    def generate_plans_bulk():
+        for year, group in by_year.items():
+            service.generate_plans_bulk(
+                year,
+                [user.total_hours for user in group],
+                [user.days_off for user in group],
+                [user.monthly_weights for user in group]
+            )
+
+    stages = [
+        workdays, workday_index, distribution, daily_targets, generate_plan,
+        generate_plan_multi_year, progress_metrics, progress_metrics_indexed, generate_plans_bulk
+    ]
+    for stage in stages:
+        results[stage.__name__] = measure(stage, num_users, repeat)
+
+    return results
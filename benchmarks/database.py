@@ -0,0 +1,147 @@
+"""
+Concurrent hour logging on SQLite under each database profile (app.database.DB_PROFILES).
+
+Writer threads post to /dashboard/log_hours while reader threads refresh
+the calendar, as a small office does at the end of a day. In SQLite's
+default rollback-journal mode a writer cannot commit while any reader holds
+its shared lock, so writers back off in SQLite's busy handler (sleeping up
+to 100 ms at a time) until the readers are done, and every commit pays a
+full fsync. With WAL, readers and the writer proceed independently.
+"""
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date
+from typing import Dict
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.calculations.workdays import get_workdays_in_year
+from app.models import User, Goal
+from app.plans import plan_year_of
+from benchmarks import measure
+from config import Config
+
+SUITE = 'database'
+
+# Profiles compared
+PROFILES = ('untuned', 'small_office')
+
+# Concurrent writer threads, each logging its own user's days
+WRITERS = 4
+
+# Concurrent reader threads, refreshing their user's calendar until the writers finish
+READERS = 4
+
+PASSWORD = 'password'
+
+def _config(profile: str, path: str):
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        DB_PROFILE = profile
+        WTF_CSRF_ENABLED = False
+        PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'  # Logins are not what is timed
+    return BenchmarkConfig
+
+def run_profile(profile: str, days_per_writer: int, repeat: int) -> Dict:
+    """
+    Time WRITERS threads each logging days_per_writer days through the route
+    while READERS threads keep loading the calendar.
+
+    Returns:
+        measure() result with the writes of one run as ops, plus 'errors':
+        requests that failed over all runs (e.g. 'database is locked')
+    """
+    directory = tempfile.mkdtemp(prefix='benchmark-db-')
+    try:
+        app = create_app(_config(profile, os.path.join(directory, 'app.db')))
+        with app.app_context():
+            db.create_all()
+            pwhash = generate_password_hash(PASSWORD, app.config['PASSWORD_HASH_METHOD'])
+            db.session.execute(insert(User), [
+                {'email': f'user{user}@example.com', 'password_hash': pwhash, 'data_version': 0}
+                for user in range(WRITERS + READERS)
+            ])
+            year = plan_year_of(date.today())
+            for user in range(WRITERS + READERS):
+                db.session.add(Goal(user_id=user + 1, year=year, total_hours=1800))
+            db.session.commit()  # Materializes the plans
+            db.session.remove()
+
+        days = [day.isoformat() for day in get_workdays_in_year(date.today().year)][:days_per_writer]
+        clients = []
+        for user in range(WRITERS + READERS):
+            client = app.test_client()
+            client.post('/auth/login', data={'email': f'user{user}@example.com', 'password': PASSWORD})
+            clients.append(client)
+        writers, readers = clients[:WRITERS], clients[WRITERS:]
+
+        errors = []
+        writing = threading.Event()
+
+        def write(client, hours):
+            for day in days:
+                try:
+                    response = client.post('/dashboard/log_hours', data={'date': day, 'hours': hours})
+                    ok = response.status_code == 200
+                except Exception:
+                    ok = False
+                if not ok:
+                    errors.append(day)
+
+        def read(client):
+            while writing.is_set():
+                try:
+                    ok = client.get('/dashboard/calendar').status_code == 200
+                except Exception:
+                    ok = False
+                if not ok:
+                    errors.append('read')
+
+        attempt = [0]
+
+        def log_concurrently():
+            attempt[0] += 1
+            writing.set()
+            reader_threads = [threading.Thread(target=read, args=(client,)) for client in readers]
+            writer_threads = [
+                threading.Thread(target=write, args=(client, 6.0 + attempt[0] / 10)) for client in writers
+            ]
+            for thread in reader_threads + writer_threads:
+                thread.start()
+            for thread in writer_threads:
+                thread.join()
+            writing.clear()
+            for thread in reader_threads:
+                thread.join()
+
+        result = measure(log_concurrently, WRITERS * len(days), repeat)
+        result['errors'] = len(errors)
+        with app.app_context():
+            db.engine.dispose()
+        return result
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def run(num_users: int = 200, repeat: int = 5, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Compare concurrent log_hours throughput across PROFILES on a file-backed SQLite database.
+
+    Stages:
+        log_hours_<profile>: WRITERS threads posting num_users / WRITERS days
+            each through the route alongside READERS calendar readers, with
+            the profile's PRAGMAs
+
+    Args:
+        num_users: Total days logged per run, spread over the writers
+        repeat: Timed runs per stage (the best is kept)
+        seed: Unused
+
+    Returns:
+        Dictionary of stage name -> measure() result, with writes as ops
+    """
+    days_per_writer = max(1, num_users // WRITERS)
+    return {f'log_hours_{profile}': run_profile(profile, days_per_writer, repeat) for profile in PROFILES}
@@ -0,0 +1,88 @@
+"""Throughput of the streaming time entry import (app.imports), in rows per second."""
+import io
+from typing import Dict
+
+import numpy as np
+from sqlalchemy import insert
+
+from app import create_app, db
+from app.calculations.workdays import get_workdays_in_year
+from app.imports import import_time_entries, read_time_entries
+from app.models import User
+from benchmarks import measure
+from config import Config
+
+SUITE = 'imports'
+
+# Time entries per user and workday in the synthetic export
+ENTRIES_PER_DAY = 3
+
+class BenchmarkConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+def make_export(num_users: int, seed: int = 0, year: int = 2025) -> bytes:
+    """
+    A practice-management style CSV export: several entries per user and workday.
+
+    Rows are grouped by matter rather than by day, so a user's entries for
+    one day are spread through the file as in real exports.
+    """
+    rng = np.random.default_rng(seed)
+    workdays = [day.isoformat() for day in get_workdays_in_year(year)]
+    lines = ['Timekeeper Email,Date,Hours,Matter']
+    for user in range(num_users):
+        for matter in range(ENTRIES_PER_DAY):
+            hours = np.round(rng.uniform(0.1, 4.0, len(workdays)), 1)
+            lines.extend(
+                f'user{user}@example.com,{day},{hours[i]},M-{matter}'
+                for i, day in enumerate(workdays)
+            )
+    return ('\n'.join(lines) + '\n').encode()
+
+def run(num_users: int = 200, repeat: int = 5, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Time parsing and importing one synthetic firm-year export.
+
+    Stages:
+        parse: CSV parsing and validation only
+        import: the whole import into a fresh in-memory SQLite database,
+            including its chunked upserts and checkpoint commits
+
+    Args:
+        num_users: Number of timekeepers in the export
+        repeat: Timed runs per stage (the best is kept)
+        seed: Random seed for the export
+
+    Returns:
+        Dictionary of stage name -> measure() result, with rows as ops
+    """
+    export = make_export(num_users, seed)
+    rows = export.count(b'\n') - 1
+    results = {}
+
+    def parse():
+        for _ in read_time_entries(io.StringIO(export.decode())):
+            pass
+
+    results['parse'] = measure(parse, rows, repeat)
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        users = [
+            {'email': f'user{user}@example.com', 'password_hash': 'x', 'data_version': 0}
+            for user in range(num_users)
+        ]
+
+        def import_export():
+            db.drop_all()
+            db.create_all()
+            db.session.execute(insert(User), users)
+            db.session.commit()
+            result = import_time_entries(io.BytesIO(export), 'benchmark.csv', email_column='Timekeeper Email')
+            assert result.rows_imported == rows
+
+        results['import'] = measure(import_export, rows, repeat)
+        db.session.remove()
+        db.drop_all()
+
+    return results
@@ -0,0 +1,111 @@
+"""
+Cost of password hashing per login, for choosing PASSWORD_HASH_METHOD.
+
+Every stage is dominated by one deliberately slow hash per login, so the
+per-op time is the CPU a login costs and 1 / per-op time is the logins per
+second one core sustains. Halving the work factor roughly doubles login
+throughput and halves an attacker's cost per guess.
+"""
+from typing import Dict
+
+from sqlalchemy import insert, update
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app import create_app, db
+from app.models import User
+from benchmarks import measure
+from config import Config
+
+SUITE = 'logins'
+
+# Stage suffix -> werkzeug method
+METHODS = {
+    'scrypt_n32k': 'scrypt:32768:8:1',  # werkzeug's default
+    'scrypt_n16k': 'scrypt:16384:8:1',
+    'pbkdf2_600k': 'pbkdf2:sha256:600000',
+    'pbkdf2_100k': 'pbkdf2:sha256:100000',
+}
+
+# Method stored hashes are made with before the rehash_login stage moves them to the configured one
+PREVIOUS_METHOD = 'pbkdf2:sha256:100000'
+
+# Synthetic users per login timed (hashing is too slow to time one login per user)
+USERS_PER_LOGIN = 40
+
+# Hashes are slow and their timings stable, so fewer repeats are needed
+MAX_REPEAT = 3
+
+PASSWORD = 'correct horse battery staple'
+
+class BenchmarkConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+    PASSWORD_HASH_METHOD = METHODS['scrypt_n32k']
+    PASSWORD_HASH_WORKERS = 1
+
+def run(num_users: int = 200, repeat: int = 5, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Time password verification per method and whole logins through the login route.
+
+    Stages:
+        verify_<method>: check_password_hash alone, for each of METHODS
+        login: POST /auth/login with the werkzeug default method, including
+            the user lookup, the hasher's worker pool and the session cookie
+        rehash_login: the first login after the policy changed from
+            PREVIOUS_METHOD, which verifies the old hash, writes a new one
+            and commits
+
+    Args:
+        num_users: Scales the number of logins (num_users / USERS_PER_LOGIN)
+        repeat: Timed runs per stage (the best is kept), at most MAX_REPEAT
+        seed: Unused; hashes are salted randomly
+
+    Returns:
+        Dictionary of stage name -> measure() result, with logins as ops
+    """
+    logins = max(1, num_users // USERS_PER_LOGIN)
+    repeat = max(1, min(repeat, MAX_REPEAT))
+    results = {}
+
+    for name, method in METHODS.items():
+        pwhash = generate_password_hash(PASSWORD, method)
+
+        def verify():
+            for _ in range(logins):
+                assert check_password_hash(pwhash, PASSWORD)
+
+        results[f'verify_{name}'] = measure(verify, logins, repeat)
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+        current_hash = generate_password_hash(PASSWORD, BenchmarkConfig.PASSWORD_HASH_METHOD)
+        previous_hash = generate_password_hash(PASSWORD, PREVIOUS_METHOD)
+        db.session.execute(insert(User), [
+            {'email': f'user{user}@example.com', 'password_hash': current_hash, 'data_version': 0,
+             'setup_complete': True}
+            for user in range(logins)
+        ])
+        db.session.commit()
+        client = app.test_client()
+
+        def login_all():
+            for user in range(logins):
+                response = client.post('/auth/login', data={
+                    'email': f'user{user}@example.com', 'password': PASSWORD
+                })
+                assert response.status_code == 302
+                client.get('/auth/logout')
+
+        results['login'] = measure(login_all, logins, repeat)
+
+        def rehash_all():
+            db.session.execute(update(User).values(password_hash=previous_hash))
+            db.session.commit()
+            login_all()
+
+        results['rehash_login'] = measure(rehash_all, logins, repeat)
+        db.session.remove()
+        db.drop_all()
+
+    return results
@@ -0,0 +1,63 @@
+"""Reproducible synthetic users for benchmarks."""
+from datetime import date, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+from app.calculations.workdays import get_workdays_in_year
+
+class SyntheticUser:
+    """Plan inputs and logged hours of one made-up attorney."""
+
+    __slots__ = ('year', 'total_hours', 'days_off', 'monthly_weights', 'logged_hours', 'today')
+
+    def __init__(self, year: int, total_hours: float, days_off: List[date],
+                 monthly_weights: Dict[int, float], logged_hours: Dict[date, float], today: date):
+        self.year = year
+        self.total_hours = total_hours
+        self.days_off = days_off
+        self.monthly_weights = monthly_weights
+        self.logged_hours = logged_hours
+        self.today = today
+
+def make_users(count: int, seed: int = 0, years=(2024, 2025, 2026, 2027)) -> List[SyntheticUser]:
+    """
+    Generate users with varied goals, 0-60 days off, skewed weights and partial logs.
+
+    Args:
+        count: Number of users
+        seed: Random seed, so every run benchmarks the same inputs
+        years: Plan years users are spread over
+
+    Returns:
+        List of SyntheticUser
+    """
+    rng = np.random.default_rng(seed)
+    workdays_by_year = {year: get_workdays_in_year(year) for year in years}
+    users = []
+
+    for _ in range(count):
+        year = int(rng.choice(years))
+        workdays = workdays_by_year[year]
+
+        picks = rng.choice(len(workdays), size=int(rng.integers(0, 61)), replace=False)
+        days_off = sorted(workdays[i] for i in picks)
+
+        # Lognormal weights give a few strongly skewed months per user
+        skewed = rng.choice(12, size=int(rng.integers(0, 7)), replace=False)
+        monthly_weights = {
+            int(month) + 1: float(np.clip(rng.lognormal(0.0, 0.35), 0.3, 2.5)) for month in skewed
+        }
+
+        # Logs up to a random day of the year, roughly on plan with noise
+        today = date(year, 1, 1) + timedelta(days=int(rng.integers(30, 360)))
+        off = set(days_off)
+        logged_days = [day for day in workdays if day <= today and day not in off]
+        hours = np.clip(rng.normal(7.5, 1.5, size=len(logged_days)), 0, 14).tolist()
+
+        users.append(SyntheticUser(
+            year, float(rng.integers(1200, 2401)), days_off, monthly_weights,
+            dict(zip(logged_days, hours)), today
+        ))
+
+    return users
@@ -17,4 +17,49 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db')
     # Disable modification tracking to save resources, unless needed
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Performance profile in app.database.DB_PROFILES: 'untuned', 'small_office'
+    # or 'large_firm'. Sets SQLite PRAGMAs (WAL, synchronous, busy_timeout,
+    # mmap_size) or PostgreSQL pool options; SQLALCHEMY_ENGINE_OPTIONS override it.
+    DB_PROFILE = os.environ.get('DB_PROFILE') or 'small_office'
+
+    # Plan cache sizing (number of cached catch-up planners and their lifetime in
+    # seconds); the plans themselves are stored in the PlannedDay table
+    PLAN_CACHE_MAX_ENTRIES = int(os.environ.get('PLAN_CACHE_MAX_ENTRIES') or 1024)
+    PLAN_CACHE_TTL = int(os.environ.get('PLAN_CACHE_TTL') or 3600)
+
+    # Logged-in user cache (number of users and their lifetime in seconds, 0 = off).
+    # Writes invalidate entries in the same process; with several worker
+    # processes, other workers may see a user's goal years up to
+    # USER_CACHE_TTL seconds late (API ETags read the data version fresh).
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES') or 10000)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 30)
+
+    # Password hashing: werkzeug method and cost (e.g. 'scrypt:32768:8:1' or
+    # 'pbkdf2:sha256:600000'; default: werkzeug's scrypt), hashes computed at
+    # once, and seconds a login waits for one. Stored hashes are rewritten
+    # with the configured method on the user's next successful login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or None
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or max(1, (os.cpu_count() or 2) // 2))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT') or 10)
+
+    # First calendar month of the plan year (1 = calendar years, 10 = October-September).
+    # Fiscal years are named after the calendar year they end in.
+    FISCAL_YEAR_START_MONTH = int(os.environ.get('FISCAL_YEAR_START_MONTH') or 1)
+
+    # What-if scenarios: largest batch accepted per request, and worker
+    # processes used for batches of more than SCENARIO_CHUNK_SIZE (0 = in-process)
+    SCENARIO_MAX_BATCH = int(os.environ.get('SCENARIO_MAX_BATCH') or 5000)
+    SCENARIO_CHUNK_SIZE = int(os.environ.get('SCENARIO_CHUNK_SIZE') or 1000)
+    SCENARIO_WORKERS = int(os.environ.get('SCENARIO_WORKERS') or 0)
+
+    # Largest number of days accepted by one batch hour-logging request
+    LOG_BATCH_MAX = int(os.environ.get('LOG_BATCH_MAX') or 366)
+
+    # Longest date range, in days, accepted by one report export request (one plan year)
+    EXPORT_MAX_DAYS = int(os.environ.get('EXPORT_MAX_DAYS') or 366)
+
+    # Emails of users allowed to export every user's report (comma-separated)
+    REPORT_ADMINS = [
+        email.strip().lower() for email in (os.environ.get('REPORT_ADMINS') or '').split(',') if email.strip()
+    ]
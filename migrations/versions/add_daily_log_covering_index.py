@@ -0,0 +1,26 @@
+"""Add a covering index on daily_log (user_id, date, hours_billed)
+
+Revision ID: add_daily_log_covering_index
+Revises: add_user_goal_summary
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_daily_log_covering_index'
+down_revision = 'add_user_goal_summary'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('daily_log', schema=None) as batch_op:
+        batch_op.create_index('ix_daily_log_user_id_date_hours_billed', ['user_id', 'date', 'hours_billed'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('daily_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_daily_log_user_id_date_hours_billed')
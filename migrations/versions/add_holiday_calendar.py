@@ -0,0 +1,26 @@
+"""Add user.holiday_calendar
+
+Revision ID: add_holiday_calendar
+Revises: add_planned_day
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_holiday_calendar'
+down_revision = 'add_planned_day'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('holiday_calendar', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('holiday_calendar')
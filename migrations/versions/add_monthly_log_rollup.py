@@ -0,0 +1,49 @@
+"""Add monthly_log_rollup table and fill it from daily_log
+
+Revision ID: add_monthly_log_rollup
+Revises: add_import_checkpoint
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_monthly_log_rollup'
+down_revision = 'add_import_checkpoint'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    rollup = op.create_table('monthly_log_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('total_hours', sa.Float(), nullable=False),
+    sa.Column('logged_days', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'year', 'month')
+    )
+
+    daily_log = sa.table('daily_log',
+        sa.column('id', sa.Integer()),
+        sa.column('user_id', sa.Integer()),
+        sa.column('date', sa.Date()),
+        sa.column('hours_billed', sa.Float())
+    )
+    year = sa.cast(sa.extract('year', daily_log.c.date), sa.Integer())
+    month = sa.cast(sa.extract('month', daily_log.c.date), sa.Integer())
+    op.execute(rollup.insert().from_select(
+        ['user_id', 'year', 'month', 'total_hours', 'logged_days'],
+        sa.select(
+            daily_log.c.user_id, year, month, sa.func.sum(daily_log.c.hours_billed), sa.func.count(daily_log.c.id)
+        ).group_by(daily_log.c.user_id, year, month)
+    ))
+
+
+def downgrade():
+    op.drop_table('monthly_log_rollup')
@@ -0,0 +1,32 @@
+"""Add day_off.fraction and user.work_schedule
+
+Revision ID: add_partial_capacity
+Revises: add_holiday_calendar
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_partial_capacity'
+down_revision = 'add_holiday_calendar'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('day_off', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fraction', sa.Float(), nullable=True))
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('work_schedule', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('work_schedule')
+
+    with op.batch_alter_table('day_off', schema=None) as batch_op:
+        batch_op.drop_column('fraction')
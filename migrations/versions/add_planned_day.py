@@ -0,0 +1,32 @@
+"""Add planned_day table
+
+Revision ID: add_planned_day
+Revises: add_target_hours_override
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_planned_day'
+down_revision = 'add_target_hours_override'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('planned_day',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('target_hours', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'date')
+    )
+
+
+def downgrade():
+    op.drop_table('planned_day')
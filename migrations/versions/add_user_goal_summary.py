@@ -0,0 +1,43 @@
+"""Add user.setup_complete and user.goal_years and fill them from goal
+
+Revision ID: add_user_goal_summary
+Revises: add_monthly_log_rollup
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_goal_summary'
+down_revision = 'add_monthly_log_rollup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('setup_complete', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('goal_years', sa.String(length=255), nullable=True))
+
+    user = sa.table('user', sa.column('id', sa.Integer), sa.column('setup_complete', sa.Boolean),
+                    sa.column('goal_years', sa.String))
+    goal = sa.table('goal', sa.column('user_id', sa.Integer), sa.column('year', sa.Integer))
+    connection = op.get_bind()
+    years = {}
+    for user_id, year in connection.execute(sa.select(goal.c.user_id, goal.c.year).order_by(goal.c.year)):
+        years.setdefault(user_id, []).append(str(year))
+    if years:
+        connection.execute(
+            user.update().where(user.c.id == sa.bindparam('user_key')).values(
+                setup_complete=True, goal_years=sa.bindparam('years')
+            ),
+            [{'user_key': user_id, 'years': ','.join(goals)} for user_id, goals in years.items()]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('goal_years')
+        batch_op.drop_column('setup_complete')
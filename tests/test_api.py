@@ -0,0 +1,172 @@
+# tests/test_api.py
+import unittest
+from datetime import date
+from flask import g
+from sqlalchemy import event, update
+from app import create_app, db
+from app.models import User, Goal, DayOff, DailyLog
+from app.plans import plan_year_of
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class TestApi(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        user = User(email='test@example.com')
+        user.set_password('password')
+        db.session.add(user)
+        self.year = plan_year_of(date.today())
+        db.session.add(Goal(user_id=1, year=self.year, total_hours=1800))
+        db.session.add(Goal(user_id=1, year=2025, total_hours=2000))
+        db.session.commit()
+
+        with self.client:
+            self.client.post(
+                '/auth/login',
+                data={'email': 'test@example.com', 'password': 'password'},
+                follow_redirects=True
+            )
+
+    def tearDown(self):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _get(self, url, etag=None):
+        """GET a URL as a fresh request, returning the response and the SQL statements it ran."""
+        # The test app context outlives requests, so forget the user loaded by the last one
+        g.pop('_login_user', None)
+        db.session.expunge_all()
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        headers = {'If-None-Match': f'"{etag}"'} if etag else {}
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = self.client.get(url, headers=headers)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return response, statements
+
+    def test_dashboard(self):
+        """Test the dashboard JSON and its conditional GET."""
+        response, _ = self._get('/api/dashboard')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['year'], self.year)
+        self.assertEqual(data['total_hours'], 1800)
+        self.assertEqual(len(data['months']), 12)
+        self.assertAlmostEqual(sum(month['target_hours'] for month in data['months']), 1800, places=6)
+        self.assertIn('recommended_daily', data['metrics'])
+        etag, weak = response.get_etag()
+        self.assertFalse(weak)
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+
+        # An unchanged refresh is answered from the cached user and the data version alone
+        response, statements = self._get('/api/dashboard', etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_etag()[0], etag)
+        self.assertEqual(len(statements), 1)
+        self.assertIn('SELECT user.data_version', statements[0])
+        
+        # A write by another worker leaves this worker's cached user stale, but not the ETag
+        db.session.execute(update(User.__table__).values(data_version=User.__table__.c.data_version + 1))
+        db.session.commit()
+        response, _ = self._get('/api/dashboard', etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response.get_etag()[0]
+
+        # Logging hours changes the version
+        db.session.add(DailyLog(user_id=1, date=date.today(), hours_billed=6.0))
+        db.session.commit()
+        response, _ = self._get('/api/dashboard', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.get_etag()[0], etag)
+        self.assertAlmostEqual(response.get_json()['metrics']['total_logged'], 6.0)
+
+    def test_dashboard_fiscal_year(self):
+        """Test that the dashboard lists months in plan-year order when the plan year starts in October."""
+        self.app.config['FISCAL_YEAR_START_MONTH'] = 10
+        year = plan_year_of(date.today())
+        if year != self.year:
+            db.session.add(Goal(user_id=1, year=year, total_hours=1800))
+        db.session.add(DailyLog(user_id=1, date=date(year - 1, 11, 3), hours_billed=6.0))
+        db.session.commit()
+
+        response, _ = self._get('/api/dashboard')
+        self.assertEqual(response.status_code, 200)
+        months = response.get_json()['months']
+        self.assertEqual([month['month'] for month in months], [10, 11, 12] + list(range(1, 10)))
+        self.assertEqual(months[1]['logged_hours'], 6.0)
+        self.assertGreater(months[0]['target_hours'], 0)
+
+    def test_calendar(self):
+        """Test the calendar JSON and its conditional GET."""
+        db.session.add(DailyLog(user_id=1, date=date(2025, 6, 2), hours_billed=7.5))
+        db.session.commit()
+
+        response, _ = self._get('/api/calendar/2025/6')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['plan_year'], 2025)
+        self.assertEqual(data['prev'], {'year': 2025, 'month': 5})
+        self.assertEqual(data['next'], {'year': 2025, 'month': 7})
+        self.assertIsNone(data['weeks'][0][0])  # June 2025 starts on a Sunday
+        days = {day['date']: day for week in data['weeks'] for day in week if day}
+        self.assertEqual(len(days), 30)
+        self.assertEqual(days['2025-06-02']['logged_hours'], 7.5)
+        self.assertGreater(days['2025-06-02']['target_hours'], 0)
+        self.assertEqual(days['2025-06-07']['target_hours'], 0)
+
+        etag = response.get_etag()[0]
+        response, _ = self._get('/api/calendar/2025/7', etag)
+        self.assertEqual(response.status_code, 304)
+
+        # A new day off changes the version
+        db.session.add(DayOff(user_id=1, date=date(2025, 6, 3), type='Vacation'))
+        db.session.commit()
+        response, _ = self._get('/api/calendar/2025/6', etag)
+        self.assertEqual(response.status_code, 200)
+        days = {day['date']: day for week in response.get_json()['weeks'] for day in week if day}
+        self.assertEqual(days['2025-06-03']['target_hours'], 0)
+
+    def test_errors(self):
+        """Test invalid months, missing goals and anonymous requests."""
+        self.assertEqual(self.client.get('/api/calendar/2025/13').status_code, 404)
+        self.assertEqual(self.client.get('/api/calendar/2019/6').status_code, 404)
+
+        self.client.get('/auth/logout')
+        response = self.client.get('/api/dashboard')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(response.get_json()['success'])
+
+    def test_data_version(self):
+        """Test that data writes bump the version and plan reads do not."""
+        user = db.session.get(User, 1)
+        version = user.data_version
+
+        self.client.get('/api/calendar/2025/6')  # Materializes the plan
+        db.session.expire_all()
+        self.assertEqual(user.data_version, version)
+
+        db.session.add(DailyLog(user_id=1, date=date(2025, 6, 2), hours_billed=7.5))
+        db.session.commit()
+        self.assertEqual(user.data_version, version + 1)
+
+        user.work_schedule = '1,1,1,1,0.5,0,0'
+        db.session.commit()
+        self.assertEqual(user.data_version, version + 2)
+
+if __name__ == '__main__':
+    unittest.main()
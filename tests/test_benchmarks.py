@@ -0,0 +1,66 @@
+# tests/test_benchmarks.py
+import unittest
+
+from benchmarks import check_regressions
+from benchmarks import calculations, database, imports, logins
+
+class TestBenchmarks(unittest.TestCase):
+    """Tests for the benchmark harness."""
+    
+    def test_check_regressions(self):
+        """Test that only stages over their budget are reported."""
+        baseline = {'suites': {'calculations': {
+            'generate_plan': {'ops': 10, 'per_op_us': 100.0, 'seconds': 0.001},
+            'distribution': {'ops': 10, 'per_op_us': 10.0, 'seconds': 0.0001},
+            'workdays': {'ops': 50, 'per_op_us': 10.0, 'seconds': 0.0005},
+        }}}
+        results = {'calculations': {
+            'generate_plan': {'ops': 10, 'per_op_us': 140.0, 'seconds': 0.0014},
+            'distribution': {'ops': 10, 'per_op_us': 30.0, 'seconds': 0.0003},
+            'workdays': {'ops': 10, 'per_op_us': 90.0, 'seconds': 0.0009},  # Different size
+            'new_stage': {'ops': 10, 'per_op_us': 1.0, 'seconds': 0.00001},  # Not in baseline
+        }}
+        
+        failures = check_regressions(results, baseline, {'default': 1.5})
+        self.assertEqual([failure['stage'] for failure in failures], ['calculations.distribution'])
+        self.assertAlmostEqual(failures[0]['ratio'], 3.0)
+        
+        budgets = {'default': 1.2, 'stages': {'calculations.distribution': 4.0}}
+        failures = check_regressions(results, baseline, budgets)
+        self.assertEqual([failure['stage'] for failure in failures], ['calculations.generate_plan'])
+    
+    def test_calculations_suite(self):
+        """Test that a small run times every stage."""
+        results = calculations.run(num_users=5, repeat=1)
+        self.assertIn('generate_plan', results)
+        self.assertIn('progress_metrics', results)
+        for result in results.values():
+            self.assertEqual(result['ops'], 5)
+            self.assertGreater(result['seconds'], 0)
+    
+    def test_imports_suite(self):
+        """Test that a small run times parsing and importing every row."""
+        results = imports.run(num_users=2, repeat=1)
+        self.assertEqual(set(results), {'parse', 'import'})
+        rows = imports.make_export(2).count(b'\n') - 1
+        for result in results.values():
+            self.assertEqual(result['ops'], rows)
+    
+    def test_logins_suite(self):
+        """Test that a small run times every hashing method and the login route."""
+        results = logins.run(num_users=1, repeat=1)
+        self.assertEqual(set(results), {f'verify_{name}' for name in logins.METHODS} | {'login', 'rehash_login'})
+        for result in results.values():
+            self.assertEqual(result['ops'], 1)
+            self.assertGreater(result['seconds'], 0)
+    
+    def test_database_suite(self):
+        """Test that a small run times concurrent logging under every profile without errors."""
+        results = database.run(num_users=database.WRITERS, repeat=1)
+        self.assertEqual(set(results), {f'log_hours_{profile}' for profile in database.PROFILES})
+        for result in results.values():
+            self.assertEqual(result['ops'], database.WRITERS)
+            self.assertEqual(result['errors'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
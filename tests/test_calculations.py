@@ -1,13 +1,24 @@
 # tests/test_calculations.py
+import pickle
 import unittest
 from datetime import date
+
+import numpy as np
+
 from app.calculations.workdays import (
-    is_weekend, get_workdays_in_year, get_workdays_by_month
+    is_weekend, get_workdays_in_year, get_workdays_by_month,
+    get_workday_dates_by_month, WorkdayIndex, fiscal_year_bounds, fiscal_year_of,
+    get_capacity_by_month, parse_workweek
 )
 from app.calculations.distribution import (
-    distribute_hours_by_month, calculate_daily_targets
+    distribute_hours_by_month, calculate_daily_targets, InfeasibleGoalError
 )
 from app.calculations.service import BillableHourCalculationService
+from app.calculations.progress import ProgressIndex
+from app.calculations.cache import PlanCache
+from app.calculations.plan import DailyPlan
+from app.calculations.scenarios import Scenario, date_span
+from app.calculations.holidays import US_FEDERAL, US_FIRM, get_calendar
 
 class TestWorkdays(unittest.TestCase):
     """Tests for workday calculation functions."""
@@ -66,6 +77,206 @@ class TestWorkdays(unittest.TestCase):
         # Total should be roughly 260-262 workdays in a year (52 weeks × 5 days)
         total_workdays = sum(workdays_by_month.values())
         self.assertTrue(260 <= total_workdays <= 262)
+    
+    def test_get_workday_dates_by_month(self):
+        """Test grouping workday dates by month."""
+        days_off = [date(2025, 7, 4), date(2025, 7, 5)]  # Friday and Saturday
+        dates_by_month = get_workday_dates_by_month(2025, days_off)
+        counts_by_month = get_workdays_by_month(2025, days_off)
+        
+        # Dates should be plain date objects grouped under the right month
+        for month, dates in dates_by_month.items():
+            self.assertEqual(len(dates), counts_by_month[month])
+            for day in dates:
+                self.assertIsInstance(day, date)
+                self.assertEqual(day.month, month)
+        
+        # July 2025 has 23 weekdays, minus the Friday holiday
+        self.assertEqual(counts_by_month[7], 22)
+        self.assertNotIn(date(2025, 7, 4), dates_by_month[7])
+    
+    def test_custom_workweek(self):
+        """Test workday calculation with a custom work-week mask."""
+        # Monday to Thursday only
+        workweek = (1, 1, 1, 1, 0, 0, 0)
+        workdays = get_workdays_in_year(2025, workweek=workweek)
+        
+        self.assertTrue(all(day.weekday() < 4 for day in workdays))
+        # 2025 is 52 full weeks plus one extra Wednesday (Dec 31)
+        self.assertEqual(len(workdays), 52 * 4 + 1)
+
+def reference_calculate_daily_targets(hours_by_month, workday_dates_by_month, max_daily_hours=10.0):
+    """The original two-pass calculate_daily_targets, kept to check equivalence."""
+    daily_targets = {}
+    excess_hours = 0
+    
+    for month in range(1, 13):
+        month_hours = hours_by_month.get(month, 0)
+        workdays = workday_dates_by_month.get(month, [])
+        if not workdays:
+            continue
+        hours_per_day = month_hours / len(workdays)
+        if hours_per_day > max_daily_hours:
+            excess_hours += (hours_per_day - max_daily_hours) * len(workdays)
+            hours_per_day = max_daily_hours
+        for day in workdays:
+            daily_targets[day] = hours_per_day
+    
+    if excess_hours > 0:
+        available_days = sorted(day for day, hours in daily_targets.items() if hours < max_daily_hours)
+        if available_days:
+            additional_per_day = min(
+                (max_daily_hours - daily_targets[available_days[0]]),
+                excess_hours / len(available_days)
+            )
+            for day in available_days:
+                current_target = daily_targets[day]
+                new_target = min(current_target + additional_per_day, max_daily_hours)
+                daily_targets[day] = new_target
+                excess_hours -= (new_target - current_target)
+                if excess_hours <= 0:
+                    break
+    
+    return daily_targets
+
+class TestHolidays(unittest.TestCase):
+    """Tests for rule-based holiday calendars."""
+    
+    def test_us_federal(self):
+        """Test fixed-date, nth-weekday and last-weekday rules."""
+        self.assertEqual(sorted(US_FEDERAL.dates(2025)), [
+            date(2025, 1, 1), date(2025, 1, 20), date(2025, 2, 17), date(2025, 5, 26),
+            date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1), date(2025, 10, 13),
+            date(2025, 11, 11), date(2025, 11, 27), date(2025, 12, 25)
+        ])
+        self.assertNotIn(date(2020, 6, 19), US_FEDERAL.dates(2020))  # Juneteenth since 2021
+    
+    def test_observed(self):
+        """Test that weekend holidays move to the nearest weekday, across years too."""
+        self.assertIn(date(2021, 7, 5), US_FEDERAL.dates(2021))  # July 4 was a Sunday
+        self.assertIn(date(2021, 12, 24), US_FIRM.dates(2021))  # Christmas was a Saturday
+        self.assertIn(date(2021, 12, 31), US_FIRM.dates(2021))  # New Year's 2022 was a Saturday
+        self.assertNotIn(date(2021, 12, 31), US_FIRM.dates(2022))
+        self.assertIn(date(2025, 11, 28), US_FIRM.dates(2025))  # Day after Thanksgiving
+    
+    def test_cached_and_shared(self):
+        """Test that each year is computed once and handed out read-only without copies."""
+        days = US_FIRM.year_array(2025)
+        self.assertIs(US_FIRM.year_array(2025), days)
+        self.assertFalse(days.flags.writeable)
+        self.assertTrue(np.shares_memory(US_FIRM.day_array(date(2025, 6, 1), date(2025, 12, 31)), days))
+        
+        fiscal = US_FIRM.day_array(date(2024, 10, 1), date(2025, 9, 30))
+        self.assertEqual(fiscal[0], np.datetime64('2024-11-28'))
+        self.assertEqual(fiscal[-1], np.datetime64('2025-09-01'))
+        self.assertIsNone(get_calendar(None))
+        self.assertIs(get_calendar('us_federal'), US_FEDERAL)
+    
+    def test_plan_with_holidays(self):
+        """Test that calendar holidays act like days off in single and bulk plans."""
+        service = BillableHourCalculationService()
+        personal = [date(2025, 8, 11), date(2025, 8, 12)]
+        holidays = US_FIRM.year_array(2025)
+        
+        expected = service.generate_plan(2025, 1900, personal + sorted(US_FIRM.dates(2025)))
+        self.assertEqual(service.generate_plan(2025, 1900, personal, holidays=holidays), expected)
+        
+        bulk = service.generate_plans_bulk(2025, [1900, 1900], [personal, personal], holidays=holidays)
+        for day, hours in expected.items():
+            self.assertAlmostEqual(bulk.plan_for(1)[day], hours)
+        self.assertEqual(len(bulk.plan_for(0)), len(expected))
+
+class TestCapacity(unittest.TestCase):
+    """Tests for part-time schedules and partial days."""
+    
+    def test_capacity_by_month(self):
+        """Test capacity-weighted workday counts."""
+        half_fridays = parse_workweek('1,1,1,1,0.5,0,0')
+        self.assertEqual(get_capacity_by_month(2025, workweek=half_fridays)[1], 20.5)  # 5 Fridays
+        
+        capacity = get_capacity_by_month(
+            2025, [date(2025, 1, 2)], partial_days={date(2025, 1, 3): 0.5, date(2025, 1, 4): 0.5}
+        )
+        self.assertEqual(capacity[1], 21.5)  # January 4 is a Saturday
+        self.assertEqual(parse_workweek(None), (1, 1, 1, 1, 1, 0, 0))
+        with self.assertRaises(ValueError):
+            parse_workweek('1,1,1')
+        
+        # Whole-day schedules keep the plain workday path
+        self.assertIsNone(WorkdayIndex(date(2025, 1, 1), date(2025, 12, 31)).capacity)
+    
+    def test_daily_targets_with_capacity(self):
+        """Test that part days get their share of the month's daily target."""
+        dates = {1: [date(2025, 1, 2), date(2025, 1, 3)]}
+        targets = calculate_daily_targets({1: 15.0}, dates, 10.0, day_capacity={date(2025, 1, 3): 0.5})
+        self.assertEqual(targets, {date(2025, 1, 2): 10.0, date(2025, 1, 3): 5.0})
+        
+        # The cap applies to the full-day rate, so a half day is capped at half the cap
+        targets = calculate_daily_targets({1: 30.0}, dates, 10.0, day_capacity={date(2025, 1, 3): 0.5})
+        self.assertEqual(targets, {date(2025, 1, 2): 10.0, date(2025, 1, 3): 5.0})
+    
+    def test_plan_with_capacity(self):
+        """Test part-time schedules and partial days in single and bulk plans."""
+        service = BillableHourCalculationService(workweek=(1, 1, 1, 1, 0.5, 0, 0))
+        partial = {date(2025, 3, 10): 0.5, date(2025, 3, 15): 0.5}  # March 15 is a Saturday
+        plan = service.generate_plan(2025, 1800, [date(2025, 7, 4)], partial_days=partial)
+        
+        self.assertAlmostEqual(plan.total(), 1800)
+        self.assertAlmostEqual(plan[date(2025, 3, 14)], plan[date(2025, 3, 11)] / 2)  # Friday
+        self.assertAlmostEqual(plan[date(2025, 3, 10)], plan[date(2025, 3, 11)] / 2)
+        self.assertNotIn(date(2025, 3, 15), plan)
+        
+        window = service.generate_plan_range(
+            date(2025, 1, 1), date(2025, 12, 31), 1800, [date(2025, 7, 4)],
+            window=(date(2025, 3, 1), date(2025, 3, 31)), partial_days=partial
+        )
+        self.assertEqual(window, plan.month(2025, 3))
+        
+        bulk = service.generate_plans_bulk(
+            2025, [1800, 1800], [[date(2025, 7, 4)], [date(2025, 7, 4)]], partial_days=[partial, {}]
+        )
+        for day, hours in plan.items():
+            self.assertAlmostEqual(bulk.plan_for(0)[day], hours)
+        self.assertAlmostEqual(bulk.capacity[1].sum(), bulk.capacity[0].sum() + 0.5)
+
+class TestWorkdayIndex(unittest.TestCase):
+    """Tests for the workday ordinal index and fiscal years."""
+    
+    def test_ordinals(self):
+        """Test mapping dates to workday ordinals and back."""
+        index = WorkdayIndex(date(2025, 1, 1), date(2025, 12, 31), [date(2025, 1, 1)])
+        
+        self.assertEqual(len(index), len(get_workdays_in_year(2025, [date(2025, 1, 1)])))
+        self.assertEqual(index.ordinal(date(2025, 1, 2)), 0)
+        self.assertEqual(index.date_at(3), date(2025, 1, 7))  # Thu, Fri, Mon, Tue
+        self.assertNotIn(date(2025, 1, 4), index)  # Saturday
+        with self.assertRaises(KeyError):
+            index.ordinal(date(2025, 1, 1))
+        
+        # The next three workdays after a Friday
+        self.assertEqual(
+            index.next_workdays(date(2025, 1, 3), 3).tolist(),
+            [date(2025, 1, 6), date(2025, 1, 7), date(2025, 1, 8)]
+        )
+        self.assertEqual(len(index.next_workdays(date(2025, 12, 30), 5)), 1)
+    
+    def test_multi_year_months(self):
+        """Test month periods for a range spanning two years."""
+        index = WorkdayIndex(date(2024, 11, 15), date(2025, 2, 10))
+        
+        self.assertEqual(index.months, [(2024, 11), (2024, 12), (2025, 1), (2025, 2)])
+        counts = index.count_by_period()
+        self.assertEqual(counts[2], 23)  # All of January 2025
+        self.assertEqual(counts[0], 11)  # Friday November 15 to November 30, 2024
+        self.assertEqual(counts.sum(), len(index))
+    
+    def test_fiscal_year(self):
+        """Test fiscal year boundaries and lookups."""
+        self.assertEqual(fiscal_year_bounds(2025), (date(2025, 1, 1), date(2025, 12, 31)))
+        self.assertEqual(fiscal_year_bounds(2026, 10), (date(2025, 10, 1), date(2026, 9, 30)))
+        self.assertEqual(fiscal_year_of(date(2025, 9, 30), 10), 2025)
+        self.assertEqual(fiscal_year_of(date(2025, 10, 1), 10), 2026)
+        self.assertEqual(fiscal_year_of(date(2025, 10, 1)), 2025)
 
 class TestDistribution(unittest.TestCase):
     """Tests for billable hour distribution functions."""
@@ -129,6 +340,56 @@ class TestDistribution(unittest.TestCase):
         
         # Only 200 hours would be allocated (10 hours × 20 days)
         self.assertAlmostEqual(sum(daily_targets.values()), 200.0)
+        
+        # Strict mode reports the infeasible goal instead
+        with self.assertRaises(InfeasibleGoalError) as context:
+            calculate_daily_targets(
+                hours_by_month, workday_dates_by_month, max_daily_hours=10.0, strict=True
+            )
+        self.assertAlmostEqual(context.exception.shortfall, 100.0)
+    
+    def test_calculate_daily_targets_matches_reference(self):
+        """Test that feasible inputs give the same targets as the original algorithm."""
+        dates_by_month = get_workday_dates_by_month(2025, [date(2025, 1, 1), date(2025, 7, 4)])
+        workdays_by_month = {month: len(dates) for month, dates in dates_by_month.items()}
+        
+        cases = [
+            (2000, None, 10.0),
+            (1500, {1: 1.2, 6: 0.8, 12: 1.2}, 10.0),
+            (2400, {month: 0.5 + month / 10 for month in range(1, 13)}, 14.0),
+            (1900, {8: 0.1}, 8.0),
+        ]
+        for total_hours, weights, cap in cases:
+            hours_by_month = distribute_hours_by_month(total_hours, workdays_by_month, weights)
+            expected = reference_calculate_daily_targets(hours_by_month, dates_by_month, cap)
+            actual = calculate_daily_targets(hours_by_month, dates_by_month, cap)
+            
+            self.assertEqual(actual.keys(), expected.keys())
+            for day, hours in expected.items():
+                self.assertAlmostEqual(actual[day], hours)
+    
+    def test_calculate_daily_targets_water_filling(self):
+        """Test that a binding cap keeps the annual total and the monthly weights."""
+        dates_by_month = get_workday_dates_by_month(2025)
+        workdays_by_month = {month: len(dates) for month, dates in dates_by_month.items()}
+        
+        # Skewed year: Q4 wants almost 10 hours a day, January nearly 7.5
+        weights = {1: 1.2, 6: 0.8, 10: 1.6, 11: 1.6, 12: 1.6}
+        hours_by_month = distribute_hours_by_month(1900, workdays_by_month, weights)
+        
+        # The original algorithm loses hours in this case
+        reference = reference_calculate_daily_targets(hours_by_month, dates_by_month, 8.0)
+        self.assertLess(sum(reference.values()), 1899.0)
+        
+        daily_targets = calculate_daily_targets(hours_by_month, dates_by_month, 8.0)
+        self.assertAlmostEqual(sum(daily_targets.values()), 1900.0)
+        self.assertLessEqual(max(daily_targets.values()), 8.0 + 1e-9)
+        
+        # Q4 is capped, and uncapped months keep their relative weights
+        self.assertAlmostEqual(daily_targets[date(2025, 11, 3)], 8.0)
+        june = daily_targets[date(2025, 6, 2)]
+        march = daily_targets[date(2025, 3, 3)]
+        self.assertAlmostEqual(june / march, 0.8)
 
 class TestCalculationService(unittest.TestCase):
     """Tests for the billable hour calculation service."""
@@ -168,6 +429,111 @@ class TestCalculationService(unittest.TestCase):
         planned_hours = sum(plan.values())
         # Allow for some floating-point variance
         self.assertAlmostEqual(planned_hours, total_hours, delta=0.5)
+        
+        # A goal above 8 hours on every workday can't be met
+        with self.assertRaises(InfeasibleGoalError):
+            service.generate_plan(year, 2500, days_off, monthly_weights, strict=True)
+    
+    def test_generate_plan_range(self):
+        """Test plans for fiscal years and windows of a plan."""
+        service = BillableHourCalculationService()
+        
+        # October-September fiscal year
+        plan = service.generate_fiscal_plan(2026, 10, 1900, monthly_weights={12: 0.5})
+        self.assertEqual(min(plan), date(2025, 10, 1))
+        self.assertEqual(max(plan), date(2026, 9, 30))
+        self.assertAlmostEqual(sum(plan.values()), 1900)
+        self.assertLess(plan[date(2025, 12, 1)], plan[date(2026, 1, 5)])
+        
+        # Weights keyed by (year, month) only apply to that year
+        plan = service.generate_plan_range(
+            date(2024, 1, 1), date(2025, 12, 31), 3000, monthly_weights={(2025, 3): 1.5}
+        )
+        self.assertAlmostEqual(plan[date(2025, 3, 3)] / plan[date(2024, 3, 4)], 1.5)
+        
+        # A calendar year range is the same as generate_plan
+        self.assertEqual(
+            service.generate_plan_range(date(2025, 1, 1), date(2025, 12, 31), 2000),
+            service.generate_plan(2025, 2000)
+        )
+        
+        # A window only returns its own targets but keeps the whole-range allocation
+        full = service.generate_plan(2025, 2000, [date(2025, 7, 4)])
+        window = service.generate_plan_range(
+            date(2025, 1, 1), date(2025, 12, 31), 2000, [date(2025, 7, 4)],
+            window=(date(2025, 7, 1), date(2025, 7, 31))
+        )
+        self.assertEqual(window, {day: hours for day, hours in full.items() if day.month == 7})
+    
+    def test_generate_plans_bulk(self):
+        """Test that bulk generation matches generating each plan on its own."""
+        service = BillableHourCalculationService(max_daily_hours=8.0)
+        
+        goals = [2000, 1500, 2500, 0]
+        days_off = [
+            [date(2025, 1, 1), date(2025, 12, 25)],
+            [date(2025, 8, day) for day in range(1, 32)],
+            [],
+            [date(2024, 12, 31)],  # Outside the year
+        ]
+        monthly_weights = [{6: 0.8, 12: 1.2}, {}, {10: 1.5}, None]
+        
+        plans = service.generate_plans_bulk(2025, goals, days_off, monthly_weights)
+        self.assertEqual(len(plans), 4)
+        self.assertEqual(plans.targets.shape, (4, 365))
+        
+        for i in range(4):
+            expected = service.generate_plan(2025, goals[i], days_off[i], monthly_weights[i])
+            actual = plans.plan_for(i)
+            self.assertEqual(actual.keys(), expected.keys())
+            for day, hours in expected.items():
+                self.assertAlmostEqual(actual[day], hours)
+            self.assertAlmostEqual(plans.monthly_totals[i].sum(), sum(expected.values()))
+        
+        # 2500 hours doesn't fit under 8 hours a day
+        self.assertEqual(plans.infeasible.tolist(), [False, False, True, False])
+        self.assertAlmostEqual(plans.peak_daily[2], 8.0)
+    
+    def test_simulate_scenarios(self):
+        """Test that scenarios match plans generated from the combined inputs."""
+        service = BillableHourCalculationService(max_daily_hours=10.0)
+        base_days_off = [date(2025, 1, 1), date(2025, 12, 25)]
+        base_weights = {6: 0.8}
+        
+        scenarios = [
+            Scenario(1900, date_span(date(2025, 8, 1), date(2025, 8, 14)), {10: 1.2, 11: 1.2, 12: 1.2}, 'august'),
+            Scenario(1900, label='unchanged'),
+            Scenario(2700, monthly_weights={6: 1.0}, label='too much'),
+        ]
+        results = service.simulate_scenarios(2025, scenarios, base_days_off, base_weights)
+        self.assertEqual([result['label'] for result in results], ['august', 'unchanged', 'too much'])
+        
+        for scenario, result in zip(scenarios, results):
+            expected = service.generate_plan(
+                2025, scenario.total_hours, base_days_off + scenario.days_off,
+                {**base_weights, **scenario.monthly_weights}
+            )
+            self.assertAlmostEqual(result['peak_daily'], max(expected.values()))
+            self.assertEqual(result['workdays'], len(expected))
+            for month, total in expected.monthly_totals().items():
+                self.assertAlmostEqual(result['monthly_totals'][month], total)
+        
+        self.assertEqual([result['feasible'] for result in results], [True, True, False])
+        self.assertAlmostEqual(results[2]['shortfall'], 2700 - 10.0 * results[2]['workdays'])
+        
+        # Fiscal years report their months in plan-year order
+        fiscal = service.simulate_scenarios(
+            2026, [Scenario(1800)], start_date=date(2025, 10, 1), end_date=date(2026, 9, 30)
+        )
+        self.assertEqual(list(fiscal[0]['monthly_totals'])[:3], [10, 11, 12])
+        expected = service.generate_fiscal_plan(2026, 10, 1800)
+        self.assertAlmostEqual(fiscal[0]['monthly_totals'][1], expected.month(2026, 1).total())
+        
+        # Batches spread over worker processes give the same answers
+        sweep = [Scenario(1500 + 10 * i, label=str(i)) for i in range(40)]
+        serial = service.simulate_scenarios(2025, sweep, base_days_off, chunk_size=16)
+        pooled = service.simulate_scenarios(2025, sweep, base_days_off, workers=2, chunk_size=16)
+        self.assertEqual(serial, pooled)
     
     def test_get_monthly_summary(self):
         """Test generation of monthly summary."""
@@ -213,37 +579,274 @@ class TestCalculationService(unittest.TestCase):
             # Missing day (1/9)
         }
         
-        # Mock today's date for testing
-        # Patching date.today() would be better but requires more setup
-        original_today = date.today
-        try:
-            date.today = lambda: date(2025, 1, 9)
-            
-            metrics = service.calculate_progress_metrics(
-                goal_hours, daily_targets, logged_hours
-            )
-            
-            # Total logged should be sum of logged_hours
-            self.assertEqual(metrics['total_logged'], 30.0)  # 9 + 7 + 8 + 6
-            
-            # Target to date should be sum of targets through today
-            self.assertEqual(metrics['target_to_date'], 40.0)  # 5 days * 8 hours
-            
-            # Current pace should be total_logged - target_to_date
-            self.assertEqual(metrics['current_pace'], -10.0)  # 10 hours behind
-            
-            # Remaining workdays should be days after today
-            self.assertEqual(metrics['remaining_workdays'], 2)  # 1/12 and 1/13
-            
-            # Remaining target should be goal_hours - total_logged
-            self.assertEqual(metrics['remaining_target'], 1970.0)  # 2000 - 30
-            
-            # Recommended daily should be remaining_target / remaining_workdays
-            self.assertEqual(metrics['recommended_daily'], 985.0)  # 1970 / 2
-            
-        finally:
-            # Restore original date.today
-            date.today = original_today
+        metrics = service.calculate_progress_metrics(
+            goal_hours, daily_targets, logged_hours, today=date(2025, 1, 9)
+        )
+        
+        # Total logged should be sum of logged_hours
+        self.assertEqual(metrics['total_logged'], 30.0)  # 9 + 7 + 8 + 6
+        
+        # Target to date should be sum of targets through today
+        self.assertEqual(metrics['target_to_date'], 40.0)  # 5 days * 8 hours
+        
+        # Current pace should be total_logged - target_to_date
+        self.assertEqual(metrics['current_pace'], -10.0)  # 10 hours behind
+        
+        # Remaining workdays should be days after today
+        self.assertEqual(metrics['remaining_workdays'], 2)  # 1/12 and 1/13
+        
+        # Remaining target should be goal_hours - total_logged
+        self.assertEqual(metrics['remaining_target'], 1970.0)  # 2000 - 30
+        
+        # Recommended daily should be remaining_target / remaining_workdays
+        self.assertEqual(metrics['recommended_daily'], 985.0)  # 1970 / 2
+        
+        # Month to date covers 1/1 through today
+        self.assertEqual(metrics['month_target_to_date'], 40.0)
+        self.assertEqual(metrics['month_logged'], 30.0)
+        
+        # Week to date covers Monday 1/6 through today
+        self.assertEqual(metrics['week_target_to_date'], 32.0)
+        self.assertEqual(metrics['week_logged'], 21.0)  # 7 + 8 + 6
+        self.assertEqual(metrics['week_pace'], -11.0)
+        
+        # A total summed elsewhere (e.g. by the database) replaces the sum of the logs
+        metrics = service.calculate_progress_metrics(
+            goal_hours, daily_targets, logged_hours, today=date(2025, 1, 9), total_logged=100.0
+        )
+        self.assertEqual(metrics['total_logged'], 100.0)
+        self.assertEqual(metrics['current_pace'], 60.0)
+        self.assertEqual(metrics['week_logged'], 21.0)
+    
+    def test_progress_index(self):
+        """Test prefix-sum queries over a plan."""
+        service = BillableHourCalculationService()
+        plan = service.generate_plan(2025, 2000, [date(2025, 1, 1)])
+        index = service.build_progress_index(plan)
+        
+        def scan(start, end):
+            return sum(hours for day, hours in plan.items() if start <= day <= end)
+        
+        self.assertEqual(len(index), len(plan))
+        self.assertAlmostEqual(index.target_to_date(date(2025, 6, 15)), scan(date(2025, 1, 1), date(2025, 6, 15)))
+        self.assertAlmostEqual(index.target_between(date(2025, 3, 3), date(2025, 3, 7)), scan(date(2025, 3, 3), date(2025, 3, 7)))
+        self.assertAlmostEqual(index.month_to_date(date(2025, 4, 16)), scan(date(2025, 4, 1), date(2025, 4, 16)))
+        self.assertAlmostEqual(index.week_to_date(date(2025, 4, 16)), scan(date(2025, 4, 14), date(2025, 4, 16)))
+        self.assertAlmostEqual(index.remaining_target(date(2025, 6, 15)), scan(date(2025, 6, 16), date(2025, 12, 31)))
+        self.assertEqual(index.remaining_workdays(date(2025, 12, 29)), 2)
+        self.assertEqual(index.workdays_between(date(2025, 1, 1), date(2025, 1, 3)), 2)
+        
+        # Queries outside the plan
+        self.assertEqual(index.target_to_date(date(2024, 12, 31)), 0.0)
+        self.assertAlmostEqual(index.target_to_date(date(2026, 1, 1)), sum(plan.values()))
+        self.assertEqual(index.target_between(date(2025, 5, 2), date(2025, 5, 1)), 0.0)
+
+
+class TestDailyPlan(unittest.TestCase):
+    """Tests for the array-backed daily plan."""
+    
+    def setUp(self):
+        self.service = BillableHourCalculationService()
+        self.plan = self.service.generate_plan(2025, 2000, [date(2025, 1, 1)], {3: 1.2})
+    
+    def test_mapping_api(self):
+        """Test that the plan behaves like a read-only dict of workdays."""
+        plan = self.plan
+        as_dict = plan.to_dict()
+        
+        self.assertIsInstance(plan, DailyPlan)
+        self.assertEqual(len(plan), len(get_workdays_in_year(2025, [date(2025, 1, 1)])))
+        self.assertEqual(list(plan), sorted(as_dict))
+        self.assertEqual(plan, as_dict)
+        self.assertIn(date(2025, 1, 2), plan)
+        self.assertNotIn(date(2025, 1, 1), plan)  # Day off
+        self.assertNotIn(date(2025, 1, 4), plan)  # Saturday
+        self.assertEqual(plan.get(date(2025, 1, 4), 0), 0)
+        self.assertIsInstance(plan[date(2025, 1, 2)], float)
+        with self.assertRaises(KeyError):
+            plan[date(2026, 1, 2)]
+        self.assertAlmostEqual(plan.total(), sum(as_dict.values()))
+        
+        with self.assertRaises(ValueError):
+            plan.targets[0] = 1.0
+    
+    def test_views(self):
+        """Test monthly slices and windows share the plan's array."""
+        march = self.plan.month(2025, 3)
+        
+        self.assertEqual(march.start, date(2025, 3, 1))
+        self.assertEqual(march.end, date(2025, 3, 31))
+        self.assertEqual(march, {day: hours for day, hours in self.plan.items() if day.month == 3})
+        self.assertTrue(np.shares_memory(march.targets, self.plan.targets))
+        
+        window = self.plan.window(date(2024, 12, 1), date(2025, 1, 10))
+        self.assertEqual(window.start, date(2025, 1, 1))
+        self.assertEqual(len(window), 7)
+        self.assertEqual(len(self.plan.window(date(2026, 1, 1), date(2026, 2, 1))), 0)
+        
+        # Windows that miss the plan are empty but never end before they start
+        for start, end, day in (
+            (date(2026, 1, 1), date(2026, 2, 1), self.plan.end),
+            (date(2024, 1, 1), date(2024, 2, 1), self.plan.start),
+            (date(2025, 3, 10), date(2025, 3, 9), date(2025, 3, 10)),
+        ):
+            empty = self.plan.window(start, end)
+            self.assertEqual((empty.start, empty.end), (day, day))
+            self.assertEqual(len(empty), 0)
+            self.assertEqual(empty.total(), 0.0)
+            self.assertEqual(empty, {})
+    
+    def test_summary_and_index(self):
+        """Test the fast paths for monthly totals and progress queries."""
+        as_dict = self.plan.to_dict()
+        summary = self.service.get_monthly_summary(self.plan)
+        for month, total in self.service.get_monthly_summary(as_dict).items():
+            self.assertAlmostEqual(summary[month], total)
+        
+        index = self.plan.progress_index()
+        self.assertIs(self.plan.progress_index(), index)
+        self.assertAlmostEqual(
+            index.target_to_date(date(2025, 5, 20)),
+            ProgressIndex(as_dict).target_to_date(date(2025, 5, 20))
+        )
+    
+    def test_from_items_and_pickle(self):
+        """Test building a plan from pairs and pickling it."""
+        plan = DailyPlan.from_items(self.plan.items(), dtype=np.float32)
+        self.assertEqual(plan.targets.dtype, np.float32)
+        self.assertEqual(len(plan), len(self.plan))
+        
+        restored = pickle.loads(pickle.dumps(self.plan))
+        self.assertEqual(restored, self.plan)
+
+class TestCatchUpPlanner(unittest.TestCase):
+    """Tests for catch-up planning."""
+    
+    def setUp(self):
+        self.service = BillableHourCalculationService(max_daily_hours=9.0)
+        self.plan = self.service.generate_plan(2025, 1800, monthly_weights={11: 1.3})
+        self.today = date(2025, 6, 30)
+        self.planner = self.service.build_catch_up_planner(self.plan, self.today)
+    
+    def test_on_plan(self):
+        """Test that logging exactly to plan keeps the planned targets."""
+        logged = self.plan.progress_index().target_to_date(self.today)
+        suggestion = self.planner.suggest(1800, logged)
+        
+        self.assertAlmostEqual(suggestion['shortfall'], 0.0)
+        for day in suggestion['next_days']:
+            self.assertAlmostEqual(day['suggested'], day['planned'])
+        self.assertEqual(suggestion['next_days'][0]['date'], '2025-07-01')
+    
+    def test_behind(self):
+        """Test that a shortfall is spread over upcoming days within the cap."""
+        logged = self.plan.progress_index().target_to_date(self.today) - 150
+        targets = self.planner.targets(1800 - logged)
+        
+        self.assertAlmostEqual(targets.sum(), 1800 - logged)
+        self.assertLessEqual(targets.max(), 9.0 + 1e-9)
+        
+        # November is capped; uncapped months keep their relative weights
+        upcoming = self.plan.window(date(2025, 7, 1), date(2025, 12, 31))
+        revised = dict(zip(list(upcoming), targets.tolist()))
+        self.assertAlmostEqual(revised[date(2025, 11, 3)], 9.0)
+        self.assertAlmostEqual(
+            revised[date(2025, 7, 1)] / revised[date(2025, 9, 1)],
+            upcoming[date(2025, 7, 1)] / upcoming[date(2025, 9, 1)]
+        )
+        self.assertTrue(self.planner.suggest(1800, logged)['feasible'])
+    
+    def test_infeasible_and_done(self):
+        """Test suggestions when the goal is out of reach or already met."""
+        suggestion = self.planner.suggest(1800, 0)
+        self.assertFalse(suggestion['feasible'])
+        self.assertAlmostEqual(suggestion['peak_daily'], 9.0)
+        
+        suggestion = self.planner.suggest(1800, 1900)
+        self.assertEqual(suggestion['remaining_hours'], 0.0)
+        self.assertEqual(suggestion['peak_daily'], 0.0)
+
+class TestPlanCache(unittest.TestCase):
+    """Tests for the plan cache."""
+    
+    def setUp(self):
+        self.now = 0.0
+        self.cache = PlanCache(max_entries=2, ttl=60, clock=lambda: self.now)
+    
+    def test_make_digest(self):
+        """Test that the digest only depends on inputs that affect the plan."""
+        digest = PlanCache.make_digest(2025, 2000, [date(2025, 1, 1)], {1: 1.2}, 10.0)
+        
+        # Order, duplicates and days outside the year don't matter
+        self.assertEqual(digest, PlanCache.make_digest(
+            2025, 2000, [date(2024, 12, 31), date(2025, 1, 1), date(2025, 1, 1)],
+            {1: 1.2}, 10.0
+        ))
+        
+        # Any real input change does
+        self.assertNotEqual(digest, PlanCache.make_digest(2025, 2001, [date(2025, 1, 1)], {1: 1.2}, 10.0))
+        self.assertNotEqual(digest, PlanCache.make_digest(2025, 2000, [date(2025, 1, 2)], {1: 1.2}, 10.0))
+        self.assertNotEqual(digest, PlanCache.make_digest(2025, 2000, [date(2025, 1, 1)], {1: 1.1}, 10.0))
+        self.assertNotEqual(digest, PlanCache.make_digest(2025, 2000, [date(2025, 1, 1)], {1: 1.2}, 8.0))
+        
+        # A fiscal year starting in October keeps its days in the previous calendar year
+        start, end = date(2025, 10, 1), date(2026, 9, 30)
+        fiscal = PlanCache.make_digest(2026, 2000, [date(2026, 1, 2)], start=start, end=end)
+        self.assertNotEqual(fiscal, PlanCache.make_digest(
+            2026, 2000, [date(2025, 11, 3), date(2026, 1, 2)], start=start, end=end
+        ))
+        self.assertNotEqual(fiscal, PlanCache.make_digest(
+            2026, 2000, [date(2026, 1, 2)], partial_days={date(2025, 11, 4): 0.5}, start=start, end=end
+        ))
+        self.assertEqual(fiscal, PlanCache.make_digest(
+            2026, 2000, [date(2026, 1, 2), date(2026, 10, 1)], start=start, end=end
+        ))
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used plan is evicted when full."""
+        self.cache.set(1, 2025, 'a', 'plan a')
+        self.cache.set(2, 2025, 'b', 'plan b')
+        
+        # Touch plan a so plan b becomes the least recently used
+        self.assertEqual(self.cache.get(1, 2025, 'a'), 'plan a')
+        self.cache.set(3, 2025, 'c', 'plan c')
+        
+        self.assertIsNone(self.cache.get(2, 2025, 'b'))
+        self.assertEqual(self.cache.get(1, 2025, 'a'), 'plan a')
+        self.assertEqual(self.cache.get(3, 2025, 'c'), 'plan c')
+        
+        stats = self.cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['size'], 2)
+    
+    def test_ttl_expiry(self):
+        """Test that entries expire after their time-to-live."""
+        self.cache.set(1, 2025, 'a', 'plan a')
+        
+        self.now = 59
+        self.assertEqual(self.cache.get(1, 2025, 'a'), 'plan a')
+        
+        self.now = 61
+        self.assertIsNone(self.cache.get(1, 2025, 'a'))
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+        self.assertEqual(self.cache.stats()['size'], 0)
+    
+    def test_invalidate(self):
+        """Test invalidation by user and year."""
+        cache = PlanCache(max_entries=10)
+        cache.set(1, 2025, 'a', 'plan a')
+        cache.set(1, 2026, 'b', 'plan b')
+        cache.set(2, 2025, 'c', 'plan c')
+        
+        self.assertEqual(cache.invalidate(1, 2025), 1)
+        self.assertIsNone(cache.get(1, 2025, 'a'))
+        self.assertEqual(cache.get(1, 2026, 'b'), 'plan b')
+        
+        self.assertEqual(cache.invalidate(1), 1)
+        self.assertIsNone(cache.get(1, 2026, 'b'))
+        self.assertEqual(cache.get(2, 2025, 'c'), 'plan c')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,82 @@
+# tests/test_database.py
+import os
+import shutil
+import tempfile
+import unittest
+from flask import Flask
+from sqlalchemy import text
+from app import create_app, db
+from app.database import DB_PROFILES, apply_db_profile, effective_db_settings, profile_settings
+from config import Config
+
+class TestDatabaseProfiles(unittest.TestCase):
+    def setUp(self):
+        """Set up a file-backed SQLite database, which PRAGMAs like WAL need."""
+        self.directory = tempfile.mkdtemp()
+        self.uri = 'sqlite:///' + os.path.join(self.directory, 'app.db')
+
+    def tearDown(self):
+        """Clean up after tests."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _create_app(self, profile):
+        class ProfileConfig(Config):
+            SQLALCHEMY_DATABASE_URI = self.uri
+            DB_PROFILE = profile
+        return create_app(ProfileConfig)
+
+    def test_profile_settings(self):
+        """Test that profiles are looked up per dialect."""
+        self.assertEqual(profile_settings('untuned', self.uri), {})
+        self.assertIn('pragmas', profile_settings('small_office', self.uri))
+        settings = profile_settings('large_firm', 'postgresql://user@localhost/hours')
+        self.assertEqual(settings['engine_options']['pool_size'], 20)
+        self.assertTrue(settings['engine_options']['pool_pre_ping'])
+        self.assertEqual(profile_settings('small_office', 'mysql://localhost/hours'), {})
+        with self.assertRaises(ValueError):
+            profile_settings('fast', self.uri)
+
+    def test_engine_options(self):
+        """Test that PostgreSQL pool options are merged under explicit engine options."""
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://user@localhost/hours'
+        app.config['DB_PROFILE'] = 'small_office'
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': 2}
+        apply_db_profile(app)
+        options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+        self.assertEqual(options['pool_size'], 2)
+        self.assertEqual(options['max_overflow'], DB_PROFILES['small_office']['postgresql']['engine_options']['max_overflow'])
+        self.assertEqual(options['pool_recycle'], 1800)
+
+    def test_sqlite_pragmas(self):
+        """Test that a profile's PRAGMAs are set on connect and logged on the first connection only."""
+        app = self._create_app('large_firm')
+        # Building the app does not touch the database
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'app.db')))
+        with app.app_context():
+            with self.assertLogs('app', 'INFO') as logs:
+                db.session.execute(text('SELECT 1'))
+                db.session.remove()
+                effective_db_settings(db.engine)
+            self.assertEqual(len(logs.output), 1)
+            self.assertIn("'journal_mode': 'wal'", logs.output[0])
+            settings = effective_db_settings(db.engine)
+            self.assertEqual(settings['journal_mode'], 'wal')
+            self.assertEqual(settings['synchronous'], 1)
+            self.assertEqual(settings['busy_timeout'], 15000)
+            self.assertEqual(settings['mmap_size'], 256 * 2 ** 20)
+            db.engine.dispose()
+        self.assertFalse([line for line in logs.output if line.startswith('WARNING')])
+
+    def test_untuned(self):
+        """Test that the untuned profile leaves SQLite's defaults alone."""
+        app = self._create_app('untuned')
+        with app.app_context():
+            settings = effective_db_settings(db.engine)
+            self.assertEqual(settings['journal_mode'], 'delete')
+            self.assertEqual(settings['synchronous'], 2)
+            self.assertEqual(settings['mmap_size'], 0)
+            db.engine.dispose()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+# tests/test_identity.py
+import unittest
+from datetime import date
+from flask import g
+from sqlalchemy import event
+from app import create_app, db, user_cache
+from app.identity import UserCache
+from app.models import User, Goal, DailyLog
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestUserCache(unittest.TestCase):
+    def test_lru_and_ttl(self):
+        """Test eviction, expiry, invalidation and disabling the cache."""
+        clock = FakeClock()
+        cache = UserCache(max_entries=2, ttl=30, clock=clock)
+        cache.set(1, {'id': 1})
+        cache.set(2, {'id': 2})
+        self.assertEqual(cache.get(1), {'id': 1})
+        cache.set(3, {'id': 3})  # Evicts 2, the least recently used
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+        clock.now = 31
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+        cache.set(1, {'id': 1})
+        self.assertEqual(cache.invalidate([1, 4]), 1)
+        self.assertIsNone(cache.get(1))
+
+        cache.ttl = 0
+        cache.set(1, {'id': 1})
+        self.assertIsNone(cache.get(1))
+
+class TestIdentity(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        user = User(email='test@example.com')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _login(self):
+        return self.client.post('/auth/login', data={'email': 'test@example.com', 'password': 'password'})
+
+    def _get(self, url):
+        """GET a URL as a fresh request, returning the response and the SQL statements it ran."""
+        # The test app context outlives requests, so forget the user loaded by the last one
+        g.pop('_login_user', None)
+        db.session.expunge_all()
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = self.client.get(url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return response, statements
+
+    def test_goal_summary(self):
+        """Test that goal writes keep setup_complete and goal_years up to date."""
+        user = db.session.get(User, 1)
+        self.assertFalse(user.setup_complete)
+        self.assertIn('/setup/wizard', self._login().headers['Location'])
+        self.client.get('/auth/logout')
+
+        goal = Goal(user_id=1, year=2026, total_hours=1500)
+        db.session.add(goal)
+        db.session.add(Goal(user_id=1, year=2025, total_hours=1800))
+        db.session.commit()
+        self.assertTrue(user.setup_complete)
+        self.assertEqual(user.goal_years, '2025,2026')
+        self.assertTrue(user.has_goal_for(2025))
+        self.assertFalse(user.has_goal_for(2024))
+        self.assertNotIn('/setup/wizard', self._login().headers['Location'])
+
+        db.session.delete(goal)
+        db.session.commit()
+        self.assertEqual(user.goal_years, '2025')
+        for goal in Goal.query:
+            db.session.delete(goal)
+        db.session.commit()
+        self.assertFalse(user.setup_complete)
+        self.assertIsNone(user.goal_years)
+
+    def test_cached_requests(self):
+        """Test that the logged-in user is loaded once and writes invalidate it."""
+        self._login()
+        user_cache.reset_stats()
+        response, statements = self._get('/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_cache.stats()['misses'], 1)
+        self.assertEqual(len(statements), 1)
+        self.assertIn('FROM user', statements[0])
+
+        # Identity and the no-goal decision need no query at all
+        response, statements = self._get('/dashboard/')
+        self.assertIn(b"You don't have a billable hour goal", response.data)
+        self.assertEqual(statements, [])
+        self.assertEqual(user_cache.stats()['hits'], 1)
+
+        # A new goal invalidates the cached user, so it shows up immediately
+        db.session.add(Goal(user_id=1, year=date.today().year, total_hours=1500))
+        db.session.commit()
+        response, _ = self._get('/dashboard/')
+        self.assertIn(b'1500 hours', response.data)
+
+        # So does a data version bump
+        version = self._get('/api/dashboard')[0].get_etag()[0]
+        db.session.add(DailyLog(user_id=1, date=date.today(), hours_billed=6.0))
+        db.session.commit()
+        self.assertNotEqual(self._get('/api/dashboard')[0].get_etag()[0], version)
+
+    def test_cached_user_is_writable(self):
+        """Test that a user answered from the cache can still be modified."""
+        self._login()
+        self.client.get('/dashboard/')
+        db.session.expunge_all()
+        with self.app.test_request_context():
+            from app.models import load_user
+            user = load_user('1')
+            self.assertEqual(user.email, 'test@example.com')
+            user.work_schedule = '1,1,1,1,0,0,0'
+            db.session.commit()
+        db.session.expunge_all()
+        self.assertEqual(db.session.get(User, 1).work_schedule, '1,1,1,1,0,0,0')
+        self.assertTrue(db.session.get(User, 1).check_password('password'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+# tests/test_imports.py
+import io
+import os
+import tempfile
+import unittest
+from datetime import date
+from app import create_app, db
+from app.models import User, DailyLog, ImportCheckpoint
+from app.imports import import_time_entries, read_time_entries
+from config import Config
+
+CSV = """Email,Date,Hours,Matter
+a@example.com,2025-03-03,2.5,Smith
+b@example.com,2025-03-03,4.0,Jones
+a@example.com,03/03/2025,1.5,Jones
+a@example.com,2025-03-04,7,Smith
+nobody@example.com,2025-03-04,3,Smith
+b@example.com,2025-02-30,3,Smith
+b@example.com,2025-03-04,lots,Smith
+b@example.com,2025-03-04,30,Smith
+
+a@example.com,2025-03-03,1,Doe
+"""
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class TestImports(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        for email in ('a@example.com', 'b@example.com'):
+            user = User(email=email)
+            user.set_password('password')
+            db.session.add(user)
+        db.session.add(DailyLog(user_id=1, date=date(2025, 3, 3), hours_billed=9.0))
+        db.session.add(DailyLog(user_id=2, date=date(2025, 3, 10), hours_billed=6.0))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _logs(self):
+        return {(log.user_id, log.date): log.hours_billed for log in DailyLog.query}
+
+    def test_read_time_entries(self):
+        """Test row parsing and rejection reasons."""
+        rows = list(read_time_entries(io.StringIO(CSV)))
+        self.assertEqual(len(rows), 9)  # The blank line is skipped
+        self.assertEqual(rows[2][2:5], ('a@example.com', date(2025, 3, 3), 1.5))
+        errors = [row[5] for row in rows if row[5]]
+        self.assertEqual(len(errors), 3)
+        self.assertIn('Invalid date', errors[0])
+        self.assertIn('Invalid hours', errors[1])
+        self.assertIn('between 0 and 24', errors[2])
+        self.assertEqual(rows[-1][1], 11)  # Line numbers count the header and blank lines
+
+        with self.assertRaises(ValueError):
+            list(read_time_entries(io.StringIO('email,day,hours\n')))
+
+    def test_import(self):
+        """Test that entries are summed per user and day and replace existing logs."""
+        rejected = []
+        result = import_time_entries(io.BytesIO(CSV.encode()), 'export.csv',
+                                     on_reject=lambda line, reason: rejected.append(line))
+        self.assertEqual(result.rows_read, 9)
+        self.assertEqual(result.rows_imported, 5)
+        self.assertEqual(result.rows_rejected, 4)
+        self.assertEqual(rejected, [6, 7, 8, 9])
+        self.assertEqual(result.rejected[0], (6, 'Unknown user'))
+
+        logs = self._logs()
+        self.assertEqual(logs[(1, date(2025, 3, 3))], 5.0)
+        self.assertEqual(logs[(1, date(2025, 3, 4))], 7.0)
+        self.assertEqual(logs[(2, date(2025, 3, 3))], 4.0)
+        self.assertEqual(logs[(2, date(2025, 3, 10))], 6.0)  # Not in the file
+
+        # Importing the same file again does nothing
+        result = import_time_entries(io.BytesIO(CSV.encode()), 'export.csv')
+        self.assertTrue(result.already_imported)
+        self.assertEqual(result.rows_imported, 5)
+        self.assertEqual(DailyLog.query.count(), 4)
+
+        # Restarting reimports it with the same totals
+        result = import_time_entries(io.BytesIO(CSV.encode()), 'export.csv', restart=True)
+        self.assertEqual(result.rows_imported, 5)
+        self.assertEqual(self._logs(), logs)
+
+    def test_days_split_across_chunks(self):
+        """Test that a day's entries in different chunks add up."""
+        import_time_entries(io.BytesIO(CSV.encode()), 'export.csv', chunk_size=1)
+        self.assertEqual(self._logs()[(1, date(2025, 3, 3))], 5.0)
+
+    def test_resume_after_crash(self):
+        """Test that an interrupted import resumes after its last committed chunk."""
+        def crash(line, reason):
+            raise RuntimeError('crash')
+
+        with self.assertRaises(RuntimeError):
+            import_time_entries(io.BytesIO(CSV.encode()), 'export.csv', chunk_size=2, on_reject=crash)
+        checkpoint = ImportCheckpoint.query.one()
+        self.assertEqual(checkpoint.rows_done, 4)
+        self.assertFalse(checkpoint.completed)
+        logs = self._logs()
+        self.assertEqual(logs[(1, date(2025, 3, 3))], 4.0)  # Without the entry on line 11
+        self.assertEqual(logs[(1, date(2025, 3, 4))], 7.0)
+
+        result = import_time_entries(io.BytesIO(CSV.encode()), 'export.csv', chunk_size=2)
+        self.assertEqual(result.resumed_from, 4)
+        self.assertEqual(result.rows_read, 5)
+        logs = self._logs()
+        self.assertEqual(logs[(1, date(2025, 3, 3))], 5.0)
+        self.assertEqual(logs[(1, date(2025, 3, 4))], 7.0)
+        checkpoint = ImportCheckpoint.query.one()
+        self.assertTrue(checkpoint.completed)
+        self.assertEqual(checkpoint.rows_imported, 5)
+        self.assertEqual(checkpoint.rows_rejected, 4)
+
+    def test_upload(self):
+        """Test importing a user's own export through the upload route."""
+        with self.client:
+            self.client.post('/auth/login', data={'email': 'a@example.com', 'password': 'password'})
+            response = self.client.post('/dashboard/import', data={
+                'file': (io.BytesIO(CSV.encode()), 'export.csv')
+            }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'4 entries imported, 5 rejected', response.data)
+        self.assertIn(b'Entry belongs to another user', response.data)
+
+        logs = self._logs()
+        self.assertEqual(logs[(1, date(2025, 3, 3))], 5.0)
+        self.assertNotIn((2, date(2025, 3, 3)), logs)
+
+    def test_cli(self):
+        """Test the import-hours command."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.csv')
+            rejects = os.path.join(directory, 'rejects.csv')
+            with open(path, 'w') as f:
+                f.write(CSV)
+
+            runner = self.app.test_cli_runner()
+            result = runner.invoke(args=['import-hours', path, '--rejects', rejects])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn('9 rows read, 5 imported, 4 rejected', result.output)
+            with open(rejects) as f:
+                self.assertEqual(len(f.readlines()), 4)
+
+            result = runner.invoke(args=['import-hours', path])
+            self.assertIn('already imported', result.output)
+
+            result = runner.invoke(args=['import-hours', path, '--user', 'nobody@example.com'])
+            self.assertNotEqual(result.exit_code, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# tests/test_passwords.py
+import threading
+import unittest
+from unittest.mock import patch
+from app import create_app, db, password_hasher
+from app.models import User
+from app.passwords import PasswordHasher, PasswordHasherBusy, method_prefix
+from config import Config
+
+# Cheap hashes keep the tests fast
+class PasswordConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 1
+
+class TestPasswordHasher(unittest.TestCase):
+    def test_hash_and_policy(self):
+        """Test hashing, verification and detecting hashes made under another policy."""
+        hasher = PasswordHasher('pbkdf2:sha256:1000', workers=2)
+        pwhash = hasher.hash('secret')
+        self.assertTrue(pwhash.startswith('pbkdf2:sha256:1000$'))
+        self.assertTrue(hasher.verify(pwhash, 'secret'))
+        self.assertFalse(hasher.verify(pwhash, 'wrong'))
+        self.assertFalse(hasher.needs_rehash(pwhash))
+
+        hasher.method = 'pbkdf2:sha256:2000'
+        self.assertTrue(hasher.needs_rehash(pwhash))
+        self.assertTrue(hasher.verify(pwhash, 'secret'))  # Old hashes still verify
+        self.assertEqual(method_prefix('pbkdf2:sha256'), 'pbkdf2:sha256:1000000')
+        hasher.shutdown()
+
+        inline = PasswordHasher('pbkdf2:sha256:1000', workers=0)
+        self.assertTrue(inline.verify(inline.hash('secret'), 'secret'))
+
+    def test_busy(self):
+        """Test that callers give up when every worker stays busy."""
+        hasher = PasswordHasher('pbkdf2:sha256:1000', workers=1, timeout=0.05)
+        hasher.hash('secret')  # Starts the pool
+        release = threading.Event()
+        hasher._executor.submit(release.wait)
+        with self.assertRaises(PasswordHasherBusy):
+            hasher.hash('secret')
+        release.set()
+        self.assertTrue(hasher.verify(hasher.hash('secret'), 'secret'))
+        hasher.shutdown()
+
+class TestLoginRehash(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app(PasswordConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        user = User(email='test@example.com')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        password_hasher.shutdown()
+        self.app_context.pop()
+
+    def _login(self, password='password'):
+        response = self.client.post('/auth/login', data={'email': 'test@example.com', 'password': password})
+        self.client.get('/auth/logout')
+        return response
+
+    def _stored_hash(self):
+        db.session.expire_all()
+        return db.session.get(User, 1).password_hash
+
+    def test_rehash_on_login(self):
+        """Test that a policy change moves stored hashes on the next successful login, either way."""
+        self.assertTrue(self._stored_hash().startswith('pbkdf2:sha256:1000$'))
+        self._login()
+        self.assertTrue(self._stored_hash().startswith('pbkdf2:sha256:1000$'))
+
+        password_hasher.method = 'pbkdf2:sha256:2000'
+        self.assertEqual(self._login('wrong').status_code, 302)
+        self.assertTrue(self._stored_hash().startswith('pbkdf2:sha256:1000$'))
+        self._login()
+        self.assertTrue(self._stored_hash().startswith('pbkdf2:sha256:2000$'))
+
+        # Lowering the cost works the same way
+        password_hasher.method = 'pbkdf2:sha256:1500'
+        self._login()
+        self.assertTrue(self._stored_hash().startswith('pbkdf2:sha256:1500$'))
+        self.assertTrue(db.session.get(User, 1).check_password('password'))
+
+    def test_busy_login(self):
+        """Test that a login waiting too long for a hash worker gets a 503."""
+        password_hasher.timeout = 0.05
+        release = threading.Event()
+        password_hasher._executor.submit(release.wait)  # Started by set_password in setUp
+        response = self.client.post('/auth/login', data={'email': 'test@example.com', 'password': 'password'})
+        release.set()
+        self.assertEqual(response.status_code, 503)
+        self.assertIn(b'Too many people are signing in', response.data)
+
+    def test_busy_rehash_on_login(self):
+        """Test that a login still succeeds, keeping the old hash, when the rehash finds no hash worker."""
+        password_hasher.method = 'pbkdf2:sha256:2000'
+        with patch.object(password_hasher, 'hash', side_effect=PasswordHasherBusy):
+            response = self.client.post('/auth/login', data={'email': 'test@example.com', 'password': 'password'})
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn('/auth/login', response.location)
+        self.assertTrue(self._stored_hash().startswith('pbkdf2:sha256:1000$'))
+
+        # The next login with a free worker moves the hash
+        self.client.get('/auth/logout')
+        self._login()
+        self.assertTrue(self._stored_hash().startswith('pbkdf2:sha256:2000$'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# tests/test_query_audit.py
+import unittest
+from datetime import date
+from app import create_app, db
+from app.models import User, Goal, DailyLog
+from app.plans import logged_hours_by_day, refresh_goal_years
+from app.query_audit import QueryAudit, plan_findings
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+class TestQueryAudit(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        for email in ('a@example.com', 'b@example.com'):
+            user = User(email=email)
+            user.set_password('password')
+            db.session.add(user)
+        db.session.add(DailyLog(user_id=1, date=date(2025, 3, 3), hours_billed=7.5))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_plan_findings(self):
+        """Test that full scans and temp B-trees are flagged in SQLite and PostgreSQL plans."""
+        self.assertEqual(plan_findings('sqlite', [
+            'SEARCH goal USING INDEX sqlite_autoindex_goal_1 (user_id=?)',
+            'SCAN daily_log',
+            'SCAN user USING COVERING INDEX ix_user_email',
+            'SCAN (subquery-1)',
+            'SCAN CONSTANT ROW',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ]), ['full scan of daily_log', 'full scan of user using a covering index', 'temp B-tree for order by'])
+        self.assertEqual(plan_findings('postgresql', [
+            'Sort  (cost=1.03..1.04 rows=1 width=8)',
+            '  ->  Seq Scan on goal  (cost=0.00..1.02 rows=1 width=8)',
+            'Index Scan using day_off_user_id_date_key on day_off  (cost=0.15..8.17 rows=1 width=4)',
+        ]), ['sort without an index', 'full scan of goal'])
+
+    def test_audit(self):
+        """Test that statements are counted, explained once and attributed to the app code that ran them."""
+        with QueryAudit() as audit:
+            for _ in range(3):
+                logged_hours_by_day(1, date(2025, 1, 1), date(2025, 12, 31))
+            DailyLog.query.all()
+
+        by_day, = [s for s in audit.statements.values() if s.statement.startswith('SELECT daily_log.date')]
+        self.assertEqual(by_day.count, 3)
+        self.assertTrue(by_day.origin.startswith('app/plans.py:'))
+        self.assertIn('(logged_hours_by_day)', by_day.origin)
+        self.assertEqual(by_day.findings, [])
+        # Day and month sums read the covering index, not the table
+        self.assertIn('COVERING INDEX ix_daily_log_user_id_date_hours_billed', by_day.plan[0])
+
+        scan, = audit.flagged
+        self.assertIsNone(scan.origin)
+        self.assertEqual(scan.findings, ['full scan of daily_log'])
+
+        # Listeners are removed on exit
+        logged_hours_by_day(1, date(2025, 1, 1), date(2025, 12, 31))
+        self.assertEqual(by_day.count, 3)
+
+    def test_goal_years_without_sort(self):
+        """Test that refreshing several users' goal years reads the goals in index order."""
+        db.session.add_all([
+            Goal(user_id=1, year=2026, total_hours=1800), Goal(user_id=1, year=2025, total_hours=1700),
+            Goal(user_id=2, year=2025, total_hours=1600),
+        ])
+        db.session.commit()
+        with QueryAudit() as audit:
+            refresh_goal_years([1, 2])
+        self.assertEqual(audit.flagged, [])
+        self.assertEqual([db.session.get(User, user_id).goal_years for user_id in (1, 2)], ['2025,2026', '2025'])
+
+if __name__ == '__main__':
+    unittest.main()
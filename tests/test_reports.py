@@ -0,0 +1,147 @@
+# tests/test_reports.py
+import csv
+import io
+import json
+import unittest
+from datetime import date
+from app import create_app, db
+from app.models import User, Goal, DayOff, DailyLog, PlannedDay
+from app.plans import refresh_planned_days
+from app.reports import iter_report_rows, csv_lines, jsonl_lines
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class TestReports(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app(TestConfig)
+        self.app.config['REPORT_ADMINS'] = ['a@example.com']
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        for email in ('a@example.com', 'b@example.com', 'c@example.com'):
+            user = User(email=email)
+            user.set_password('password')
+            db.session.add(user)
+        db.session.add(Goal(user_id=1, year=2025, total_hours=1800))
+        db.session.add(Goal(user_id=2, year=2025, total_hours=2000))
+        db.session.add(DayOff(user_id=1, date=date(2025, 3, 4), type='Vacation'))
+        db.session.add(DailyLog(user_id=1, date=date(2025, 3, 3), hours_billed=6.5))
+        db.session.add(DailyLog(user_id=1, date=date(2025, 3, 8), hours_billed=2.0))  # A Saturday
+        db.session.add(DailyLog(user_id=3, date=date(2025, 3, 5), hours_billed=1.0))  # No goal
+        db.session.commit()
+
+        # Leave user 2's plan unmaterialized
+        PlannedDay.query.filter_by(user_id=2).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _login(self, email):
+        self.client.post('/auth/login', data={'email': email, 'password': 'password'})
+
+    def test_iter_report_rows(self):
+        """Test rows for materialized, unmaterialized and goal-less users."""
+        rows = list(iter_report_rows(date(2025, 3, 3), date(2025, 3, 9)))
+        by_user = {}
+        for email, day, target_hours, logged_hours in rows:
+            by_user.setdefault(email, []).append((day, target_hours, logged_hours))
+
+        days = [day for day, _, _ in by_user['a@example.com']]
+        self.assertEqual(days, [date(2025, 3, 3), date(2025, 3, 5), date(2025, 3, 6),
+                                date(2025, 3, 7), date(2025, 3, 8)])
+        first = by_user['a@example.com'][0]
+        self.assertGreater(first[1], 0)
+        self.assertEqual(first[2], 6.5)
+        self.assertEqual(by_user['a@example.com'][-1][1:], (0.0, 2.0))
+
+        # Generated on the fly, but not written
+        self.assertEqual(len(by_user['b@example.com']), 5)
+        self.assertEqual(PlannedDay.query.filter_by(user_id=2).count(), 0)
+        refresh_planned_days(2, 2025)
+        self.assertEqual(
+            [row for row in rows if row[0] == 'b@example.com'],
+            [row for row in iter_report_rows(date(2025, 3, 3), date(2025, 3, 9), [2])]
+        )
+
+        self.assertEqual(by_user['c@example.com'], [(date(2025, 3, 5), 0.0, 1.0)])
+
+        # Rows are ordered by user, then date
+        self.assertEqual([row[0] for row in rows], sorted(row[0] for row in rows))
+
+    def test_multi_year(self):
+        """Test that exports spanning plan years read each year's plan."""
+        db.session.add(Goal(user_id=1, year=2026, total_hours=1500))
+        db.session.commit()
+        rows = list(iter_report_rows(date(2025, 12, 29), date(2026, 1, 2), [1]))
+        self.assertEqual([row[1] for row in rows], [
+            date(2025, 12, 29), date(2025, 12, 30), date(2025, 12, 31), date(2026, 1, 1), date(2026, 1, 2)
+        ])
+        self.assertTrue(all(row[2] > 0 for row in rows))
+        self.assertNotAlmostEqual(rows[0][2], rows[-1][2])  # Different goals
+
+    def test_formats(self):
+        """Test CSV and JSON Lines rendering."""
+        rows = [('a@example.com', date(2025, 3, 3), 7.123456, 6.5)]
+        text = ''.join(csv_lines(iter(rows)))
+        self.assertEqual(list(csv.reader(io.StringIO(text))), [
+            ['email', 'date', 'target_hours', 'logged_hours'],
+            ['a@example.com', '2025-03-03', '7.1235', '6.5']
+        ])
+        self.assertEqual(''.join(csv_lines(iter([]))), 'email,date,target_hours,logged_hours\r\n')
+
+        lines = ''.join(jsonl_lines(iter(rows))).splitlines()
+        self.assertEqual(json.loads(lines[0]), {
+            'email': 'a@example.com', 'date': '2025-03-03', 'target_hours': 7.1235, 'logged_hours': 6.5
+        })
+
+    def test_export_route(self):
+        """Test the streamed export endpoint and its access rules."""
+        self._login('b@example.com')
+        response = self.client.get('/api/export/csv?start=2025-03-03&end=2025-03-09')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(all(line.startswith('b@example.com') for line in lines[1:]))
+
+        self.assertEqual(self.client.get('/api/export/csv?scope=firm').status_code, 403)
+        self.assertEqual(self.client.get('/api/export/xml').status_code, 404)
+        self.assertEqual(self.client.get('/api/export/csv?start=2025-13-01').status_code, 400)
+        self.assertEqual(self.client.get('/api/export/csv?start=2025-03-09&end=2025-03-03').status_code, 400)
+        self.assertEqual(self.client.get('/api/export/csv?start=2024-01-01&end=2024-12-31').status_code, 200)
+        self.assertEqual(self.client.get('/api/export/csv?start=2024-01-01&end=2025-01-01').status_code, 400)
+        self.assertEqual(self.client.get('/api/export/csv?start=0001-01-01&end=9999-12-31').status_code, 400)
+
+        self.client.get('/auth/logout')
+        self._login('a@example.com')
+        response = self.client.get('/api/export/jsonl?start=2025-03-03&end=2025-03-09&scope=firm')
+        emails = {json.loads(line)['email'] for line in response.get_data(as_text=True).splitlines()}
+        self.assertEqual(emails, {'a@example.com', 'b@example.com', 'c@example.com'})
+
+    def test_cli(self):
+        """Test the export-report command."""
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['export-report', '--start', '2025-03-03', '--end', '2025-03-09',
+                                     '--user', 'c@example.com'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(result.output.splitlines(), [
+            'email,date,target_hours,logged_hours', 'c@example.com,2025-03-05,0.0,1.0'
+        ])
+
+        result = runner.invoke(args=['export-report', '--user', 'nobody@example.com'])
+        self.assertNotEqual(result.exit_code, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+# tests/test_rollups.py
+import io
+import unittest
+from datetime import date
+from app import create_app, db
+from app.models import User, DailyLog, MonthlyLogRollup
+from app.imports import import_time_entries
+from app.plans import upsert_daily_logs, logged_hours_total
+from app.rollups import rebuild_log_rollups, verify_log_rollups
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+class TestRollups(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        for email in ('a@example.com', 'b@example.com'):
+            user = User(email=email)
+            user.set_password('password')
+            db.session.add(user)
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _rollups(self):
+        return {
+            (rollup.user_id, rollup.year, rollup.month): (rollup.total_hours, rollup.logged_days)
+            for rollup in MonthlyLogRollup.query
+        }
+
+    def test_orm_writes(self):
+        """Test that inserts, updates, moves and deletes keep the rollups in sync."""
+        log = DailyLog(user_id=1, date=date(2025, 3, 3), hours_billed=6.5)
+        db.session.add(log)
+        db.session.add(DailyLog(user_id=1, date=date(2025, 3, 4), hours_billed=2.0))
+        db.session.add(DailyLog(user_id=2, date=date(2025, 3, 4), hours_billed=1.0))
+        db.session.commit()
+        self.assertEqual(self._rollups(), {(1, 2025, 3): (8.5, 2), (2, 2025, 3): (1.0, 1)})
+
+        log.hours_billed = 7.0
+        db.session.commit()
+        self.assertEqual(self._rollups()[(1, 2025, 3)], (9.0, 2))
+
+        # Moving a log updates both the old and the new month
+        log.date = date(2025, 4, 1)
+        db.session.commit()
+        self.assertEqual(self._rollups()[(1, 2025, 3)], (2.0, 1))
+        self.assertEqual(self._rollups()[(1, 2025, 4)], (7.0, 1))
+
+        # Emptied months lose their row
+        db.session.delete(log)
+        db.session.commit()
+        self.assertNotIn((1, 2025, 4), self._rollups())
+
+        # Rolled back writes leave the rollups alone
+        db.session.add(DailyLog(user_id=2, date=date(2025, 3, 5), hours_billed=3.0))
+        db.session.flush()
+        db.session.rollback()
+        db.session.add(DailyLog(user_id=1, date=date(2025, 5, 5), hours_billed=1.0))
+        db.session.commit()
+        self.assertEqual(self._rollups()[(2, 2025, 3)], (1.0, 1))
+        self.assertEqual(verify_log_rollups(), [])
+
+    def test_bulk_writes(self):
+        """Test that batch upserts and imports keep the rollups in sync."""
+        upsert_daily_logs(1, [(date(2025, 3, 3), 4.0), (date(2025, 2, 28), 3.0)])
+        db.session.commit()
+        upsert_daily_logs(1, [(date(2025, 3, 3), 5.0)])
+        db.session.commit()
+        self.assertEqual(self._rollups(), {(1, 2025, 2): (3.0, 1), (1, 2025, 3): (5.0, 1)})
+
+        csv = b'Email,Date,Hours\na@example.com,2025-03-04,2\nb@example.com,2025-06-02,1.5\n'
+        result = import_time_entries(io.BytesIO(csv), 'hours.csv')
+        self.assertEqual(result.rows_imported, 2)
+        self.assertEqual(self._rollups()[(1, 2025, 3)], (7.0, 2))
+        self.assertEqual(self._rollups()[(2, 2025, 6)], (1.5, 1))
+        self.assertEqual(logged_hours_total(1, 2025), 10.0)
+        self.assertEqual(verify_log_rollups(), [])
+
+    def test_verify_and_rebuild(self):
+        """Test that drift is reported and repaired."""
+        db.session.add(DailyLog(user_id=1, date=date(2025, 3, 3), hours_billed=6.5))
+        db.session.add(DailyLog(user_id=2, date=date(2025, 3, 3), hours_billed=1.0))
+        db.session.commit()
+
+        # Writes that bypass the session, e.g. manual SQL
+        db.session.execute(DailyLog.__table__.update().where(DailyLog.user_id == 1).values(hours_billed=8.0))
+        db.session.execute(MonthlyLogRollup.__table__.delete().where(MonthlyLogRollup.user_id == 2))
+        db.session.commit()
+
+        drift = verify_log_rollups()
+        self.assertEqual(drift, [
+            {'user_id': 1, 'year': 2025, 'month': 3, 'expected': (8.0, 1), 'stored': (6.5, 1)},
+            {'user_id': 2, 'year': 2025, 'month': 3, 'expected': (1.0, 1), 'stored': None},
+        ])
+        self.assertEqual(len(verify_log_rollups([2])), 1)
+
+        self.assertEqual(rebuild_log_rollups([1]), 1)
+        db.session.commit()
+        self.assertEqual(len(verify_log_rollups()), 1)
+        rebuild_log_rollups()
+        db.session.commit()
+        self.assertEqual(verify_log_rollups(), [])
+
+    def test_cli(self):
+        """Test the rollups verify and rebuild commands."""
+        db.session.add(DailyLog(user_id=1, date=date(2025, 3, 3), hours_billed=6.5))
+        db.session.commit()
+        runner = self.app.test_cli_runner()
+
+        result = runner.invoke(args=['rollups', 'verify'])
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        db.session.execute(MonthlyLogRollup.__table__.delete())
+        db.session.commit()
+        result = runner.invoke(args=['rollups', 'verify', '--user', 'a@example.com'])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('user 1 2025-03', result.output)
+
+        result = runner.invoke(args=['rollups', 'rebuild'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Wrote 1 monthly rollups', result.output)
+        self.assertEqual(self._rollups(), {(1, 2025, 3): (6.5, 1)})
+
+        result = runner.invoke(args=['rollups', 'rebuild', '--user', 'nobody@example.com'])
+        self.assertNotEqual(result.exit_code, 0)
+
+if __name__ == '__main__':
+    unittest.main()
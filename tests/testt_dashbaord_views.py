@@ -1,17 +1,27 @@
 # tests/test_dashboard_views.py
 import unittest
-from datetime import date
+from datetime import date, timedelta
+from unittest.mock import patch
+from sqlalchemy import event
 from flask import url_for
-from app import create_app, db
+from app import create_app, db, plan_cache
 from app.models import User, Goal, DayOff, MonthlyWeight, DailyLog
+from app.calculations import BillableHourCalculationService
+from app.plans import (
+    load_planned_days, refresh_planned_days, logged_hours_by_month, logged_hours_by_day,
+    load_plan_inputs, request_plan_inputs, subscribe_holiday_calendar, plan_year_of
+)
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
 
 class TestDashboardViews(unittest.TestCase):
     def setUp(self):
         """Set up test environment."""
-        self.app = create_app()
-        self.app.config['TESTING'] = True
-        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app = create_app(TestConfig)
         self.app_context = self.app.app_context()
         self.app_context.push()
         self.client = self.app.test_client()
@@ -75,6 +85,49 @@ class TestDashboardViews(unittest.TestCase):
         response = self.client.get('/dashboard/')
         self.assertEqual(response.status_code, 200)
     
+    def test_dashboard_queries(self):
+        """Test that the dashboard aggregates logs in SQL and only reads the rows it needs."""
+        today = date.today()
+        db.session.add(Goal(user_id=1, year=today.year, total_hours=1800))
+        logged = {log.date for log in DailyLog.query.filter_by(user_id=1)}
+        for offset in range(3 * 365):
+            day = today - timedelta(days=offset)
+            if day.weekday() < 5 and day not in logged:
+                db.session.add(DailyLog(user_id=1, date=day, hours_billed=7.0))
+        db.session.commit()
+        self.client.get('/dashboard/')  # Materialize the plan
+        
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = self.client.get('/dashboard/')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(response.status_code, 200)
+        
+        # Plan inputs with the goal, plan, monthly totals and this month's/week's
+        # logs; the logged-in user comes from the user cache
+        self.assertLessEqual(len(statements), 4)
+        self.assertFalse([statement for statement in statements if statement.startswith('SELECT user.')])
+        log_statements = [statement for statement in statements if 'daily_log' in statement]
+        self.assertEqual(len(log_statements), 1)
+        self.assertNotIn('daily_log.id', log_statements[0])
+        self.assertIn('daily_log.date >=', log_statements[0])
+        rollup_statements = [statement for statement in statements if 'monthly_log_rollup' in statement]
+        self.assertEqual(len(rollup_statements), 1)
+        
+        # Monthly totals come from the rollups, and only recent days are read row by row
+        year_logs = [log for log in DailyLog.query.filter_by(user_id=1) if log.date.year == today.year]
+        monthly = logged_hours_by_month(1, today.year)
+        self.assertAlmostEqual(sum(monthly.values()), sum(log.hours_billed for log in year_logs))
+        self.assertAlmostEqual(monthly[today.month], sum(
+            log.hours_billed for log in year_logs if log.date.month == today.month
+        ))
+        recent = logged_hours_by_day(1, today.replace(day=1), today)
+        self.assertLessEqual(len(recent), 23)
+    
     def test_calendar_view(self):
         """Test the calendar view."""
         response = self.client.get('/dashboard/calendar')
@@ -84,7 +137,47 @@ class TestDashboardViews(unittest.TestCase):
         response = self.client.get('/dashboard/calendar?month=6&year=2025')
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'June', response.data)  # Should contain month name
-    
+
+    def test_calendar_month_queries(self):
+        """Test that calendar navigation only reads the displayed month."""
+        # Take all of August off so its window has no targets
+        day = date(2025, 8, 1)
+        while day.month == 8:
+            db.session.add(DayOff(user_id=1, date=day, type='Vacation'))
+            day += timedelta(days=1)
+        db.session.add(DailyLog(user_id=1, date=date(2025, 7, 1), hours_billed=6.0))
+        db.session.commit()
+        self.client.get('/dashboard/calendar?month=6&year=2025')  # Materialize the plan
+
+        for month in (7, 8):
+            statements = []
+            def record(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                response = self.client.get(f'/dashboard/calendar?month={month}&year=2025')
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+            self.assertEqual(response.status_code, 200)
+
+            # The year's plan is never regenerated or rewritten
+            for statement in statements:
+                self.assertNotIn('day_off', statement)
+                self.assertNotIn('INSERT', statement)
+                self.assertNotIn('DELETE', statement)
+            log_statements = [statement for statement in statements if 'daily_log' in statement]
+            self.assertEqual(len(log_statements), 1)
+            self.assertIn('daily_log.date >=', log_statements[0])
+
+        response = self.client.get('/dashboard/calendar?month=7&year=2025')
+        self.assertIn(b'Logged: 6.0h', response.data)
+        self.assertIn(b'month=6', response.data)
+        self.assertIn(b'month=8', response.data)
+
+        response = self.client.get('/dashboard/calendar?month=1&year=2025')
+        self.assertIn(b'month=12', response.data)
+        self.assertIn(b'year=2024', response.data)
+
     def test_log_hours(self):
         """Test the log hours functionality."""
         # Test GET (form display)
@@ -106,6 +199,173 @@ class TestDashboardViews(unittest.TestCase):
         self.assertIsNotNone(log)
         self.assertEqual(log.hours_billed, 7.5)
     
+    def test_log_hours_catch_up(self):
+        """Test that logging hours returns a revised catch-up suggestion."""
+        self._check_log_hours_catch_up()
+    
+    def test_log_hours_catch_up_fiscal_year(self):
+        """Test the catch-up suggestion when the plan year starts this month."""
+        self.app.config['FISCAL_YEAR_START_MONTH'] = date.today().month
+        self._check_log_hours_catch_up()
+    
+    def _check_log_hours_catch_up(self):
+        today = date.today()
+        db.session.add(Goal(user_id=1, year=plan_year_of(today), total_hours=1800))
+        db.session.commit()
+        
+        response = self.client.post(
+            '/dashboard/log_hours',
+            data={'date': today.isoformat(), 'hours': 6.0}
+        )
+        catch_up = response.get_json()['catch_up']
+        self.assertAlmostEqual(catch_up['remaining_hours'], 1794.0)
+        self.assertEqual(len(catch_up['next_days']), min(5, catch_up['remaining_workdays']))
+        
+        # A second log re-solves from the cached planner
+        hits = plan_cache.stats()['hits']
+        response = self.client.post(
+            '/dashboard/log_hours',
+            data={'date': today.isoformat(), 'hours': 8.0}
+        )
+        self.assertAlmostEqual(response.get_json()['catch_up']['remaining_hours'], 1792.0)
+        self.assertEqual(plan_cache.stats()['hits'], hits + 1)
+        remaining_workdays = response.get_json()['catch_up']['remaining_workdays']
+        
+        # A day off written by another worker never invalidates this worker's
+        # cache, but changes the digest the planner is cached under
+        day_off = today + timedelta(days=1)
+        while day_off.weekday() >= 5:
+            day_off += timedelta(days=1)
+        with patch.object(plan_cache, 'invalidate', return_value=0):
+            db.session.add(DayOff(user_id=1, date=day_off, type='Vacation'))
+            db.session.commit()
+        response = self.client.post(
+            '/dashboard/log_hours',
+            data={'date': today.isoformat(), 'hours': 8.0}
+        )
+        self.assertEqual(response.get_json()['catch_up']['remaining_workdays'], remaining_workdays - 1)
+    
+    def test_scenarios(self):
+        """Test that scenarios are evaluated without touching the stored plan."""
+        stored = load_planned_days(1, date(2025, 1, 1), date(2025, 12, 31))
+        
+        response = self.client.post('/dashboard/scenarios?year=2025', json={'scenarios': [
+            {'label': 'august off', 'total_hours': 1900,
+             'vacations': [{'start': '2025-08-01', 'end': '2025-08-14'}],
+             'monthly_weights': {'10': 1.2, '11': 1.2, '12': 1.2}},
+            {'label': 'stretch', 'total_hours': 2700}
+        ]})
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual([result['feasible'] for result in data['results']], [True, False])
+        self.assertEqual(load_planned_days(1, date(2025, 1, 1), date(2025, 12, 31)), stored)
+        
+        response = self.client.post('/dashboard/scenarios?year=2025', json={'scenarios': [
+            {'monthly_weights': {'13': 1.0}}
+        ]})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_holiday_calendar(self):
+        """Test that subscribing to a calendar rewrites the plan and worked holidays are kept."""
+        self.assertIn(date(2025, 7, 4), load_planned_days(1, date(2025, 7, 1), date(2025, 7, 31)))
+        
+        user = db.session.get(User, 1)
+        user.holiday_calendar = 'us_firm'
+        db.session.commit()
+        july = load_planned_days(1, date(2025, 7, 1), date(2025, 7, 31))
+        self.assertNotIn(date(2025, 7, 4), july)
+        self.assertNotIn(date(2025, 11, 28), load_planned_days(1, date(2025, 11, 1), date(2025, 11, 30)))
+        
+        db.session.add(DayOff(user_id=1, date=date(2025, 7, 4), type='Worked Holiday'))
+        db.session.commit()
+        self.assertIn(date(2025, 7, 4), load_planned_days(1, date(2025, 7, 1), date(2025, 7, 31)))
+    
+    def test_subscribe_holiday_calendar(self):
+        """Test that per-user holiday days off move onto a calendar without changing the plan."""
+        plan = load_planned_days(1, date(2025, 1, 1), date(2025, 12, 31))
+        runner = self.app.test_cli_runner()
+        
+        result = runner.invoke(args=['holidays', 'subscribe', '--dry-run'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Would move 1 users', result.output)
+        self.assertIsNone(db.session.get(User, 1).holiday_calendar)
+        self.assertEqual(DayOff.query.filter_by(user_id=1, type='Holiday').count(), 2)
+        
+        # Both holidays are on both calendars; the firm calendar adds fewer holidays to take back
+        result = runner.invoke(args=['holidays', 'subscribe'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('test@example.com: us_firm, 2 holiday days off removed, 5 worked holidays added', result.output)
+        self.assertEqual(db.session.get(User, 1).holiday_calendar, 'us_firm')
+        self.assertEqual(DayOff.query.filter_by(user_id=1, type='Holiday').count(), 0)
+        self.assertEqual(load_planned_days(1, date(2025, 1, 1), date(2025, 12, 31)), plan)
+        self.assertEqual(load_plan_inputs(1, 2025).generate(), plan)
+        
+        # Subscribed users are left alone
+        result = runner.invoke(args=['holidays', 'subscribe'])
+        self.assertIn('Moved 0 users', result.output)
+    
+    def test_subscribe_holiday_calendar_partial_day(self):
+        """Test that a partial day on a calendar holiday keeps the user off the calendar."""
+        # Martin Luther King Jr. Day is a federal holiday but not a firm one
+        db.session.add(DayOff(user_id=1, date=date(2025, 1, 20), type='Personal', fraction=0.5))
+        db.session.commit()
+        self.assertIsNone(subscribe_holiday_calendar(db.session.get(User, 1), 'us_federal'))
+        self.assertEqual(subscribe_holiday_calendar(db.session.get(User, 1), 'us_firm'), ('us_firm', 2, 5))
+    
+    def test_partial_capacity(self):
+        """Test that partial days and work schedules flow into the stored plan."""
+        db.session.add(DayOff(user_id=1, date=date(2025, 3, 10), type='Personal', fraction=0.5))
+        db.session.commit()
+        march = load_planned_days(1, date(2025, 3, 1), date(2025, 3, 31))
+        self.assertAlmostEqual(march[date(2025, 3, 10)], march[date(2025, 3, 11)] / 2)
+        
+        user = db.session.get(User, 1)
+        user.work_schedule = '1,1,1,1,0,0,0'
+        db.session.commit()
+        march = load_planned_days(1, date(2025, 3, 1), date(2025, 3, 31))
+        self.assertNotIn(date(2025, 3, 14), march)  # Fridays are off
+        self.assertAlmostEqual(sum(load_planned_days(1, date(2025, 1, 1), date(2025, 12, 31)).values()), 2000)
+    
+    def test_plan_inputs(self):
+        """Test that plan inputs are read in one statement and memoized for the request."""
+        db.session.add(DayOff(user_id=1, date=date(2025, 3, 10), type='Personal', fraction=0.5))
+        db.session.add(DayOff(user_id=1, date=date(2025, 7, 4), type='Worked Holiday'))
+        db.session.get(User, 1).holiday_calendar = 'us_federal'
+        db.session.commit()
+        
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            inputs = load_plan_inputs(1, 2025)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(inputs.total_hours, 2000)
+        self.assertEqual(sorted(inputs.days_off), [date(2025, 1, 1), date(2025, 12, 25)])
+        self.assertEqual(inputs.partial_days, {date(2025, 3, 10): 0.5})
+        self.assertEqual(inputs.monthly_weights[6], 0.8)
+        self.assertEqual(len(inputs.monthly_weights), 12)
+        holidays = set(inputs.holidays.tolist())
+        self.assertIn(date(2025, 11, 27), holidays)
+        self.assertNotIn(date(2025, 7, 4), holidays)  # Worked
+        self.assertFalse(load_plan_inputs(1, 2026).has_goal)
+        
+        with self.app.test_request_context():
+            first = request_plan_inputs(1, 2025)
+            self.assertIs(request_plan_inputs(1, 2025), first)
+            
+            # A commit that changes the plan drops the memoized inputs
+            self.assertFalse(request_plan_inputs(1, 2026).has_goal)
+            db.session.add(Goal(user_id=1, year=2026, total_hours=1500))
+            db.session.commit()
+            self.assertEqual(request_plan_inputs(1, 2026).total_hours, 1500)
+            self.assertIs(request_plan_inputs(1, 2025), first)
+        
+        with self.app.test_request_context():
+            self.assertIsNot(request_plan_inputs(1, 2025), first)
+    
     def test_update_existing_log(self):
         """Test updating an existing log."""
         # The log for Jan 5 was created in setUp with 8.5 hours
@@ -122,5 +382,115 @@ class TestDashboardViews(unittest.TestCase):
         ).first()
         self.assertEqual(log.hours_billed, 9.0)
 
+    def test_log_hours_batch(self):
+        """Test logging a week of hours in one request."""
+        version = db.session.get(User, 1).data_version
+        entries = [
+            {'date': '2025-01-05', 'hours': 6.0},  # Already logged in setUp
+            {'date': '2025-01-07', 'hours': 7.5},
+            {'date': '2025-01-08', 'hours': 8.0},
+            {'date': '2025-01-08', 'hours': 9.0},
+            {'date': 'not-a-date', 'hours': 5.0},
+            {'date': '2025-01-09', 'hours': 30}
+        ]
+        response = self.client.post('/dashboard/log_hours/batch', json={'entries': entries})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertFalse(data['success'])
+        self.assertEqual(
+            [result['status'] for result in data['results']],
+            ['updated', 'created', 'created', 'error', 'error', 'error']
+        )
+        self.assertIn('Duplicate', data['results'][3]['error'])
+        self.assertIsNotNone(data['catch_up'])
+
+        logged = {log.date: log.hours_billed for log in DailyLog.query.filter_by(user_id=1)}
+        self.assertEqual(logged[date(2025, 1, 5)], 6.0)
+        self.assertEqual(logged[date(2025, 1, 7)], 7.5)
+        self.assertEqual(logged[date(2025, 1, 8)], 8.0)
+        self.assertNotIn(date(2025, 1, 9), logged)
+        self.assertEqual(db.session.get(User, 1).data_version, version + 1)
+
+        # Re-posting the same entries updates in place
+        response = self.client.post('/dashboard/log_hours/batch', json={'entries': entries[1:3]})
+        self.assertTrue(response.get_json()['success'])
+        self.assertEqual(DailyLog.query.filter_by(user_id=1).count(), 4)
+
+        response = self.client.post('/dashboard/log_hours/batch', json={'entries': []})
+        self.assertEqual(response.status_code, 400)
+        self.app.config['LOG_BATCH_MAX'] = 2
+        response = self.client.post('/dashboard/log_hours/batch', json={'entries': entries[:3]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_plan_cache_invalidated_on_write(self):
+        """Test that writing a plan input drops the user's cached entries."""
+        plan_cache.clear()
+        plan_cache.set(1, 2025, load_plan_inputs(1, 2025).digest(), 'planner 2025')
+        plan_cache.set(1, 2026, load_plan_inputs(1, 2026).digest(), 'planner 2026')
+        self.assertEqual(plan_cache.stats()['size'], 2)
+        
+        # Adding a day off for 2025 only invalidates the 2025 entry
+        db.session.add(DayOff(user_id=1, date=date(2025, 6, 2), type='Vacation'))
+        db.session.commit()
+        self.assertEqual(plan_cache.stats()['size'], 1)
+        self.assertEqual(plan_cache.get(1, 2026, load_plan_inputs(1, 2026).digest()), 'planner 2026')
+    
+    def test_plan_cache_stats(self):
+        """Test that the plan cache counters are limited to report admins."""
+        self.assertEqual(self.client.get('/dashboard/plan_cache').status_code, 403)
+        
+        self.app.config['REPORT_ADMINS'] = ['test@example.com']
+        plan_cache.clear()
+        plan_cache.reset_stats()
+        plan_cache.get(1, 2025, 'digest')
+        response = self.client.get('/dashboard/plan_cache')
+        self.assertEqual(response.status_code, 200)
+        stats = response.get_json()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['size'], 0)
+        self.assertEqual(stats['max_entries'], plan_cache.max_entries)
+    
+    def test_planned_days_materialized(self):
+        """Test that PlannedDay rows follow the user's plan inputs."""
+        service = BillableHourCalculationService()
+        
+        def expected_plan():
+            days_off = [day.date for day in DayOff.query.filter_by(user_id=1)]
+            weights = {mw.month: mw.weight for mw in MonthlyWeight.query.filter_by(user_id=1, year=2025)}
+            return service.generate_plan(2025, 2000, days_off, weights)
+        
+        def stored_plan():
+            return load_planned_days(1, date(2025, 1, 1), date(2025, 12, 31))
+        
+        plan = stored_plan()
+        self.assertEqual(len(plan), len(expected_plan()))
+        for day, hours in expected_plan().items():
+            self.assertAlmostEqual(plan[day], hours)
+        
+        # A day off on a weekend changes nothing
+        db.session.add(DayOff(user_id=1, date=date(2025, 3, 8), type='Personal'))
+        db.session.flush()
+        self.assertEqual(refresh_planned_days(1, 2025), set())
+        
+        # Moving a day off within its month only rewrites that month
+        day_off = DayOff.query.filter_by(user_id=1, date=date(2025, 12, 25)).first()
+        day_off.date = date(2025, 12, 26)
+        db.session.flush()
+        self.assertEqual(refresh_planned_days(1, 2025), {12})
+        
+        # A new workday off shifts the whole year's allocation
+        db.session.add(DayOff(user_id=1, date=date(2025, 3, 10), type='Vacation'))
+        db.session.commit()
+        self.assertEqual(refresh_planned_days(1, 2025), set())
+        plan = stored_plan()
+        self.assertNotIn(date(2025, 3, 10), plan)
+        for day, hours in expected_plan().items():
+            self.assertAlmostEqual(plan[day], hours)
+        
+        # Deleting the goal removes the materialized plan
+        db.session.delete(Goal.query.filter_by(user_id=1, year=2025).first())
+        db.session.commit()
+        self.assertEqual(stored_plan(), {})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file